@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import pandas as pd
+from datetime import date, timedelta
 from components.authentication import authenticate, show_authentication_status, logout, check_admin_access, check_permissions
 from components.upload import render_upload_form
 from components.charts import (
@@ -10,12 +11,17 @@ from components.charts import (
     render_top_variance_items,
     render_user_submission_chart,
     render_admin_dashboard_summary,
-    render_manager_dashboard_summary
+    render_manager_dashboard_summary,
+    prepare_dashboard_frame
 )
 from database.client import SupabaseClient
+from database.schema import CYCLE_COUNTS_PROJECTIONS
+from database.frames import cycle_counts_frame
 import math
-from components.inventory_reconciliation import render_reconciliation_opportunities
+import uuid
+from components.inventory_reconciliation import render_reconciliation_opportunities, RECONCILIATION_MAX_DAYS
 from components.tutorial import render_tutorial
+from components.export import render_data_export
 
 # Set page configuration
 st.set_page_config(
@@ -51,6 +57,10 @@ secrets_path = os.path.join(".streamlit", "secrets.toml")
 if "show_upload_success" not in st.session_state:
     st.session_state["show_upload_success"] = False
 
+# Tags this session's calls in the Performance panel and load test reports
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex[:8]
+
 # Initialize authentication state if not already done
 if "authentication_status" not in st.session_state:
     st.session_state["authentication_status"] = None
@@ -64,70 +74,50 @@ def logout_top():
     logout()
     st.rerun()
 
+def format_record_count(count):
+    """Abbreviate an approximate record count, e.g. 1234567 -> 1.2M"""
+    for threshold, suffix in ((1_000_000_000, "B"), (1_000_000, "M"), (1_000, "K")):
+        if count >= threshold:
+            return f"{count / threshold:.1f}{suffix}"
+    return str(count)
+
 # Dashboard function - moved from Dashboard.py
 def render_dashboard():
     try:
         # Get data from database
         db_client = SupabaseClient()
         
-        # Get the count
-        total_count = db_client.count_cycle_counts()
+        # Manager sessions are scoped to their own warehouse by the client itself
+        is_admin = check_admin_access()
+        
+        # Get the count; an estimate is enough to show the total and spot an empty table
+        total_count = db_client.count_cycle_counts(mode="estimated")
         
         if total_count == 0:
             st.info("No data available in the database")
             return
         
-        # Fetch ALL data in batches
-        data = db_client.get_all_cycle_counts(limit=None)
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-        
-        # Get pagination parameters for display only (not for fetching)
-        rows_per_page = st.session_state.get("rows_per_page", 100)
-        page_number = st.session_state.get("page_number", 1)
+        if is_admin:
+            st.success("Admin view")
         
         # Get warehouse data for lookups
         warehouses_data = db_client.get_all_warehouses()
         warehouse_map = {w['id']: w['name'] for w in warehouses_data}
         
         # Get user data for lookups
-        users_data = db_client.get_all_users()
+        users_data = db_client.get_all_users(columns="id,name")
         user_map = {u['id']: u['name'] for u in users_data}
         
-        # Add warehouse name column based on warehouse_id
-        if 'warehouse_id' in df.columns:
-            df['warehouse'] = df['warehouse_id'].apply(lambda x: warehouse_map.get(x, "Unknown"))
-        
-        # Add user name column based on uploaded_by UUID
-        if 'uploaded_by' in df.columns:
-            df['uploader_name'] = df['uploaded_by'].apply(lambda x: user_map.get(x, "Unknown User"))
-        
-        # Apply role-based filtering
-        is_admin = check_admin_access()
-        if not is_admin:
-            # For managers, show data from their warehouse (not just their own uploads)
-            warehouse_id = st.session_state.get("warehouse_id")
-            
-            # Filter by warehouse for managers
-            if warehouse_id and 'warehouse_id' in df.columns:
-                df = df[df["warehouse_id"] == warehouse_id]
-        else:
-            st.success("Admin view")
-        
-        # Continue with dashboard display as before
-        if df.empty:
-            st.warning("No data to display with current filters")
-            return
-            
-        # Convert cycle_date from string to datetime
-        df["cycle_date"] = pd.to_datetime(df["cycle_date"]).dt.date
-        
-        # Display summary metrics for admins
+        # Display summary metrics: aggregated locally by the analytics engine when enabled,
+        # otherwise by the database; only fall back to downloading rows if both fail
+        summary_metrics = db_client.query_analytics("summary_metrics")
+        if summary_metrics is None:
+            summary_metrics = db_client.get_cycle_count_summary()
+        summary_data = db_client.filter_cycle_counts(columns="summary") if summary_metrics is None else None
         if is_admin:
-            render_admin_dashboard_summary(data)
+            render_admin_dashboard_summary(summary_data, metrics=summary_metrics)
         else:
-            render_manager_dashboard_summary(data)
+            render_manager_dashboard_summary(summary_data, metrics=summary_metrics)
         
         st.subheader("Filters")
         
@@ -135,26 +125,22 @@ def render_dashboard():
         col1, col2, col3, col4 = st.columns(4)
         
         # Get unique values for filters
-        customers = ["All"] + sorted(df["customer"].unique().tolist())
+        customers = ["All"] + db_client.get_cycle_count_customers()
 
-        # For managers, get all users in their warehouse
-        is_admin = check_admin_access()
+        # For managers, only offer users in their warehouse
         if is_admin:
-            users = ["All"] + sorted(df["uploader_name"].unique().tolist())
-            warehouses = ["All"] + sorted(df["warehouse"].unique().tolist())
+            filter_users = users_data
+            warehouses = ["All"] + sorted(warehouse_map.values())
         else:
-            # Get manager's warehouse ID
-            warehouse_id = st.session_state.get("warehouse_id")
-            
-            # Get all users in this warehouse
-            warehouse_users = db_client.get_warehouse_users(warehouse_id)
-            
-            # Map user IDs to names
-            warehouse_user_ids = [u["id"] for u in warehouse_users]
-            
-            # Filter df to only include users from this warehouse
-            warehouse_df = df[df["uploaded_by"].isin(warehouse_user_ids)]
-            users = ["All"] + sorted(warehouse_df["uploader_name"].unique().tolist())
+            filter_users = db_client.get_warehouse_users(st.session_state.get("warehouse_id"))
+        
+        # Several users can share a display name, so keep every ID per name
+        user_ids_by_name = {}
+        for u in filter_users:
+            user_ids_by_name.setdefault(u["name"], []).append(u["id"])
+        users = ["All"] + sorted(user_ids_by_name.keys())
+        
+        min_date, max_date = db_client.get_cycle_date_bounds()
 
         # Add filter widgets
         with col1:
@@ -171,7 +157,7 @@ def render_dashboard():
         with col4:
             date_range = st.date_input(
                 "Cycle Date Range",
-                value=[df["cycle_date"].min(), df["cycle_date"].max()] if len(df) > 0 else None,
+                value=[min_date, max_date] if min_date and max_date else None,
                 help="Filter by cycle date range"
             )
         
@@ -182,49 +168,46 @@ def render_dashboard():
         with col6:
             search_location = st.text_input("Search Locations", "", help="Enter text to search for locations")
          
-        # Apply filters
-        filtered_df = df.copy()
+        # Apply filters in the database and fetch only the matching rows
+        filter_warehouse_id = None
+        if is_admin and selected_warehouse != "All":
+            warehouse_ids = [w_id for w_id, name in warehouse_map.items() if name == selected_warehouse]
+            filter_warehouse_id = warehouse_ids[0] if warehouse_ids else None
+        
+        filters = {
+            "customer": selected_customer if selected_customer != "All" else None,
+            "uploaded_by": user_ids_by_name.get(selected_user) if selected_user != "All" else None,
+            "warehouse_id": filter_warehouse_id,
+            "date_from": date_range[0] if date_range and len(date_range) == 2 else None,
+            "date_to": date_range[1] if date_range and len(date_range) == 2 else None,
+            "item_search": search_item or None,
+            "location_search": search_location or None
+        }
+        data = db_client.filter_cycle_counts(columns="dashboard", **filters)
+        
+        # Show number of records after filtering; the exact total is a full scan, so only on request
+        exact_total = db_client.get_cached_count()
+        if exact_total is not None:
+            st.info(f"Showing {len(data)} of {exact_total:,} records")
+        else:
+            info_col, count_col = st.columns([8, 1])
+            info_col.info(f"Showing {len(data)} of ~{format_record_count(total_count)} records")
+            if count_col.button("Exact count", help="Count every record (cached until the next upload)"):
+                db_client.count_cycle_counts(mode="exact")
+                st.rerun()
         
-        if selected_customer != "All":
-            filtered_df = filtered_df[filtered_df["customer"] == selected_customer]
-            
-        if selected_user != "All":
-            filtered_df = filtered_df[filtered_df["uploader_name"] == selected_user]
-
-        if is_admin and selected_warehouse != "All" and 'warehouse' in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df["warehouse"] == selected_warehouse]
-            
-        if date_range and len(date_range) == 2:
-            filtered_df = filtered_df[
-                (filtered_df["cycle_date"] >= date_range[0]) & 
-                (filtered_df["cycle_date"] <= date_range[1])
-            ]
-            
-        # Apply partial match filters for item and location
-        if search_item:
-            filtered_df = filtered_df[filtered_df["item_id"].str.contains(search_item, case=False)]
-            
-        if search_location:
-            filtered_df = filtered_df[filtered_df["location"].str.contains(search_location, case=False)]
+        if not data:
+            st.warning("No data to display with current filters")
+            return
         
-        # Show number of records after filtering
-        st.info(f"Showing {len(filtered_df)} of {len(df)} records")
+        # Convert to DataFrame (timed for the Performance panel, like the charts below)
+        with db_client.metrics.track("render_dashboard.dataframe", kind="app") as timing:
+            filtered_df = prepare_dashboard_frame(data, warehouse_map, user_map)
+            timing["rows"] = len(filtered_df)
         
-        # Download option
+        # Download option, exported page by page from the database on request
         if not filtered_df.empty:
-            # Before exporting, ensure warehouse names and user names are included
-            export_df = filtered_df.copy()
-            if 'warehouse_id' in export_df.columns and 'warehouse' not in export_df.columns:
-                export_df['warehouse'] = export_df['warehouse_id'].apply(lambda x: warehouse_map.get(x, "Unknown"))
-            if 'uploaded_by' in export_df.columns and 'uploader_name' not in export_df.columns:
-                export_df['uploader_name'] = export_df['uploaded_by'].apply(lambda x: user_map.get(x, "Unknown User"))
-            
-            st.download_button(
-                label="Download Filtered Data",
-                data=export_df.to_csv(index=False).encode('utf-8'),
-                file_name=f"cycle_count_data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
+            render_data_export(db_client, filters, warehouse_map, user_map)
         
         # Make a copy for display formatting
         display_filtered_df = filtered_df.copy()
@@ -305,16 +288,32 @@ def render_dashboard():
             )
         
         with tab2:
-            # Display charts
-            col1, col2 = st.columns(2)
+            # Only hand the chart columns to the chart functions
+            chart_cols = [col for col in CYCLE_COUNTS_PROJECTIONS["charts"] if col in filtered_df.columns]
+            chart_df = filtered_df[chart_cols + ["uploader_name"]]
             
-            with col1:
-                render_submission_chart(filtered_df.to_dict('records'))
-                render_variance_histogram(filtered_df.to_dict('records'))
+            # With the analytics engine the group-bys run in SQL; None falls back to pandas
+            counts_by_date = db_client.query_analytics("submissions_per_day", filters)
+            counts_by_customer = db_client.query_analytics("submissions_by_customer", filters)
+            variances = db_client.query_analytics("variances", filters)
+            counts_by_user = db_client.query_analytics("submissions_by_uploader", filters)
+            if counts_by_user is not None:
+                # Several users can share a display name, so sum per name
+                counts_by_user["user"] = counts_by_user["uploaded_by"].map(user_map).fillna("Unknown User")
+                counts_by_user = counts_by_user.groupby("user", as_index=False)["count"].sum()
+            
+            # Display charts
+            with db_client.metrics.track("render_dashboard.charts", kind="app") as timing:
+                timing["rows"] = len(chart_df)
+                col1, col2 = st.columns(2)
                 
-            with col2:
-                render_customer_pie_chart(filtered_df.to_dict('records'))
-                render_user_submission_chart(filtered_df.to_dict('records'))
+                with col1:
+                    render_submission_chart(chart_df, counts_by_date=counts_by_date)
+                    render_variance_histogram(chart_df, variances=variances)
+                    
+                with col2:
+                    render_customer_pie_chart(chart_df, counts_by_customer=counts_by_customer)
+                    render_user_submission_chart(chart_df, counts_by_user=counts_by_user)
         
         with tab3:
             # Display top variance items
@@ -326,22 +325,72 @@ def render_dashboard():
             if selected_customer != "All":
                 filtered_df = filtered_df[filtered_df["customer"] == selected_customer]
             
-            render_top_variance_items(filtered_df.to_dict('records'), limit=limit)
+            # Let the analytics engine pick the top rows when it is enabled
+            top_items = db_client.query_analytics(
+                "top_variance_items",
+                {**filters, "customer": selected_customer if selected_customer != "All" else filters["customer"]},
+                limit=limit
+            )
+            if top_items is None:
+                filtered_df["abs_variance"] = filtered_df["variance"].abs()
+                top_items = filtered_df.sort_values("abs_variance", ascending=False).head(limit)
+            
+            render_top_variance_items(top_items[chart_cols], limit=limit)
             
             # Display the top variance items table
             st.subheader("Top Items by Absolute Variance")
-            filtered_df["abs_variance"] = filtered_df["variance"].abs()
-            top_items = filtered_df.sort_values("abs_variance", ascending=False).head(limit)
             st.dataframe(top_items[["item_id", "description", "customer", "location", "system_count", "actual_count", "variance", "percent_diff"]])
         
         with tab4:
             st.subheader("Inventory Reconciliation")
-            render_reconciliation_opportunities(df) # use the original df, not filtered_df
+            # Reconciliation ignores the dashboard filters, but only needs the slider's maximum window
+            reconciliation_filters = {"date_from": date.today() - timedelta(days=RECONCILIATION_MAX_DAYS)}
+            
+            # Only the latest count per item/location is needed: from the analytics engine when
+            # enabled, else the cycle_count_latest table, else reduced from the full window
+            reconciliation_df = db_client.query_analytics("latest_counts", reconciliation_filters)
+            if reconciliation_df is None:
+                latest_data = db_client.get_latest_cycle_counts(since=reconciliation_filters["date_from"])
+                if latest_data is not None:
+                    reconciliation_df = cycle_counts_frame(latest_data)
+            if reconciliation_df is None:
+                reconciliation_data = db_client.filter_cycle_counts(columns="reconciliation", **reconciliation_filters)
+                reconciliation_df = cycle_counts_frame(reconciliation_data)
+            if 'warehouse_id' in reconciliation_df.columns:
+                reconciliation_df['warehouse'] = reconciliation_df['warehouse_id'].map(warehouse_map).fillna("Unknown")
+            with db_client.metrics.track("render_dashboard.reconciliation", kind="app") as timing:
+                timing["rows"] = len(reconciliation_df)
+                render_reconciliation_opportunities(reconciliation_df)
     
     except Exception as e:
         st.error(f"Error loading dashboard: {str(e)}")
         st.exception(e)
 
+def render_performance_panel():
+    """Show recent call timings from SupabaseClient.metrics (admin only)"""
+    metrics = SupabaseClient().metrics
+    
+    st.caption("Database calls (kind \"db\") and dashboard pandas/plotly work (kind \"app\") "
+               "since the server started, most recent calls only.")
+    if st.button("Clear recorded calls"):
+        metrics.clear()
+    
+    summary = metrics.summary()
+    if not summary:
+        st.info("No calls recorded yet")
+        return
+    
+    st.subheader("Latency per Method")
+    summary_df = pd.DataFrame(summary)
+    summary_df["avg_kb"] = summary_df.pop("avg_bytes") / 1024
+    st.dataframe(summary_df.round(1), use_container_width=True)
+    
+    st.subheader("Slowest Recent Calls")
+    slowest_df = pd.DataFrame(metrics.slowest(limit=20))
+    slowest_df["kb"] = slowest_df.pop("bytes") / 1024
+    slowest_df["started_at"] = slowest_df["started_at"].dt.strftime('%b %d, %Y %I:%M:%S %p')
+    st.dataframe(slowest_df.round(1), use_container_width=True)
+
 # Main function
 def main():
     # Call authenticate to handle login form display
@@ -375,8 +424,11 @@ def main():
         # Check for admin access
         is_admin = check_admin_access()
         
-        # Create tabs for Data Management and Dashboard
-        dashboard_tab, upload_tab, tutorial_tab = st.tabs(["Dashboard", "Data Management", "Tutorial"])
+        # Create tabs for Data Management and Dashboard, plus Performance for admins
+        tab_names = ["Dashboard", "Data Management", "Tutorial"]
+        if is_admin:
+            tab_names.append("Performance")
+        dashboard_tab, upload_tab, tutorial_tab, *admin_tabs = st.tabs(tab_names)
         
         with upload_tab:
             upload_success = render_upload_form()
@@ -390,6 +442,11 @@ def main():
         with tutorial_tab:
             st.title("Tutorial")
             render_tutorial()
+        
+        if admin_tabs:
+            with admin_tabs[0]:
+                st.title("Performance")
+                render_performance_panel()
             
     else:
         # NON-AUTHENTICATED USER CONTENT
@@ -0,0 +1 @@
+# Benchmarks package initialization file
\ No newline at end of file
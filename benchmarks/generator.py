@@ -0,0 +1,219 @@
+import uuid
+from datetime import date, datetime, time, timedelta
+
+import bcrypt
+import numpy as np
+import pandas as pd
+
+from database.schema import (
+    CYCLE_COUNTS_TABLE, WAREHOUSES_TABLE, USERS_TABLE,
+    CYCLE_COUNTS_COLUMNS, WAREHOUSES_COLUMNS, USERS_COLUMNS, CYCLE_COUNTS_GENERATED_COLUMNS
+)
+
+# Default size of a generated dataset; rows is usually overridden (10k to 5M)
+DEFAULT_DATASET_CONFIG = {
+    "rows": 10000,
+    "warehouses": 5,
+    "customers": 20,
+    "items": 2000,
+    "locations": 500,
+    "users_per_warehouse": 4,
+    "days": 365,
+    "seed": 42
+}
+
+# Every generated user logs in with this password (the load test signs in with it)
+DEFAULT_PASSWORD = "benchmark"
+
+UNITS = ["EA", "CS", "PLT", "BX", "LB"]
+STATUSES = ["Available", "Hold", "Damaged", "Quarantine"]
+
+def _uuids(rng, count):
+    """Deterministic UUID4-shaped strings drawn from rng"""
+    high = rng.integers(0, 2**63, size=count, dtype=np.int64).astype(object)
+    low = rng.integers(0, 2**63, size=count, dtype=np.int64).astype(object)
+    return [str(uuid.UUID(int=(int(h) << 64) | int(l), version=4)) for h, l in zip(high, low)]
+
+def generate_dataset(rows=None, warehouses=None, customers=None, items=None, locations=None,
+                     users_per_warehouse=None, days=None, seed=None, end_date=None):
+    """
+    Generate realistic warehouses, users and cycle_counts data
+
+    The same arguments always produce the same data. Cycle dates fall in the
+    ``days`` days up to end_date, so the reconciliation window has data. Counts
+    mostly match the system count, with a minority of small overages and
+    shortages, like real cycle counts.
+
+    Args:
+        rows (int): Number of cycle_counts rows
+        warehouses (int): Number of warehouses
+        customers (int): Number of distinct customers
+        items (int): Number of distinct item IDs
+        locations (int): Number of distinct locations per warehouse
+        users_per_warehouse (int): Managers per warehouse (plus one admin)
+        days (int): Span of cycle dates
+        seed (int): Random seed
+        end_date (date, optional): Latest cycle date, defaults to today
+
+    Returns:
+        dict: {"config": the effective settings,
+               WAREHOUSES_TABLE: list of warehouse dicts,
+               USERS_TABLE: list of user dicts,
+               CYCLE_COUNTS_TABLE: DataFrame with every CYCLE_COUNTS_COLUMNS column}
+    """
+    config = dict(DEFAULT_DATASET_CONFIG)
+    for name, value in {"rows": rows, "warehouses": warehouses, "customers": customers, "items": items,
+                        "locations": locations, "users_per_warehouse": users_per_warehouse,
+                        "days": days, "seed": seed}.items():
+        if value is not None:
+            config[name] = int(value)
+    end_date = end_date or date.today()
+    config["end_date"] = end_date.isoformat()
+
+    rng = np.random.default_rng(config["seed"])
+    n = config["rows"]
+
+    warehouse_rows = [
+        {
+            WAREHOUSES_COLUMNS["id"]: i + 1,
+            WAREHOUSES_COLUMNS["name"]: f"Warehouse {i + 1:02d}",
+            WAREHOUSES_COLUMNS["address"]: f"{100 + i} Industrial Way",
+            WAREHOUSES_COLUMNS["created_at"]: datetime.combine(end_date - timedelta(days=config["days"]), time()).isoformat()
+        }
+        for i in range(config["warehouses"])
+    ]
+
+    user_ids = _uuids(rng, config["warehouses"] * config["users_per_warehouse"] + 1)
+    # Minimum bcrypt cost, so dozens of simulated logins don't dominate a load test
+    password_hash = bcrypt.hashpw(DEFAULT_PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+    user_rows = [{
+        USERS_COLUMNS["id"]: user_ids[0],
+        USERS_COLUMNS["username"]: "admin",
+        USERS_COLUMNS["name"]: "Admin",
+        USERS_COLUMNS["role"]: "admin",
+        USERS_COLUMNS["warehouse_id"]: None,
+        USERS_COLUMNS["password_hash"]: password_hash,
+        USERS_COLUMNS["last_login"]: None
+    }]
+    for i, user_id in enumerate(user_ids[1:]):
+        warehouse_id = i // config["users_per_warehouse"] + 1
+        user_rows.append({
+            USERS_COLUMNS["id"]: user_id,
+            USERS_COLUMNS["username"]: f"manager{i + 1:03d}",
+            USERS_COLUMNS["name"]: f"Manager {i + 1:03d}",
+            USERS_COLUMNS["role"]: "manager",
+            USERS_COLUMNS["warehouse_id"]: warehouse_id,
+            USERS_COLUMNS["password_hash"]: password_hash,
+            USERS_COLUMNS["last_login"]: None
+        })
+
+    # Each row is counted in a warehouse by one of that warehouse's managers
+    warehouse_ids = rng.integers(1, config["warehouses"] + 1, size=n)
+    manager_slot = rng.integers(0, config["users_per_warehouse"], size=n)
+    manager_ids = np.array(user_ids[1:], dtype=object)
+    uploaded_by = manager_ids[(warehouse_ids - 1) * config["users_per_warehouse"] + manager_slot]
+
+    # Popular items and customers are counted far more often (Zipf-like skew)
+    item_numbers = np.minimum(rng.zipf(1.3, size=n), config["items"]) - 1
+    customer_numbers = item_numbers % config["customers"]
+    location_numbers = rng.integers(0, config["locations"], size=n)
+
+    system_count = rng.integers(0, 500, size=n).astype(float)
+    # 70% exact, the rest off by a few units either way
+    miscount = rng.random(n) >= 0.7
+    actual_count = np.maximum(system_count + miscount * rng.integers(-12, 13, size=n), 0)
+    variance = actual_count - system_count
+    percent_diff = np.divide(variance * 100, system_count, out=np.zeros(n), where=system_count != 0)
+
+    day_offsets = rng.integers(0, config["days"], size=n)
+    cycle_dates = pd.to_datetime(end_date) - pd.to_timedelta(day_offsets, unit="D")
+    # Uploaded the same day or a couple of days after the count
+    uploaded_at = (cycle_dates + pd.to_timedelta(rng.integers(0, 3, size=n), unit="D")
+                   + pd.to_timedelta(rng.integers(6 * 3600, 18 * 3600, size=n), unit="s")
+                   + pd.to_timedelta(rng.integers(0, 1_000_000, size=n), unit="us"))
+    has_lot = rng.random(n) < 0.4
+    has_expiration = rng.random(n) < 0.25
+    expiration = cycle_dates + pd.to_timedelta(rng.integers(30, 720, size=n), unit="D")
+
+    customer_names = np.array([f"Customer {i + 1:03d}" for i in range(config["customers"])], dtype=object)
+    item_ids = np.char.add("ITM-", np.char.zfill(item_numbers.astype(str), 6)).astype(object)
+    locations = np.char.add(
+        np.char.add("A", np.char.zfill((location_numbers // 100).astype(str), 2)),
+        np.char.add("-", np.char.zfill((location_numbers % 100).astype(str), 2))
+    ).astype(object)
+    lot_numbers = np.where(has_lot, np.char.add("LOT", rng.integers(1000, 9999, size=n).astype(str)).astype(object), None)
+
+    uploaded_at_iso = uploaded_at.strftime("%Y-%m-%dT%H:%M:%S.%f")
+    cycle_counts = pd.DataFrame({
+        CYCLE_COUNTS_COLUMNS["id"]: _uuids(rng, n),
+        CYCLE_COUNTS_COLUMNS["item_id"]: item_ids,
+        CYCLE_COUNTS_COLUMNS["description"]: np.char.add("Item ", item_numbers.astype(str)).astype(object),
+        CYCLE_COUNTS_COLUMNS["lot_number"]: lot_numbers,
+        CYCLE_COUNTS_COLUMNS["expiration_date"]: np.where(has_expiration, expiration.strftime("%Y-%m-%d"), None),
+        CYCLE_COUNTS_COLUMNS["unit"]: np.array(UNITS, dtype=object)[item_numbers % len(UNITS)],
+        CYCLE_COUNTS_COLUMNS["status"]: np.array(STATUSES, dtype=object)[rng.choice(len(STATUSES), size=n, p=[0.85, 0.07, 0.05, 0.03])],
+        CYCLE_COUNTS_COLUMNS["lp"]: np.char.add("LP", rng.integers(100000, 999999, size=n).astype(str)).astype(object),
+        CYCLE_COUNTS_COLUMNS["location"]: locations,
+        CYCLE_COUNTS_COLUMNS["system_count"]: system_count,
+        CYCLE_COUNTS_COLUMNS["actual_count"]: actual_count,
+        CYCLE_COUNTS_COLUMNS["variance"]: variance,
+        CYCLE_COUNTS_COLUMNS["percent_diff"]: percent_diff,
+        CYCLE_COUNTS_COLUMNS["customer"]: customer_names[customer_numbers],
+        CYCLE_COUNTS_COLUMNS["notes"]: np.where(miscount & (rng.random(n) < 0.2), "Recounted", None),
+        CYCLE_COUNTS_COLUMNS["cycle_date"]: cycle_dates.strftime("%Y-%m-%d"),
+        CYCLE_COUNTS_COLUMNS["uploaded_by"]: uploaded_by,
+        CYCLE_COUNTS_COLUMNS["uploaded_at"]: uploaded_at_iso,
+        CYCLE_COUNTS_COLUMNS["warehouse_id"]: warehouse_ids,
+        CYCLE_COUNTS_COLUMNS["updated_at"]: uploaded_at_iso
+    })
+
+    return {
+        "config": config,
+        WAREHOUSES_TABLE: warehouse_rows,
+        USERS_TABLE: user_rows,
+        CYCLE_COUNTS_TABLE: cycle_counts
+    }
+
+def load_into_sqlite(backend, dataset, chunk_size=50000):
+    """
+    Bulk load a generated dataset into a SQLiteBackend
+
+    Rows go straight to the connection with executemany, skipping the query
+    builder, so millions of rows load in seconds to minutes.
+
+    Args:
+        backend (SQLiteBackend): Freshly created backend
+        dataset (dict): Result of generate_dataset()
+        chunk_size (int): Rows per transaction
+    """
+    def insert(table, frame):
+        columns = [col for col in frame.columns if col not in CYCLE_COUNTS_GENERATED_COLUMNS or table != CYCLE_COUNTS_TABLE]
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        for start in range(0, len(frame), chunk_size):
+            chunk = frame[columns].iloc[start:start + chunk_size]
+            values = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+            with backend._lock:
+                backend.connection.execute("BEGIN")
+                backend.connection.executemany(sql, values)
+                backend.connection.execute("COMMIT")
+
+    insert(WAREHOUSES_TABLE, pd.DataFrame(dataset[WAREHOUSES_TABLE]))
+    insert(USERS_TABLE, pd.DataFrame(dataset[USERS_TABLE]))
+    insert(CYCLE_COUNTS_TABLE, dataset[CYCLE_COUNTS_TABLE])
+
+def to_import_file(cycle_counts, path, limit=5000):
+    """
+    Write cycle counts as a CSV in the layout managers upload, headers and all
+
+    Args:
+        cycle_counts (DataFrame): Generated cycle_counts rows
+        path (str or file): CSV file to write
+        limit (int): Rows to write; the upload form only imports the first 5000
+    """
+    headers = {
+        "item_id": "Item", "description": "Description", "lot_number": "Lot No.",
+        "expiration_date": "Expiration Date", "unit": "UOM", "status": "Status", "lp": "LP",
+        "location": "Location", "system_count": "System Count", "actual_count": "Actual Count",
+        "customer": "Customer", "notes": "Notes"
+    }
+    cycle_counts[list(headers)].head(limit).rename(columns=headers).to_csv(path, index=False)
@@ -0,0 +1,306 @@
+"""
+Drive concurrent simulated sessions through app.py and report how it holds up
+
+Usage:
+    python -m benchmarks.load_test --sessions 20 --rows 100000 --output load.json
+
+Every session is an AppTest running app.py in this process, all sharing one
+SupabaseClient on the SQLite stand-in (CYCLE_COUNT_BACKEND=sqlite), like the
+sessions of one Streamlit server. Each logs in as its own manager and goes
+through the dashboard, two filter changes and a file import. The report has
+latency percentiles per step, peak RSS and the backend calls each session
+made, from the client's QueryMetrics records.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import MagicMock
+
+# The client reads the backend when it is first created, so select it up front
+os.environ.setdefault("CYCLE_COUNT_BACKEND", "sqlite")
+
+import streamlit as st
+import streamlit.testing.v1.app_test as app_test
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.generator import DEFAULT_DATASET_CONFIG, DEFAULT_PASSWORD, generate_dataset, load_into_sqlite, to_import_file
+from database.client import SupabaseClient
+from database.instrumentation import percentile
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# AppTest has no file uploads, so the upload form reads this session state key instead
+UPLOAD_STATE_KEY = "_load_test_upload"
+
+# Steps in SimulatedSession.run()
+STEP_COUNT = 9
+
+def install_shared_runtime():
+    """
+    Give every AppTest one mock Streamlit runtime, as sessions share a server's
+    
+    AppTest creates a mock runtime in a process-wide slot for each run and
+    clears it afterwards, which breaks runs still going on other threads. It
+    is pointed at a subclass here, so its resets never reach the shared one.
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    
+    class PerRunRuntime(Runtime):
+        _instance = None
+    
+    app_test.Runtime = PerRunRuntime
+
+def install_upload_stub():
+    """
+    Let a session hand a file to the upload form's st.file_uploader
+    
+    The widget still renders; while st.session_state[UPLOAD_STATE_KEY] holds
+    CSV bytes it returns them as a fresh file object on every rerun.
+    """
+    file_uploader = st.file_uploader
+    
+    def load_test_file_uploader(label, *args, **kwargs):
+        uploaded = file_uploader(label, *args, **kwargs)
+        content = st.session_state.get(UPLOAD_STATE_KEY)
+        if content is None:
+            return uploaded
+        upload = io.BytesIO(content)
+        upload.name = "load_test_import.csv"
+        return upload
+    
+    st.file_uploader = load_test_file_uploader
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def widget(widgets, label):
+    """The first widget with a given label"""
+    return next(w for w in widgets if w.label == label)
+
+class SimulatedSession:
+    """
+    One manager using the app: login, dashboard, filter changes, import
+    
+    Args:
+        index (int): Session number
+        user (dict): Generated manager to log in as
+        customer (str): Customer picked in the dashboard filter
+        import_content (bytes): CSV file uploaded in the import step
+        timeout (float): Seconds one rerun may take
+    """
+    
+    def __init__(self, index, user, customer, import_content, timeout):
+        self.index = index
+        self.user = user
+        self.customer = customer
+        self.import_content = import_content
+        self.app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.steps = []
+    
+    def _step(self, name, action):
+        """Run one interaction, timing it and collecting the calls it made"""
+        started_at = datetime.now()
+        start = time.perf_counter()
+        error = None
+        try:
+            action()
+            # Errors rendered by the app count as failures too
+            messages = [e.value for e in self.app.exception] + [e.value for e in self.app.error]
+            if messages:
+                error = str(messages[0])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        wall_ms = (time.perf_counter() - start) * 1000
+        
+        session_id = self.app.session_state["session_id"] if "session_id" in self.app.session_state else None
+        calls = [
+            c for c in SupabaseClient().metrics.calls()
+            if c["session"] == session_id and c["session"] is not None and c["started_at"] >= started_at
+            and c["depth"] == 0 and c["kind"] == "db"
+        ]
+        self.steps.append({
+            "step": name,
+            "wall_ms": wall_ms,
+            "db_calls": len(calls),
+            "backend_requests": sum(c["pages"] for c in calls),
+            "rows_fetched": sum(c["rows"] for c in calls),
+            "peak_rss_mb": peak_rss_mb(),
+            "error": error
+        })
+        return error is None
+    
+    def run(self):
+        """Go through every step, stopping at the first failure"""
+        app = self.app
+        
+        def login():
+            widget(app.text_input, "Username").input(self.user["username"])
+            widget(app.text_input, "Password").input(DEFAULT_PASSWORD)
+            widget(app.button, "Login").click().run()
+            if not app.session_state["authentication_status"]:
+                raise RuntimeError(f"Login failed for {self.user['username']}")
+        
+        def clear_filters():
+            widget(app.selectbox, "Customer").select("All")
+            widget(app.text_input, "Search Items").input("")
+            app.run()
+        
+        def upload():
+            app.session_state[UPLOAD_STATE_KEY] = self.import_content
+            app.run()
+        
+        def import_data():
+            widget(app.button, "Import Data").click().run()
+            del app.session_state[UPLOAD_STATE_KEY]
+        
+        steps = [
+            ("open", app.run),
+            ("login", login),
+            ("dashboard_rerun", app.run),
+            ("filter_customer", lambda: widget(app.selectbox, "Customer").select(self.customer).run()),
+            ("search_items", lambda: widget(app.text_input, "Search Items").input("ITM-0000").run()),
+            ("clear_filters", clear_filters),
+            ("import_preview", upload),
+            ("import", import_data),
+            ("dashboard_after_import", app.run)
+        ]
+        for name, action in steps:
+            if not self._step(name, action):
+                break
+        return self.report()
+    
+    def report(self):
+        """Per-session totals and the individual steps"""
+        return {
+            "session": self.index,
+            "username": self.user["username"],
+            "completed": len(self.steps) == STEP_COUNT and not self.steps[-1]["error"],
+            "total_ms": round(sum(s["wall_ms"] for s in self.steps), 1),
+            "db_calls": sum(s["db_calls"] for s in self.steps),
+            "backend_requests": sum(s["backend_requests"] for s in self.steps),
+            "rows_fetched": sum(s["rows_fetched"] for s in self.steps),
+            "errors": [f"{s['step']}: {s['error']}" for s in self.steps if s["error"]],
+            "steps": [{**s, "wall_ms": round(s["wall_ms"], 1)} for s in self.steps]
+        }
+
+def summarize_steps(sessions):
+    """
+    Latency percentiles and backend calls per step across sessions
+    
+    Args:
+        sessions (list): SimulatedSession.report() results
+    
+    Returns:
+        dict: Step name -> runs, errors, p50/p95/p99/max ms and mean calls
+    """
+    by_step = {}
+    for session in sessions:
+        for step in session["steps"]:
+            by_step.setdefault(step["step"], []).append(step)
+    
+    summary = {}
+    for name, steps in by_step.items():
+        times = [s["wall_ms"] for s in steps]
+        summary[name] = {
+            "runs": len(steps),
+            "errors": sum(1 for s in steps if s["error"]),
+            "p50_ms": round(percentile(times, 0.5), 1),
+            "p95_ms": round(percentile(times, 0.95), 1),
+            "p99_ms": round(percentile(times, 0.99), 1),
+            "max_ms": round(max(times), 1),
+            "mean_db_calls": round(sum(s["db_calls"] for s in steps) / len(steps), 1),
+            "mean_backend_requests": round(sum(s["backend_requests"] for s in steps) / len(steps), 1),
+            "mean_rows_fetched": round(sum(s["rows_fetched"] for s in steps) / len(steps))
+        }
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test app.py with concurrent simulated sessions")
+    for name, value in DEFAULT_DATASET_CONFIG.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value)
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent simulated sessions")
+    parser.add_argument("--import-rows", type=int, default=500, help="Rows in each session's import file")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds one rerun may take")
+    parser.add_argument("--output", default="load_test_results.json", help="JSON file to write")
+    args = parser.parse_args(argv)
+    
+    config = {name: getattr(args, name) for name in DEFAULT_DATASET_CONFIG}
+    dataset = generate_dataset(**config)
+    db_client = SupabaseClient()
+    load_into_sqlite(db_client.supabase, dataset)
+    rss_after_load = peak_rss_mb()
+    
+    install_shared_runtime()
+    install_upload_stub()
+    
+    def import_file(index):
+        """CSV bytes of a session's own import rows, with LPs no other row has"""
+        rows = dataset["cycle_counts"].sample(n=min(args.import_rows, config["rows"]), random_state=index)
+        rows = rows.assign(lp=[f"LT{index:04d}-{i:05d}" for i in range(len(rows))])
+        buffer = io.StringIO()
+        to_import_file(rows, buffer, limit=args.import_rows)
+        return buffer.getvalue().encode('utf-8')
+    
+    managers = [u for u in dataset["users"] if u["role"] == "manager"]
+    customers = sorted(dataset["cycle_counts"]["customer"].unique())
+    sessions = [
+        SimulatedSession(i, managers[i % len(managers)], customers[i % len(customers)],
+                         import_file(i), args.timeout)
+        for i in range(args.sessions)
+    ]
+    
+    print(f"Loaded {config['rows']} rows; running {args.sessions} sessions")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions, thread_name_prefix="session") as pool:
+        reports = list(pool.map(lambda session: session.run(), sessions))
+    elapsed_s = time.perf_counter() - start
+    
+    steps = summarize_steps(reports)
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "config": dataset["config"],
+        "sessions": args.sessions,
+        "import_rows": args.import_rows,
+        "elapsed_s": round(elapsed_s, 2),
+        "completed_sessions": sum(1 for r in reports if r["completed"]),
+        "peak_rss_mb": {"after_load": rss_after_load, "end": peak_rss_mb()},
+        "steps": steps,
+        "session_results": reports
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    print(f"{report['completed_sessions']}/{args.sessions} sessions completed in {elapsed_s:.1f}s, "
+          f"peak RSS {report['peak_rss_mb']['end']} MB")
+    for name, result in steps.items():
+        print(f"{name:25s} p50 {result['p50_ms']:9.1f} ms  p95 {result['p95_ms']:9.1f} ms  "
+              f"requests {result['mean_backend_requests']:6.1f}  errors {result['errors']}")
+    for r in reports:
+        for error in r["errors"]:
+            print(f"session {r['session']} ({r['username']}) {error}")
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
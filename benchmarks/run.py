@@ -0,0 +1,195 @@
+"""
+Run the cycle count benchmarks against a generated dataset
+
+Usage:
+    python -m benchmarks.run --rows 100000 --repeat 5 --output results.json
+
+The dataset is loaded into the SQLite stand-in (CYCLE_COUNT_BACKEND=sqlite), so
+no Supabase project is needed. Results are written as JSON, one entry per
+benchmark with every run's time in milliseconds, to compare releases.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+# The client reads the backend when it is first created, so select it up front
+os.environ.setdefault("CYCLE_COUNT_BACKEND", "sqlite")
+
+import numpy as np
+import pandas as pd
+import plotly
+import streamlit as st
+
+from benchmarks.generator import DEFAULT_DATASET_CONFIG, generate_dataset, load_into_sqlite, to_import_file
+from components.charts import (
+    compute_dashboard_summary,
+    prepare_dashboard_frame,
+    render_customer_pie_chart,
+    render_improved_variance_chart,
+    render_submission_chart,
+    render_top_variance_items,
+    render_user_submission_chart,
+    render_variance_histogram,
+    render_warehouse_distribution
+)
+from components.inventory_reconciliation import (
+    RECONCILIATION_MAX_DAYS, create_consolidated_excel_report, find_reconciliation_opportunities
+)
+from components.upload import (
+    clean_import_dates, drop_duplicate_columns, find_missing_required_data,
+    map_import_columns, prepare_import_records
+)
+from database.client import SupabaseClient
+from database.schema import CYCLE_COUNTS_PROJECTIONS
+
+def time_runs(func, repeat, setup=None):
+    """
+    Time a function several times
+    
+    Args:
+        func (callable): Function to time, called with no arguments
+        repeat (int): Number of timed runs
+        setup (callable, optional): Untimed preparation run before each call
+    
+    Returns:
+        dict: runs_ms, median_ms and min_ms
+    """
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        runs.append((time.perf_counter() - start) * 1000)
+    return {
+        "runs_ms": [round(ms, 3) for ms in runs],
+        "median_ms": round(statistics.median(runs), 3),
+        "min_ms": round(min(runs), 3)
+    }
+
+def parse_import(content):
+    """The upload form's parsing and validation steps, without the widgets"""
+    import_df = pd.read_csv(io.BytesIO(content))
+    import_df = import_df.dropna(how='all')
+    import_df.columns = [str(col).lower().strip().replace(' ', '_') for col in import_df.columns]
+    import_df = map_import_columns(import_df)
+    import_df, _ = drop_duplicate_columns(import_df)
+    import_df = clean_import_dates(import_df)
+    find_missing_required_data(import_df)
+    return prepare_import_records(import_df, 1, date.today(), "benchmark")
+
+def run_benchmarks(dataset, repeat):
+    """
+    Run every benchmark against a dataset already loaded into the client
+    
+    Args:
+        dataset (dict): Result of generate_dataset()
+        repeat (int): Timed runs per benchmark
+    
+    Returns:
+        dict: Benchmark name -> time_runs() result
+    """
+    db_client = SupabaseClient()
+    warehouse_map = {w["id"]: w["name"] for w in dataset["warehouses"]}
+    user_map = {u["id"]: u["name"] for u in dataset["users"]}
+    results = {}
+    
+    # Dashboard: the filtered fetch (cold cache every run) and the enrichment block
+    results["dashboard.filter_cycle_counts"] = time_runs(
+        lambda: db_client.filter_cycle_counts(columns="dashboard"), repeat,
+        setup=db_client.invalidate_read_cache
+    )
+    data = db_client.filter_cycle_counts(columns="dashboard")
+    results["dashboard.prepare_dashboard_frame"] = time_runs(
+        lambda: prepare_dashboard_frame(data, warehouse_map, user_map), repeat
+    )
+    
+    # Charts get the same frames as the dashboard's Charts tab
+    filtered_df = prepare_dashboard_frame(data, warehouse_map, user_map)
+    chart_cols = [col for col in CYCLE_COUNTS_PROJECTIONS["charts"] if col in filtered_df.columns]
+    chart_df = filtered_df[chart_cols + ["uploader_name"]]
+    charts = {
+        "compute_dashboard_summary": lambda: compute_dashboard_summary(chart_df),
+        "render_submission_chart": lambda: render_submission_chart(chart_df),
+        "render_customer_pie_chart": lambda: render_customer_pie_chart(chart_df),
+        "render_variance_histogram": lambda: render_variance_histogram(chart_df),
+        "render_user_submission_chart": lambda: render_user_submission_chart(chart_df),
+        "render_top_variance_items": lambda: render_top_variance_items(filtered_df),
+        "render_warehouse_distribution": lambda: render_warehouse_distribution(filtered_df),
+        "render_improved_variance_chart": lambda: render_improved_variance_chart(filtered_df)
+    }
+    for name, func in charts.items():
+        results[f"charts.{name}"] = time_runs(func, repeat)
+    
+    # Reconciliation works on the dashboard DataFrame
+    results["reconciliation.find_reconciliation_opportunities"] = time_runs(
+        lambda: find_reconciliation_opportunities(filtered_df.copy(), max_days=RECONCILIATION_MAX_DAYS), repeat
+    )
+    opportunities = find_reconciliation_opportunities(filtered_df.copy(), max_days=RECONCILIATION_MAX_DAYS)
+    results["reconciliation.create_consolidated_excel_report"] = time_runs(
+        lambda: create_consolidated_excel_report(opportunities), repeat
+    )
+    results["reconciliation.create_consolidated_excel_report"]["opportunities"] = len(opportunities)
+    
+    # Import: parse and validate a manager's upload file
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "import.csv")
+        to_import_file(dataset["cycle_counts"], path)
+        with open(path, "rb") as f:
+            content = f.read()
+    results["upload.parse_import"] = time_runs(lambda: parse_import(content), repeat)
+    
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cycle count tracker on generated data")
+    for name, value in DEFAULT_DATASET_CONFIG.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=value)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file to write")
+    args = parser.parse_args(argv)
+    
+    config = {name: getattr(args, name) for name in DEFAULT_DATASET_CONFIG}
+    
+    start = time.perf_counter()
+    dataset = generate_dataset(**config)
+    generate_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    load_into_sqlite(SupabaseClient().supabase, dataset)
+    load_s = time.perf_counter() - start
+    print(f"Generated {config['rows']} rows in {generate_s:.1f}s, loaded in {load_s:.1f}s")
+    
+    benchmarks = run_benchmarks(dataset, args.repeat)
+    
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "config": dataset["config"],
+        "repeat": args.repeat,
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "plotly": plotly.__version__,
+            "streamlit": st.__version__
+        },
+        "setup_s": {"generate": round(generate_s, 3), "load": round(load_s, 3)},
+        "benchmarks": benchmarks
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    for name, result in benchmarks.items():
+        print(f"{name:55s} median {result['median_ms']:10.1f} ms  min {result['min_ms']:10.1f} ms")
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
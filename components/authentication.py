@@ -70,7 +70,7 @@ def authenticate():
             
             # Get user
             try:
-                user = db_client.get_user(username)
+                user = db_client.get_user(username, use_cache=False)
                 
                 if user:
                     # Get password hash from user record
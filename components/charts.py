@@ -3,27 +3,30 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from database.frames import cycle_counts_frame, is_empty
 
-def render_submission_chart(data):
+def render_submission_chart(data, counts_by_date=None):
     """
     Render a chart showing submission counts over time
     
     Args:
-        data (list): List of cycle count records
+        data (list | DataFrame): Cycle count records
+        counts_by_date (DataFrame, optional): Pre-aggregated date/count rows, used instead of data
     """
-    if not data:
+    if is_empty(data) and counts_by_date is None:
         st.info("No data available to display")
         return
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    # Convert cycle_date to datetime
-    df["cycle_date"] = pd.to_datetime(df["cycle_date"])
-    
-    # Group by date and count submissions
-    counts_by_date = df.groupby(df["cycle_date"].dt.date).size().reset_index(name="count")
-    counts_by_date.columns = ["date", "count"]
+    if counts_by_date is None:
+        # Convert to DataFrame
+        df = cycle_counts_frame(data)
+        
+        # Convert cycle_date to datetime
+        df["cycle_date"] = pd.to_datetime(df["cycle_date"])
+        
+        # Group by date and count submissions
+        counts_by_date = df.groupby(df["cycle_date"].dt.date).size().reset_index(name="count")
+        counts_by_date.columns = ["date", "count"]
     
     # Create the chart
     fig = px.line(counts_by_date, x="date", y="count", 
@@ -32,23 +35,25 @@ def render_submission_chart(data):
     
     st.plotly_chart(fig, use_container_width=True)
 
-def render_customer_pie_chart(data):
+def render_customer_pie_chart(data, counts_by_customer=None):
     """
     Render a pie chart showing submissions by customer
     
     Args:
-        data (list): List of cycle count records
+        data (list | DataFrame): Cycle count records
+        counts_by_customer (DataFrame, optional): Pre-aggregated customer/count rows, used instead of data
     """
-    if not data:
+    if is_empty(data) and counts_by_customer is None:
         st.info("No data available to display")
         return
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    # Group by customer and count submissions
-    counts_by_customer = df.groupby("customer").size().reset_index(name="count")
-    counts_by_customer.columns = ["customer", "count"]
+    if counts_by_customer is None:
+        # Convert to DataFrame
+        df = cycle_counts_frame(data)
+        
+        # Group by customer and count submissions
+        counts_by_customer = df.groupby("customer", observed=True).size().reset_index(name="count")
+        counts_by_customer.columns = ["customer", "count"]
     
     # Create the chart
     fig = px.pie(counts_by_customer, values="count", names="customer", 
@@ -56,19 +61,20 @@ def render_customer_pie_chart(data):
     
     st.plotly_chart(fig, use_container_width=True)
 
-def render_variance_histogram(data):
+def render_variance_histogram(data, variances=None):
     """
     Render a histogram of variances
     
     Args:
-        data (list): List of cycle count records
+        data (list | DataFrame): Cycle count records
+        variances (DataFrame, optional): Frame with just the variance column, used instead of data
     """
-    if not data:
+    if is_empty(data) and variances is None:
         st.info("No data available to display")
         return
     
     # Convert to DataFrame
-    df = pd.DataFrame(data)
+    df = variances if variances is not None else cycle_counts_frame(data)
     
     # Create the histogram
     fig = px.histogram(df, x="variance", 
@@ -84,15 +90,15 @@ def render_top_variance_items(data, limit=10):
     Render a bar chart of items with highest variance
     
     Args:
-        data (list): List of cycle count records
+        data (list | DataFrame): Cycle count records
         limit (int): Number of items to show
     """
-    if not data:
+    if is_empty(data):
         st.info("No data available to display")
         return
     
     # Convert to DataFrame
-    df = pd.DataFrame(data)
+    df = cycle_counts_frame(data)
     
     # Get items with highest absolute variance
     df["abs_variance"] = df["variance"].abs()
@@ -106,23 +112,25 @@ def render_top_variance_items(data, limit=10):
     
     st.plotly_chart(fig, use_container_width=True)
 
-def render_user_submission_chart(data):
+def render_user_submission_chart(data, counts_by_user=None):
     """
     Render a bar chart showing submissions by user
     
     Args:
-        data (list): List of cycle count records
+        data (list | DataFrame): Cycle count records
+        counts_by_user (DataFrame, optional): Pre-aggregated user/count rows, used instead of data
     """
-    if not data:
+    if is_empty(data) and counts_by_user is None:
         st.info("No data available to display")
         return
     
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    # Group by user name and count submissions
-    counts_by_user = df.groupby("uploader_name").size().reset_index(name="count")
-    counts_by_user.columns = ["user", "count"]
+    if counts_by_user is None:
+        # Convert to DataFrame
+        df = cycle_counts_frame(data)
+        
+        # Group by user name and count submissions
+        counts_by_user = df.groupby("uploader_name", observed=True).size().reset_index(name="count")
+        counts_by_user.columns = ["user", "count"]
     
     # Create the chart
     fig = px.bar(counts_by_user, x="user", y="count", 
@@ -131,68 +139,47 @@ def render_user_submission_chart(data):
     
     st.plotly_chart(fig, use_container_width=True)
 
-def render_admin_dashboard_summary(data):
+def prepare_dashboard_frame(data, warehouse_map, user_map):
     """
-    Render summary metrics for the dashboard
+    Build the dashboard DataFrame from filtered cycle count records
     
     Args:
-        data (list): List of cycle count records
-    """
-    if not data:
-        st.info("No data available to display")
-        return
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    # Calculate metrics
-    total_items = len(df)
-    total_customers = df["customer"].nunique()
-    total_users = df["uploaded_by"].nunique()
+        data (list | DataFrame): Cycle count records
+        warehouse_map (dict): Warehouse ID -> name
+        user_map (dict): User ID -> display name
     
-    # Create date ranges
-    now = datetime.now()
-    df["uploaded_at"] = pd.to_datetime(df["uploaded_at"])
-    last_week = now - timedelta(days=7)
-    last_month = now - timedelta(days=30)
+    Returns:
+        DataFrame: The records typed by cycle_counts_frame, with warehouse and uploader_name columns
+    """
+    df = cycle_counts_frame(data)
     
-    # Filter by date ranges
-    items_last_week = len(df[df["uploaded_at"] >= last_week])
-    items_last_month = len(df[df["uploaded_at"] >= last_month])
+    # Add warehouse name column based on warehouse_id
+    if 'warehouse_id' in df.columns:
+        df['warehouse'] = df['warehouse_id'].map(warehouse_map).fillna("Unknown").astype("category")
     
-    # Display metrics only for
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total Items", total_items)
-    col2.metric("Total Customers", total_customers)
-    col3.metric("Total Users", total_users)
-    
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Items Last Week", items_last_week)
-    col2.metric("Items Last Month", items_last_month)
+    # Add user name column based on uploaded_by UUID
+    if 'uploaded_by' in df.columns:
+        df['uploader_name'] = df['uploaded_by'].map(user_map).fillna("Unknown User").astype("category")
+    return df
 
-def render_manager_dashboard_summary(data):
+def compute_dashboard_summary(data):
     """
-    Render summary metrics for the dashboard
+    Calculate the dashboard summary metrics from cycle count records
     
     Args:
-        data (list): List of cycle count records
-    """
-    if not data:
-        st.info("No data available to display")
-        return
+        data (list | DataFrame): Cycle count records
     
+    Returns:
+        dict: total_items, total_customers, total_users, items_last_week, items_last_month,
+              total_variance, mean_variance
+    """
     # Convert to DataFrame
-    df = pd.DataFrame(data)
-    
-    # Filter by warehouse_id if it exists in both dataframe and session state
-    warehouse_id = st.session_state.get("warehouse_id")
-    if warehouse_id and "warehouse_id" in df.columns:
-        df = df[df["warehouse_id"] == warehouse_id]
+    df = cycle_counts_frame(data)
     
     # Calculate metrics
     total_items = len(df)
     total_customers = df["customer"].nunique() if "customer" in df.columns else 0
-    total_users = df["uploaded_by"].nunique() if "uploaded_by" in df.columns else 0   
+    total_users = df["uploaded_by"].nunique() if "uploaded_by" in df.columns else 0
     
     # Create date ranges
     now = datetime.now()
@@ -208,36 +195,88 @@ def render_manager_dashboard_summary(data):
         items_last_week = 0
         items_last_month = 0
     
-    # Display metrics
+    # Variance totals
+    has_variance = "variance" in df.columns and total_items > 0
+    # Summed as float64; float32 totals drift over many rows
+    variance = df["variance"].astype("float64") if has_variance else None
+    total_variance = variance.sum() if has_variance else 0
+    mean_variance = variance.mean() if has_variance else None
+    
+    return {
+        "total_items": total_items,
+        "total_customers": total_customers,
+        "total_users": total_users,
+        "items_last_week": items_last_week,
+        "items_last_month": items_last_month,
+        "total_variance": total_variance,
+        "mean_variance": mean_variance
+    }
+
+def _render_summary_metrics(metrics):
+    """Display the summary metrics in two rows"""
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Items", total_items)
-    col2.metric("Total Customers", total_customers)
-    col3.metric("Total Users", total_users)
+    col1.metric("Total Items", metrics["total_items"])
+    col2.metric("Total Customers", metrics["total_customers"])
+    col3.metric("Total Users", metrics["total_users"])
     
     col1, col2, col3 = st.columns(3)
-    col1.metric("Items Last Week", items_last_week)
-    col2.metric("Items Last Month", items_last_month)
+    col1.metric("Items Last Week", metrics["items_last_week"])
+    col2.metric("Items Last Month", metrics["items_last_month"])
+    mean_variance = metrics.get("mean_variance")
+    col3.metric("Average Variance", f"{mean_variance:.2f}" if mean_variance is not None else "N/A")
+
+def render_admin_dashboard_summary(data, metrics=None):
+    """
+    Render summary metrics for the dashboard
+    
+    Args:
+        data (list | DataFrame): Cycle count records
+        metrics (dict, optional): Precomputed metrics (see compute_dashboard_summary), used instead of data
+    """
+    if metrics is None:
+        if is_empty(data):
+            st.info("No data available to display")
+            return
+        metrics = compute_dashboard_summary(data)
+    
+    _render_summary_metrics(metrics)
+
+def render_manager_dashboard_summary(data, metrics=None):
+    """
+    Render summary metrics for the dashboard
+    
+    Args:
+        data (list | DataFrame): Cycle count records, already scoped to the manager's warehouse by the client
+        metrics (dict, optional): Precomputed metrics (see compute_dashboard_summary), used instead of data
+    """
+    if metrics is None:
+        if is_empty(data):
+            st.info("No data available to display")
+            return
+        metrics = compute_dashboard_summary(data)
+    
+    _render_summary_metrics(metrics)
 
 def render_warehouse_distribution(data):
     """
     Render a chart showing distribution of items across warehouses
     
     Args:
-        data (list): List of cycle count records
+        data (list | DataFrame): Cycle count records
     """
-    if not data:
+    if is_empty(data):
         st.info("No data available to display")
         return
     
     # Convert to DataFrame
-    df = pd.DataFrame(data)
+    df = cycle_counts_frame(data)
     
     if 'warehouse' not in df.columns:
         st.info("Warehouse data not available in records")
         return
     
     # Group by warehouse
-    counts_by_warehouse = df.groupby("warehouse").size().reset_index(name="count")
+    counts_by_warehouse = df.groupby("warehouse", observed=True).size().reset_index(name="count")
     counts_by_warehouse.columns = ["warehouse", "count"]
     
     # Create the chart
@@ -252,21 +291,22 @@ def render_improved_variance_chart(data):
     Render an improved visualization of variances by customer and warehouse
     
     Args:
-        data (list): List of cycle count records
+        data (list | DataFrame): Cycle count records
     """
-    if not data:
+    if is_empty(data):
         st.info("No data available to display")
         return
     
     # Convert to DataFrame
-    df = pd.DataFrame(data)
+    df = cycle_counts_frame(data)
     
     # Calculate total variance by warehouse and customer
     pivot = df.pivot_table(
         values="variance", 
         index="warehouse", 
         columns="customer", 
-        aggfunc="sum"
+        aggfunc="sum",
+        observed=True
     ).fillna(0)
     
     # Create a heatmap
@@ -0,0 +1,196 @@
+import glob
+import gzip
+import os
+import tempfile
+import time
+import streamlit as st
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from database.schema import CYCLE_COUNTS_PROJECTIONS, CYCLE_COUNTS_COLUMN_TYPES
+
+# Columns of the downloaded file, in order: the dashboard projection plus the looked-up names
+EXPORT_COLUMNS = CYCLE_COUNTS_PROJECTIONS["dashboard"] + ["warehouse", "uploader_name"]
+
+# Arrow type for each SQL type in CYCLE_COUNTS_COLUMN_TYPES
+ARROW_TYPES = {
+    "uuid": pa.string(),
+    "text": pa.string(),
+    "numeric": pa.float64(),
+    "integer": pa.int32(),
+    "date": pa.date32(),
+    "timestamp": pa.timestamp("us")
+}
+
+# Download formats: file suffix and MIME type
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet")
+}
+
+# Export files only live for one script run; anything older was left by a
+# process that stopped mid-export
+STALE_EXPORT_SECONDS = 3600
+
+def export_arrow_schema():
+    """
+    Arrow schema of the export, typed from CYCLE_COUNTS_COLUMN_TYPES
+    
+    Returns:
+        pyarrow.Schema: One field per EXPORT_COLUMNS entry; the looked-up names are strings
+    """
+    return pa.schema([
+        (col, ARROW_TYPES[CYCLE_COUNTS_COLUMN_TYPES.get(col, "text")]) for col in EXPORT_COLUMNS
+    ])
+
+def page_to_arrow(page, schema, warehouse_map, user_map):
+    """
+    Build a typed Arrow table from one page of cycle count records
+    
+    Columns are built straight from the records, without a DataFrame. Dates
+    and timestamps arrive as ISO strings and are parsed by Arrow.
+    
+    Args:
+        page (list): Cycle count records with the dashboard columns
+        schema (pyarrow.Schema): Result of export_arrow_schema()
+        warehouse_map (dict): Warehouse ID -> name
+        user_map (dict): User ID -> display name
+    
+    Returns:
+        pyarrow.Table: The page, with warehouse and uploader_name joined
+    """
+    columns = {col: [row.get(col) for row in page] for col in CYCLE_COUNTS_PROJECTIONS["dashboard"]}
+    columns["warehouse"] = [warehouse_map.get(w_id, "Unknown") for w_id in columns["warehouse_id"]]
+    columns["uploader_name"] = [user_map.get(u_id, "Unknown User") for u_id in columns["uploaded_by"]]
+    
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if pa.types.is_date(field.type) or pa.types.is_timestamp(field.type):
+            strings = pa.array(values, type=pa.string())
+            try:
+                arrays.append(strings.cast(field.type))
+            except pa.ArrowInvalid:
+                # Timestamps with a zone offset; keep them as naive UTC like the column type
+                parsed = pd.to_datetime(pd.Series(values), format="ISO8601", utc=True).dt.tz_localize(None)
+                arrays.append(pa.array(parsed, type=field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def iter_csv_chunks(db_client, filters, warehouse_map, user_map):
+    """
+    Yield the filtered cycle counts as CSV text, one database page at a time
+    
+    Only one page is held in memory at once; warehouse and uploader names are
+    joined per page.
+    
+    Args:
+        db_client (SupabaseClient): Database client
+        filters (dict): The dashboard's filter_cycle_counts arguments
+        warehouse_map (dict): Warehouse ID -> name
+        user_map (dict): User ID -> display name
+    
+    Yields:
+        str: The header line first, then the CSV rows of one page
+    """
+    yield pd.DataFrame(columns=EXPORT_COLUMNS).to_csv(index=False)
+    
+    for page in db_client.iter_cycle_count_pages(columns="dashboard", filters=filters):
+        chunk = pd.DataFrame(page)
+        chunk['warehouse'] = chunk['warehouse_id'].map(warehouse_map).fillna("Unknown")
+        chunk['uploader_name'] = chunk['uploaded_by'].map(user_map).fillna("Unknown User")
+        yield chunk.reindex(columns=EXPORT_COLUMNS).to_csv(index=False, header=False)
+
+def write_export(db_client, filters, warehouse_map, user_map, export_format="CSV"):
+    """
+    Stream the filtered cycle counts into a temporary file
+    
+    Rows are written one database page at a time in every format: CSV text,
+    the same text gzip-compressed, or Parquet row groups typed by
+    export_arrow_schema().
+    
+    Args:
+        db_client (SupabaseClient): Database client
+        filters (dict): The dashboard's filter_cycle_counts arguments
+        warehouse_map (dict): Warehouse ID -> name
+        user_map (dict): User ID -> display name
+        export_format (str): An EXPORT_FORMATS key
+    
+    Returns:
+        str: Path of the file; the caller deletes it
+    """
+    suffix, _ = EXPORT_FORMATS[export_format]
+    fd, path = tempfile.mkstemp(prefix="cycle_count_export_", suffix=suffix)
+    try:
+        if export_format == "Parquet":
+            os.close(fd)
+            schema = export_arrow_schema()
+            with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+                for page in db_client.iter_cycle_count_pages(columns="dashboard", filters=filters):
+                    writer.write_table(page_to_arrow(page, schema, warehouse_map, user_map))
+        elif export_format == "CSV (gzip)":
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", compresslevel=6, encoding="utf-8", newline="") as f:
+                f.writelines(iter_csv_chunks(db_client, filters, warehouse_map, user_map))
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.writelines(iter_csv_chunks(db_client, filters, warehouse_map, user_map))
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+def remove_stale_exports(max_age=STALE_EXPORT_SECONDS):
+    """Delete export files older than max_age seconds from the temp directory"""
+    cutoff = time.time() - max_age
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), "cycle_count_export_*")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass  # Already removed by another session
+
+def render_data_export(db_client, filters, warehouse_map, user_map):
+    """
+    Render the "Download Filtered Data" option for the dashboard
+    
+    The file is built on request, straight from the database, instead of
+    encoding the loaded table on every rerun. The download button gets it on
+    that run only and the file is deleted straight away: Streamlit holds the
+    button's bytes in memory until the next rerun, so a large export is not
+    kept around while the user goes on with the dashboard. Parquet and gzip
+    CSV files are much smaller than plain CSV, and Parquet keeps the column
+    types.
+    
+    Args:
+        db_client (SupabaseClient): Database client
+        filters (dict): The dashboard's filter_cycle_counts arguments
+        warehouse_map (dict): Warehouse ID -> name
+        user_map (dict): User ID -> display name
+    """
+    format_col, button_col = st.columns([1, 4])
+    export_format = format_col.selectbox("Export format", list(EXPORT_FORMATS), key="export_format",
+                                         label_visibility="collapsed")
+    suffix, mime = EXPORT_FORMATS[export_format]
+    
+    with button_col:
+        if not st.button("Prepare Filtered Data Download", help="Export every matching record"):
+            return
+        
+        remove_stale_exports()
+        with st.spinner("Exporting..."):
+            path = write_export(db_client, filters, warehouse_map, user_map, export_format)
+        try:
+            with open(path, "rb") as f:
+                # "ignore" keeps the page (and so the button) as it is when the file is saved
+                st.download_button(
+                    label="Download Filtered Data",
+                    data=f,
+                    file_name=f"cycle_count_data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}{suffix}",
+                    mime=mime,
+                    on_click="ignore"
+                )
+        finally:
+            os.remove(path)
+        st.caption("The download stays available until the page next updates.")
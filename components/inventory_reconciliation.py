@@ -4,6 +4,9 @@ from datetime import datetime, timedelta
 import numpy as np
 import io
 
+# Longest look-back window offered by the reconciliation slider
+RECONCILIATION_MAX_DAYS = 30
+
 def find_reconciliation_opportunities(df, max_days=7):
     """
     Find reconciliation opportunities for items with overages in some locations
@@ -43,7 +46,8 @@ def find_reconciliation_opportunities(df, max_days=7):
     
     # Use datetime comparison - safely handle conversion
     try:
-        recent_df = working_df[pd.to_datetime(working_df['cycle_date']).dt.date >= cutoff_date].copy()
+        # Compared as datetime64 rather than per-row date objects
+        recent_df = working_df[pd.to_datetime(working_df['cycle_date']) >= pd.Timestamp(cutoff_date)].copy()
     except:
         # If there's an error in date conversion, return empty frame
         return pd.DataFrame()
@@ -52,15 +56,21 @@ def find_reconciliation_opportunities(df, max_days=7):
         return pd.DataFrame()
     
     # Get only the most recent count for each item-location combination
-    recent_df = recent_df.sort_values('cycle_date', ascending=False)
+    # (ties on cycle_date go to the latest upload, as in cycle_count_latest)
+    sort_cols = ['cycle_date', 'uploaded_at'] if 'uploaded_at' in recent_df.columns else ['cycle_date']
+    recent_df = recent_df.sort_values(sort_cols, ascending=False)
     recent_df = recent_df.drop_duplicates(subset=['item_id', 'location'], keep='first')
     
+    # Only keep the columns used below, so each item's slice copies fewer typed blocks
+    used_cols = ['item_id', 'description', 'unit', 'location', 'variance', 'cycle_date', 'warehouse']
+    recent_df = recent_df[[col for col in used_cols if col in recent_df.columns]]
+    
     opportunities = []
     
     # Group by item_id
     for item_id, item_group in recent_df.groupby('item_id'):
         # Skip if only one location for this item
-        if len(item_group['location'].unique()) <= 1:
+        if item_group['location'].nunique() <= 1:
             continue
         
         # Get overages and shortages by location
@@ -411,7 +421,7 @@ def render_reconciliation_opportunities(df):
     """)
     
     # Filter settings
-    max_days = st.slider("Look back period (days)", min_value=1, max_value=30, value=7)
+    max_days = st.slider("Look back period (days)", min_value=1, max_value=RECONCILIATION_MAX_DAYS, value=7)
     
     # Find opportunities
     opportunities = find_reconciliation_opportunities(working_df, max_days=max_days)
@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from datetime import date, datetime
 from database.client import SupabaseClient
+from database.frames import cycle_counts_frame
 import uuid
 import io  # For Excel export functionality
 import logging  # Add this import
@@ -13,6 +14,169 @@ from components.cycle_count_template import create_import_template
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Column name mapping dictionary - maps various possible names to our standard fields
+IMPORT_COLUMN_MAPPING = {
+    # Standard name: [list of possible variant names]
+    "item_id": ["item_id", "itemid", "item_number", "itemnumber", "item", "sku", "item code", "itemcode", "part_number", "partnumber", "0"],
+    "description": ["description", "desc", "item_description", "itemdescription", "product_description", "name", "item_name", "product_name", "product", "1"],
+    "lot_number": ["lot_number", "lotno.", "lot_no.", "lotnumber", "lot", "lot_no", "lot#", "batch", "batch_number", "batchnumber", "2"],
+    "expiration_date": ["expiration_date", "expirationdate", "expiration", "exp_date", "expdate", "exp", "expiry_date", "expirydate", "expiry", "3"],
+    "unit": ["unit", "uom", "measure", "unit_of_measure", "unitofmeasure", "units", "4"],
+    "status": ["status", "state", "condition", "item_status", "5"],
+    "lp": ["lp", "license_plate", "licenseplate", "pallet_id", "palletid", "6"],
+    "location": ["location", "loc", "storage_location", "storagelocation", "bin", "bin_location", "warehouse_location", "7"],
+    "system_count": ["system_count", "systemcount", "expected_count", "expectedcount", "expected", "system_qty", "qty", "system", "book_count", "bookcount", "8"],
+    "actual_count": ["actual_count", "actualcount", "counted", "physical_count", "physicalcount", "count", "physical", "actual_qty", "actual", "9"],
+    "customer": ["customer", "customer_name", "customername", "client", "client_name", "account", "10"],
+    "notes": ["notes", "note", "comments", "comment", "remarks", "observation", "observations", "details", "11"]
+}
+
+# Columns an imported record may carry
+# (variance and percent_diff are computed by the database)
+IMPORT_EXPECTED_COLUMNS = ["item_id", "description", "lot_number", "expiration_date", 
+                           "unit", "status", "lp", "location", "system_count", 
+                           "actual_count", "customer", 
+                           "notes", "cycle_date", "uploaded_by", "uploaded_at", 
+                           "warehouse_id"]
+
+# Fields every imported row must have, with their display names
+IMPORT_REQUIRED_FIELDS = {
+    "customer": "Customer", 
+    "item_id": "Item ID", 
+    "description": "Description", 
+    "location": "Location", 
+    "system_count": "System Count", 
+    "actual_count": "Actual Count"
+}
+
+def map_import_columns(import_df):
+    """
+    Rename the columns of an imported file to the standard field names
+    
+    Args:
+        import_df (DataFrame): Imported rows with lowercased column names
+    
+    Returns:
+        DataFrame: The rows with every recognised column renamed via IMPORT_COLUMN_MAPPING
+    """
+    # Create a reverse lookup dictionary
+    reverse_mapping = {}
+    for standard_name, variants in IMPORT_COLUMN_MAPPING.items():
+        for variant in variants:
+            reverse_mapping[variant] = standard_name
+    
+    # Map columns in the imported dataframe to our standard names
+    renamed_columns = {}
+    for col in import_df.columns:
+        col_str = str(col).lower().strip()
+        if col_str in reverse_mapping:
+            renamed_columns[col] = reverse_mapping[col_str]
+    
+    # Rename columns in dataframe
+    return import_df.rename(columns=renamed_columns)
+
+def drop_duplicate_columns(import_df):
+    """
+    Keep only the first occurrence of each column name
+    
+    Args:
+        import_df (DataFrame): Imported rows
+    
+    Returns:
+        tuple: (DataFrame without duplicate columns, list of the duplicated names)
+    """
+    if not any(import_df.columns.duplicated()):
+        return import_df, []
+    
+    duplicate_cols = import_df.columns[import_df.columns.duplicated()].tolist()
+    
+    # Select only the first occurrence of each column name
+    unique_columns = []
+    for col in import_df.columns:
+        if col not in unique_columns:
+            unique_columns.append(col)
+    return import_df[unique_columns], duplicate_cols
+
+def clean_import_dates(import_df):
+    """
+    Turn expiration dates into ISO strings, and missing ones into None
+    
+    Args:
+        import_df (DataFrame): Imported rows
+    
+    Returns:
+        DataFrame: The same frame, modified in place
+    """
+    if 'expiration_date' in import_df.columns:
+        # The column is a DATE, so a missing date (NaN/NaT) must be sent as None rather
+        # than a placeholder string. Other text is sent as-is: the database rejects a
+        # value that is not a date, and insert_cycle_counts reports that row.
+        import_df['expiration_date'] = import_df['expiration_date'].apply(
+            lambda x: None if pd.isna(x)
+            else x.strftime('%Y-%m-%d') if isinstance(x, (pd.Timestamp, datetime, date))
+            else x
+        )
+    return import_df
+
+def find_missing_required_data(import_df):
+    """
+    Count the rows missing each required field
+    
+    Args:
+        import_df (DataFrame): Imported rows
+    
+    Returns:
+        dict: field -> (display name, number of rows missing it), only for fields with gaps
+    """
+    missing_data = {}
+    for field, display_name in IMPORT_REQUIRED_FIELDS.items():
+        if field in import_df.columns:
+            null_count = import_df[field].isna().sum()
+            if null_count > 0:
+                missing_data[field] = (display_name, null_count)
+    return missing_data
+
+def clean_nans(d):
+    """Replace NaN and NaT values in a record with None"""
+    for k, v in d.items():
+        if isinstance(v, float) and np.isnan(v):
+            d[k] = None
+        # Add this check for NaT values
+        elif pd.isna(v) or v is pd.NaT:
+            d[k] = None
+    return d
+
+def prepare_import_records(import_df, warehouse_id, cycle_date, user_id):
+    """
+    Convert validated import rows into cycle count records ready to insert
+    
+    Args:
+        import_df (DataFrame): Imported rows with standard column names
+        warehouse_id (int): Warehouse the records are imported into
+        cycle_date (date): Cycle date applied to every record
+        user_id (str): ID of the importing user
+    
+    Returns:
+        list: Cycle count dictionaries without unsupported columns
+    """
+    records = [clean_nans(record) for record in import_df.to_dict('records')]
+    
+    for record in records:
+        # Remove columns that aren't in the expected schema
+        for col in list(record.keys()):
+            if col not in IMPORT_EXPECTED_COLUMNS:
+                del record[col]
+        
+        # Add required fields
+        record["id"] = str(uuid.uuid4())
+        record["uploaded_by"] = user_id
+        record["uploaded_at"] = datetime.now().isoformat()
+        record["warehouse_id"] = warehouse_id
+        
+        # Override any existing cycle_date with the selected date
+        record["cycle_date"] = cycle_date.isoformat()
+    return records
+
 def render_upload_form():
     """
     Render the interface for cycle count data management
@@ -28,16 +192,17 @@ def render_upload_form():
     # Initialize Supabase client
     db_client = SupabaseClient()
     
-    # Fetch existing data
-    with st.spinner("Loading data..."):
-        data = db_client.get_all_cycle_counts()
+    # Fetch existing data - only the admin Edit and Delete tabs use it
+    data = []
+    if is_admin:
+        with st.spinner("Loading data..."):
+            data = db_client.get_all_cycle_counts(columns="export")
         
     # Convert to DataFrame if data exists
     if data:
-        df = pd.DataFrame(data)
+        df = cycle_counts_frame(data)
         # Sort by most recent first
         if 'uploaded_at' in df.columns:
-            df['uploaded_at'] = pd.to_datetime(df['uploaded_at'])
             df = df.sort_values('uploaded_at', ascending=False)
     else:
         df = pd.DataFrame()
@@ -241,12 +406,10 @@ def render_upload_form():
                             errors.append(f"Row {i+1}: Item ID is required")
                             continue
                         
-                        # Calculate variance and percent difference
+                        # Validate the counts; variance and percent difference are computed by the database
                         try:
                             system_count = float(row_data["system_count"])
                             actual_count = float(row_data["actual_count"])
-                            variance = actual_count - system_count
-                            percent_diff = (variance / system_count) * 100 if system_count != 0 else 0
                         except ValueError:
                             errors.append(f"Row {i+1}: System Count and Actual Count must be numbers")
                             continue
@@ -264,8 +427,6 @@ def render_upload_form():
                             "location": row_data["location"] or "",
                             "system_count": system_count,
                             "actual_count": actual_count,
-                            "variance": variance,
-                            "percent_diff": percent_diff,
                             "customer": customer_meta,
                             "notes": row_data["notes"] or "",
                             "cycle_date": cycle_date_meta.isoformat(),
@@ -287,16 +448,12 @@ def render_upload_form():
                     
                     # Process valid rows
                     if valid_rows and not errors:
-                        success_count = 0
-                        error_count = 0
+                        result = db_client.insert_cycle_counts(valid_rows)
+                        success_count = len(result["inserted"])
                         
-                        for record in valid_rows:
-                            try:
-                                db_client.insert_cycle_count(record)
-                                success_count += 1
-                            except Exception as e:
-                                error_count += 1
-                                st.error(f"Error adding record: {str(e)}")
+                        for chunk_error in result["errors"]:
+                            first_row, last_row = chunk_error["rows"]
+                            st.error(f"Error adding rows {first_row}-{last_row}: {chunk_error['error']}")
                         
                         if success_count > 0:
                             st.success(f"Successfully added {success_count} records for {customer_meta}")
@@ -356,8 +513,9 @@ def render_upload_form():
                                                             options=range(len(record_indices)),
                                                             format_func=lambda x: record_indices[x])
                         
-                        record_to_edit = filtered_df.iloc[selected_record_idx]
-                        record_id = record_to_edit.get('id')
+                        # Edit the record as stored, not its compact float32/datetime64 copy in df
+                        record_id = filtered_df.iloc[selected_record_idx]['id']
+                        record_to_edit = next(record for record in data if record['id'] == record_id)
                         
                         # Edit form
                         with st.form("edit_record_form"):
@@ -438,7 +596,7 @@ def render_upload_form():
                                                 value=record_to_edit.get('notes', ''),
                                                 key="edit_notes")
                             
-                            # Calculated fields
+                            # Preview only - the database computes the stored values
                             variance = actual_count - system_count
                             percent_diff = (variance / system_count) * 100 if system_count != 0 else 0
                                 
@@ -465,8 +623,6 @@ def render_upload_form():
                                             "location": location,
                                             "system_count": float(system_count),
                                             "actual_count": float(actual_count),
-                                            "variance": float(variance),
-                                            "percent_diff": float(percent_diff),
                                             "customer": customer,
                                             "notes": notes,
                                             "cycle_date": cycle_date.isoformat(),
@@ -491,7 +647,7 @@ def render_upload_form():
                 st.info("No records to delete.")
             else:
                 # Create filters
-                col1, col2 = st.columns(2)
+                col1, col2, col3 = st.columns(3)
                 
                 # Customer filter
                 if 'customer' in df.columns:
@@ -499,8 +655,14 @@ def render_upload_form():
                     with col1:
                         delete_customer = st.selectbox("Filter by Customer", customers, key="del_customer")
                 
-                # Date range filter
+                # Warehouse filter
+                warehouse_ids_by_name = {w['name']: w['id'] for w in db_client.get_all_warehouses()}
                 with col2:
+                    delete_warehouse = st.selectbox(
+                        "Filter by Warehouse", ['All'] + sorted(warehouse_ids_by_name.keys()), key="del_warehouse")
+                
+                # Date range filter
+                with col3:
                     delete_date_range = st.date_input(
                         "Filter by Cycle Date",
                         value=[],
@@ -508,11 +670,41 @@ def render_upload_form():
                         help="Select date range for filtering records"
                     )
                 
+                delete_filters = {
+                    "customer": delete_customer if 'customer' in df.columns and delete_customer != 'All' else None,
+                    "warehouse_id": warehouse_ids_by_name.get(delete_warehouse),
+                    "date_from": delete_date_range[0] if len(delete_date_range) == 2 else None,
+                    "date_to": delete_date_range[1] if len(delete_date_range) == 2 else None
+                }
+                
+                # Delete everything matching the filters in one request, after a dry-run count
+                if any(delete_filters.values()):
+                    match_count = db_client.delete_cycle_counts_where(**delete_filters, dry_run=True)
+                    if match_count is not None:
+                        st.info(f"{match_count} record(s) in the database match these filters")
+                        if match_count > 0:
+                            confirm_delete = st.checkbox(
+                                f"I understand all {match_count} matching record(s) will be permanently deleted",
+                                key="confirm_filter_delete"
+                            )
+                            if st.button(f"Delete All {match_count} Matching Records", type="primary",
+                                         disabled=not confirm_delete, key="filter_delete_btn"):
+                                deleted = db_client.delete_cycle_counts_where(**delete_filters)
+                                if deleted is not None:
+                                    st.success(f"Successfully deleted {deleted} record(s)!")
+                                    st.session_state.selected_delete_records = set()
+                                    st.rerun()
+                else:
+                    st.info("Choose a customer, warehouse or date range to delete all matching records at once.")
+                
                 # Apply filters
                 delete_df = df.copy()
                 
-                if 'customer' in df.columns and delete_customer != 'All':
-                    delete_df = delete_df[delete_df['customer'] == delete_customer]
+                if delete_filters["customer"]:
+                    delete_df = delete_df[delete_df['customer'] == delete_filters["customer"]]
+                
+                if delete_filters["warehouse_id"] and 'warehouse_id' in delete_df.columns:
+                    delete_df = delete_df[delete_df['warehouse_id'] == delete_filters["warehouse_id"]]
                 
                 if len(delete_date_range) == 2:
                     start_date, end_date = delete_date_range
@@ -566,7 +758,7 @@ def render_upload_form():
                                 user = db_client.get_user_by_id(user_id)
                                 if user:
                                     user_name = user.get("name", "Unknown")
-                            st.write(f"{row['item_id']} - {row['description']} - {row['customer']} - {row['cycle_date']} - Uploaded by: {user_name}")
+                            st.write(f"{row['item_id']} - {row['description']} - {row['customer']} - {row['cycle_date']:%Y-%m-%d} - Uploaded by: {user_name}")
                     
                     # Bulk delete action
                     selected_records = list(st.session_state.selected_delete_records)
@@ -574,12 +766,9 @@ def render_upload_form():
                         st.warning(f"You've selected {len(selected_records)} record(s) to delete")
                         if st.button("Delete Selected Records", type="primary", key="bulk_delete_btn"):
                             try:
-                                success_count = 0
-                                for i in selected_records:
-                                    record_id = delete_df.iloc[i].get('id')
-                                    deleted = db_client.delete_cycle_count(record_id)
-                                    if deleted:
-                                        success_count += 1
+                                # Delete the whole selection in one request
+                                record_ids = delete_df.iloc[sorted(selected_records)]['id'].tolist()
+                                success_count = db_client.delete_cycle_counts(record_ids)
                                 
                                 if success_count > 0:
                                     st.success(f"Successfully deleted {success_count} record(s)!")
@@ -655,23 +844,6 @@ def render_upload_form():
                 # Convert all column names to lowercase, strip whitespace and replace spaces with underscores
                 import_df.columns = [str(col).lower().strip().replace(' ', '_') for col in import_df.columns]
                 
-                # Column name mapping dictionary - maps various possible names to our standard fields
-                column_mapping = {
-                    # Standard name: [list of possible variant names]
-                    "item_id": ["item_id", "itemid", "item_number", "itemnumber", "item", "sku", "item code", "itemcode", "part_number", "partnumber", "0"],
-                    "description": ["description", "desc", "item_description", "itemdescription", "product_description", "name", "item_name", "product_name", "product", "1"],
-                    "lot_number": ["lot_number", "lotno.", "lot_no.", "lotnumber", "lot", "lot_no", "lot#", "batch", "batch_number", "batchnumber", "2"],
-                    "expiration_date": ["expiration_date", "expirationdate", "expiration", "exp_date", "expdate", "exp", "expiry_date", "expirydate", "expiry", "3"],
-                    "unit": ["unit", "uom", "measure", "unit_of_measure", "unitofmeasure", "units", "4"],
-                    "status": ["status", "state", "condition", "item_status", "5"],
-                    "lp": ["lp", "license_plate", "licenseplate", "pallet_id", "palletid", "6"],
-                    "location": ["location", "loc", "storage_location", "storagelocation", "bin", "bin_location", "warehouse_location", "7"],
-                    "system_count": ["system_count", "systemcount", "expected_count", "expectedcount", "expected", "system_qty", "qty", "system", "book_count", "bookcount", "8"],
-                    "actual_count": ["actual_count", "actualcount", "counted", "physical_count", "physicalcount", "count", "physical", "actual_qty", "actual", "9"],
-                    "customer": ["customer", "customer_name", "customername", "client", "client_name", "account", "10"],
-                    "notes": ["notes", "note", "comments", "comment", "remarks", "observation", "observations", "details", "11"]
-                }
-                
                 # Check if columns might be numeric indices
                 has_numeric_columns = any(col.isdigit() for col in import_df.columns if isinstance(col, str))
                 
@@ -698,39 +870,12 @@ def render_upload_form():
                     
                     import_df = import_df.rename(columns=rename_dict)
                 else:
-                    # Create a reverse lookup dictionary
-                    reverse_mapping = {}
-                    for standard_name, variants in column_mapping.items():
-                        for variant in variants:
-                            reverse_mapping[variant] = standard_name
-                    
-                    # Map columns in the imported dataframe to our standard names
-                    renamed_columns = {}
-                    found_columns = set()
-                    
-                    for col in import_df.columns:
-                        col_str = str(col).lower().strip()
-                        if col_str in reverse_mapping:
-                            standard_name = reverse_mapping[col_str]
-                            renamed_columns[col] = standard_name
-                            found_columns.add(standard_name)
-                    
-                    # Rename columns in dataframe
-                    import_df = import_df.rename(columns=renamed_columns)
+                    import_df = map_import_columns(import_df)
                 
                 # Check for and resolve duplicate columns
-                if any(import_df.columns.duplicated()):
-                    duplicate_cols = import_df.columns[import_df.columns.duplicated()].tolist()
+                import_df, duplicate_cols = drop_duplicate_columns(import_df)
+                if duplicate_cols:
                     st.warning(f"Found duplicate columns: {duplicate_cols}. Keeping only the first occurrence of each.")
-                    
-                    # Create a new DataFrame with deduplicated columns
-                    unique_columns = []
-                    for col in import_df.columns:
-                        if col not in unique_columns:
-                            unique_columns.append(col)
-                    
-                    # Select only the first occurrence of each column name
-                    import_df = import_df[unique_columns]
                 
                 # Check required columns
                 # TODO: FINALIZE WITH BRAYAN WHAT COLUMNS ARE REQUIRED
@@ -762,27 +907,7 @@ def render_upload_form():
                     import_df = import_df.head(5000)
                 
                 # Process any datetime columns before converting to records
-                if 'expiration_date' in import_df.columns:
-                    import_df['expiration_date'] = import_df['expiration_date'].apply(
-                        lambda x: x.strftime('%Y-%m-%d') if isinstance(x, (pd.Timestamp, datetime, date)) and not pd.isna(x) 
-                        else None if pd.isna(x) 
-                        else x
-                    )
-                
-                # Calculate variance and percent_diff
-                import_df["variance"] = import_df["actual_count"] - import_df["system_count"]
-                import_df["percent_diff"] = import_df.apply(
-                    lambda row: (row["variance"] / row["system_count"]) * 100 
-                                if row["system_count"] != 0 else 0, 
-                    axis=1
-                )
-                
-                # Make sure expiration_date is handled specially since it can't be a default string
-                # TODO: THIS MIGHT CAUSING ISSUES
-                if "expiration_date" in import_df.columns:
-                    import_df["expiration_date"] = import_df["expiration_date"].apply(
-                        lambda x: None if pd.isna(x) else x
-                    )
+                import_df = clean_import_dates(import_df)
                     
                 # Add warehouse selection for imports
                 st.write("### Select Warehouse")
@@ -814,24 +939,7 @@ def render_upload_form():
                     help="This date will be used for all records in this import"
                 )
 
-                # Function to replace NaN with None in a dictionary
-                def clean_nans(d):
-                    for k, v in d.items():
-                        if isinstance(v, float) and np.isnan(v):
-                            d[k] = None
-                        # Add this check for NaT values
-                        elif pd.isna(v) or v is pd.NaT:
-                            d[k] = None
-                    return d
-
-                # Check for columns that might not exist in database schema
-                expected_columns = ["item_id", "description", "lot_number", "expiration_date", 
-                                    "unit", "status", "lp", "location", "system_count", 
-                                    "actual_count", "variance", "percent_diff", "customer", 
-                                    "notes", "cycle_date", "uploaded_by", "uploaded_at", 
-                                    "warehouse_id"]
-                
-                extra_columns = [col for col in import_df.columns if col not in expected_columns]
+                extra_columns = [col for col in import_df.columns if col not in IMPORT_EXPECTED_COLUMNS]
                 
                 if extra_columns:
                     warning_msg = f"Warning: The following columns are not supported in the system and will be ignored when uploading: {', '.join(extra_columns)}"
@@ -845,15 +953,12 @@ def render_upload_form():
                 else:
                     continue_anyway = True
                 
-                required_fields = {
-                    "customer": "Customer", 
-                    "item_id": "Item ID", 
-                    "description": "Description", 
-                    "location": "Location", 
-                    "system_count": "System Count", 
-                    "actual_count": "Actual Count"
-                }
-
+                # Re-imported corrections update the existing rows instead of duplicating them
+                update_existing = st.checkbox(
+                    "Update matching existing records",
+                    help="Records with the same customer, item ID, location, LP, lot number and cycle date are updated in place instead of added again"
+                )
+                
                 # Add validation before importing
                 if st.button("Import Data") and continue_anyway:
                     # Validate cycle count date was selected
@@ -861,12 +966,7 @@ def render_upload_form():
                         st.error("Please select a cycle count date before importing")
                     else:
                         # Check for missing required data
-                        missing_data = {}
-                        for field, display_name in required_fields.items():
-                            if field in import_df.columns:
-                                null_count = import_df[field].isna().sum()
-                                if null_count > 0:
-                                    missing_data[field] = (display_name, null_count)
+                        missing_data = find_missing_required_data(import_df)
                         
                         if missing_data:
                             st.error("❌ Your file contains missing required data:")
@@ -898,9 +998,9 @@ def render_upload_form():
                             st.stop()  # Stop execution to prevent importing invalid data
                         
                         with st.spinner("Preparing to import..."):
-                            # Convert DataFrame to records and clean NaN values
-                            records = import_df.to_dict('records')
-                            cleaned_records = [clean_nans(record) for record in records]
+                            # Convert DataFrame to records, clean NaN values and add the import metadata
+                            cleaned_records = prepare_import_records(
+                                import_df, warehouse_id, cycle_count_date, st.session_state.get("user_id"))
                             
                             total_records = len(cleaned_records)
                             
@@ -911,46 +1011,39 @@ def render_upload_form():
                                 progress_bar = st.progress(0)
                                 status_text = st.empty()
                                 
-                                success_count = 0
-                                error_count = 0
+                                def update_progress(done, total):
+                                    progress = int((done / total) * 100)
+                                    progress_bar.progress(progress)
+                                    status_text.text(f"Processing: {done}/{total} records ({progress}%)")
                                 
-                                # Process records with progress updates
-                                for i, record in enumerate(cleaned_records):
-                                    try:
-                                        # Remove columns that aren't in the expected schema
-                                        for col in list(record.keys()):
-                                            if col not in expected_columns:
-                                                del record[col]
-                                        
-                                        # Update progress
-                                        progress = int((i / total_records) * 100)
-                                        progress_bar.progress(progress)
-                                        status_text.text(f"Processing: {i+1}/{total_records} records ({progress}%)")
-                                        
-                                        # Add required fields
-                                        record["id"] = str(uuid.uuid4())
-                                        record["uploaded_by"] = st.session_state.get("user_id")
-                                        record["uploaded_at"] = datetime.now().isoformat()
-                                        record["warehouse_id"] = warehouse_id
-                                        
-                                        # Override any existing cycle_date with the selected date
-                                        record["cycle_date"] = cycle_count_date.isoformat()
-                                        
-                                        
-                                        # Insert into database
-                                        db_client.insert_cycle_count(record)
-                                        success_count += 1
-                                    except Exception as e:
-                                        error_count += 1
-                                        st.error(f"Error importing record {i+1}: {str(e)}")
-                                        # Show problematic record
-                                        st.write(f"Problem record: {record}")
+                                # Write to the database, one request per chunk
+                                if update_existing:
+                                    result = db_client.upsert_cycle_counts(
+                                        cleaned_records, progress_callback=update_progress)
+                                    statuses = [outcome["status"] for outcome in result["outcomes"]]
+                                    inserted_count = statuses.count("inserted")
+                                    updated_count = statuses.count("updated")
+                                    duplicate_count = statuses.count("duplicate")
+                                    success_count = inserted_count + updated_count
+                                else:
+                                    result = db_client.insert_cycle_counts(cleaned_records, progress_callback=update_progress)
+                                    success_count = len(result["inserted"])
+                                error_count = total_records - success_count
+                                
+                                for chunk_error in result["errors"]:
+                                    first_row, last_row = chunk_error["rows"]
+                                    st.error(f"Error importing records {first_row}-{last_row}: {chunk_error['error']}")
                                 
                                 # Complete the progress bar
                                 progress_bar.progress(100)
                                 status_text.text(f"Import complete: {success_count}/{total_records} records processed successfully")
                                 
-                                st.success(f"Import complete. {success_count} records imported successfully, {error_count} errors.")
+                                if update_existing:
+                                    error_count -= duplicate_count
+                                    st.success(f"Import complete. {inserted_count} records added, {updated_count} updated, "
+                                               f"{duplicate_count} duplicate rows skipped, {error_count} errors.")
+                                else:
+                                    st.success(f"Import complete. {success_count} records imported successfully, {error_count} errors.")
             except Exception as e:
                 st.error(f"Error processing file: {str(e)}")
     
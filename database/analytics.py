@@ -0,0 +1,219 @@
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from database.schema import CYCLE_COUNTS_COLUMNS, CYCLE_COUNTS_COLUMN_TYPES, CYCLE_COUNTS_PROJECTIONS
+
+# DuckDB is optional; without it the dashboard aggregates in pandas as before
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# DuckDB type for each SQL type in CYCLE_COUNTS_COLUMN_TYPES, used for the empty
+# table queried before the first snapshot sync so SUM/AVG still type-check
+DUCKDB_TYPES = {
+    "uuid": "VARCHAR",
+    "text": "VARCHAR",
+    "date": "DATE",
+    "timestamp": "TIMESTAMP",
+    "numeric": "DOUBLE",
+    "integer": "INTEGER"
+}
+
+class CycleCountAnalytics:
+    """
+    SQL aggregates over the local cycle count snapshot, run by embedded DuckDB
+    
+    DuckDB scans the snapshot's Parquet file directly, so group-bys run on a
+    columnar engine and only the small result comes back into pandas. Nothing
+    is held per session, so memory stays flat however many sessions are open.
+    Filters use the same keys as apply_cycle_count_filters and must already be
+    scoped to the session's warehouse.
+    """
+    
+    def __init__(self, snapshot):
+        """
+        Args:
+            snapshot (CycleCountSnapshot): Snapshot whose Parquet file is queried
+        """
+        if duckdb is None:
+            raise ImportError("duckdb is required for the analytics engine (pip install duckdb)")
+        self.snapshot = snapshot
+    
+    def _where(self, filters=None):
+        """Translate dashboard filters into a WHERE clause and its parameters"""
+        filters = filters or {}
+        clauses = []
+        params = []
+        
+        if filters.get("customer"):
+            clauses.append(f'{CYCLE_COUNTS_COLUMNS["customer"]} = ?')
+            params.append(filters["customer"])
+        if filters.get("date_from"):
+            clauses.append(f'CAST({CYCLE_COUNTS_COLUMNS["cycle_date"]} AS DATE) >= ?')
+            params.append(filters["date_from"])
+        if filters.get("date_to"):
+            clauses.append(f'CAST({CYCLE_COUNTS_COLUMNS["cycle_date"]} AS DATE) <= ?')
+            params.append(filters["date_to"])
+        if filters.get("warehouse_id"):
+            clauses.append(f'{CYCLE_COUNTS_COLUMNS["warehouse_id"]} = ?')
+            params.append(filters["warehouse_id"])
+        
+        uploaded_by = filters.get("uploaded_by")
+        if uploaded_by:
+            if not isinstance(uploaded_by, (list, tuple, set)):
+                uploaded_by = [uploaded_by]
+            uploaded_by = list(uploaded_by)
+            placeholders = ", ".join("?" for _ in uploaded_by)
+            clauses.append(f'{CYCLE_COUNTS_COLUMNS["uploaded_by"]} IN ({placeholders})')
+            params.extend(uploaded_by)
+        
+        for key, column in (("item_search", "item_id"), ("location_search", "location")):
+            if filters.get(key):
+                text = filters[key].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                clauses.append(f"{CYCLE_COUNTS_COLUMNS[column]} ILIKE ? ESCAPE '\\'")
+                params.append(f"%{text}%")
+        
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+    
+    def _query(self, sql, filters=None, leading_params=(), extra_params=()):
+        """
+        Run a query against the snapshot
+        
+        Args:
+            sql (str): Query with {source} for the table and {where} for the filters
+            filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+            leading_params (tuple): Parameters for placeholders before the WHERE clause
+            extra_params (tuple): Parameters for placeholders after the WHERE clause
+        
+        Returns:
+            DataFrame: Query result
+        """
+        columns = list(CYCLE_COUNTS_COLUMNS.values())
+        if not os.path.exists(self.snapshot.path):
+            # Nothing synced yet: query an empty table with the right columns and types
+            source = "(SELECT " + ", ".join(
+                f"NULL::{DUCKDB_TYPES[CYCLE_COUNTS_COLUMN_TYPES[col]]} AS {col}" for col in columns
+            ) + " WHERE FALSE)"
+        else:
+            source = "read_parquet('{}')".format(self.snapshot.path.replace("'", "''"))
+        
+        where, params = self._where(filters)
+        with duckdb.connect() as con:
+            return con.execute(sql.format(source=source, where=where), list(leading_params) + params + list(extra_params)).df()
+    
+    def submissions_per_day(self, filters=None):
+        """
+        Returns:
+            DataFrame: date, count
+        """
+        return self._query(f"""
+            SELECT CAST({CYCLE_COUNTS_COLUMNS["cycle_date"]} AS DATE) AS date, COUNT(*) AS count
+            FROM {{source}} {{where}}
+            GROUP BY 1 ORDER BY 1
+        """, filters)
+    
+    def submissions_by_customer(self, filters=None):
+        """
+        Returns:
+            DataFrame: customer, count
+        """
+        return self._query(f"""
+            SELECT {CYCLE_COUNTS_COLUMNS["customer"]} AS customer, COUNT(*) AS count
+            FROM {{source}} {{where}}
+            GROUP BY 1 ORDER BY 1
+        """, filters)
+    
+    def submissions_by_uploader(self, filters=None):
+        """
+        Returns:
+            DataFrame: uploaded_by, count
+        """
+        return self._query(f"""
+            SELECT {CYCLE_COUNTS_COLUMNS["uploaded_by"]} AS uploaded_by, COUNT(*) AS count
+            FROM {{source}} {{where}}
+            GROUP BY 1 ORDER BY 1
+        """, filters)
+    
+    def variance_by_customer(self, filters=None):
+        """
+        Returns:
+            DataFrame: customer, count, total_variance, mean_variance
+        """
+        variance = CYCLE_COUNTS_COLUMNS["variance"]
+        return self._query(f"""
+            SELECT {CYCLE_COUNTS_COLUMNS["customer"]} AS customer, COUNT(*) AS count,
+                   SUM({variance}) AS total_variance, AVG({variance}) AS mean_variance
+            FROM {{source}} {{where}}
+            GROUP BY 1 ORDER BY 1
+        """, filters)
+    
+    def variances(self, filters=None):
+        """
+        Returns:
+            DataFrame: variance, one row per record (for the histogram)
+        """
+        return self._query(f"""
+            SELECT {CYCLE_COUNTS_COLUMNS["variance"]} AS variance FROM {{source}} {{where}}
+        """, filters)
+    
+    def top_variance_items(self, filters=None, limit=10):
+        """
+        Returns:
+            DataFrame: The records with the largest absolute variance
+        """
+        return self._query(f"""
+            SELECT {", ".join(CYCLE_COUNTS_PROJECTIONS["charts"] + [CYCLE_COUNTS_COLUMNS["location"]])}
+            FROM {{source}} {{where}}
+            ORDER BY ABS({CYCLE_COUNTS_COLUMNS["variance"]}) DESC
+            LIMIT ?
+        """, filters, extra_params=(int(limit),))
+    
+    def summary_metrics(self, filters=None):
+        """
+        Returns:
+            dict: total_items, total_customers, total_users, items_last_week, items_last_month,
+                  total_variance, mean_variance
+        """
+        uploaded_at = f'CAST({CYCLE_COUNTS_COLUMNS["uploaded_at"]} AS TIMESTAMP)'
+        now = datetime.now()
+        df = self._query(f"""
+            SELECT COUNT(*) AS total_items,
+                   COUNT(DISTINCT {CYCLE_COUNTS_COLUMNS["customer"]}) AS total_customers,
+                   COUNT(DISTINCT {CYCLE_COUNTS_COLUMNS["uploaded_by"]}) AS total_users,
+                   COUNT(*) FILTER (WHERE {uploaded_at} >= ?) AS items_last_week,
+                   COUNT(*) FILTER (WHERE {uploaded_at} >= ?) AS items_last_month,
+                   COALESCE(SUM({CYCLE_COUNTS_COLUMNS["variance"]}), 0) AS total_variance,
+                   AVG({CYCLE_COUNTS_COLUMNS["variance"]}) AS mean_variance
+            FROM {{source}} {{where}}
+        """, filters, leading_params=(now - timedelta(days=7), now - timedelta(days=30)))
+        metrics = df.iloc[0].to_dict()
+        for key in ("total_items", "total_customers", "total_users", "items_last_week", "items_last_month"):
+            metrics[key] = int(metrics[key])
+        metrics["total_variance"] = float(metrics["total_variance"])
+        metrics["mean_variance"] = None if pd.isna(metrics["mean_variance"]) else float(metrics["mean_variance"])
+        return metrics
+    
+    def latest_counts(self, filters=None, columns="reconciliation"):
+        """
+        Get the most recent count for every item/location pair
+        
+        Args:
+            filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+            columns (str | list): Projection name or column list
+        
+        Returns:
+            DataFrame: One record per (item_id, location)
+        """
+        if isinstance(columns, str):
+            columns = CYCLE_COUNTS_PROJECTIONS[columns]
+        return self._query(f"""
+            SELECT {", ".join(columns)} FROM {{source}} {{where}}
+            QUALIFY ROW_NUMBER() OVER (
+                PARTITION BY {CYCLE_COUNTS_COLUMNS["item_id"]}, {CYCLE_COUNTS_COLUMNS["location"]}
+                ORDER BY {CYCLE_COUNTS_COLUMNS["cycle_date"]} DESC, {CYCLE_COUNTS_COLUMNS["uploaded_at"]} DESC
+            ) = 1
+        """, filters)
@@ -0,0 +1,524 @@
+import os
+import re
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta
+
+from database.schema import (
+    CYCLE_COUNTS_TABLE, WAREHOUSES_TABLE, USERS_TABLE,
+    CYCLE_COUNT_SUMMARY_FUNCTION, CYCLE_COUNTS_COLUMNS,
+    CREATE_WAREHOUSES_TABLE, CREATE_USERS_TABLE, CREATE_CYCLE_COUNTS_TABLE,
+    CREATE_CYCLE_COUNTS_NATURAL_KEY_INDEX, CREATE_CYCLE_COUNT_CUSTOMERS_VIEW, CYCLE_COUNTS_INDEXES,
+    CREATE_CYCLE_COUNT_LATEST_TABLE
+)
+
+# Backend names accepted by app_settings.storage_backend / the CYCLE_COUNT_BACKEND variable
+STORAGE_BACKENDS = ("supabase", "sqlite")
+
+# SQLite expression for Postgres NOW(), as an ISO timestamp that sorts like the app's own
+SQLITE_NOW = "strftime('%Y-%m-%dT%H:%M:%f', 'now')"
+
+# SQLite expression for Postgres gen_random_uuid(), a version 4 UUID string
+SQLITE_UUID = (
+    "lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || "
+    "substr(lower(hex(randomblob(2))), 2) || '-' || substr('89ab', 1 + (abs(random()) % 4), 1) || "
+    "substr(lower(hex(randomblob(2))), 2) || '-' || lower(hex(randomblob(6)))"
+)
+
+# Columns the Postgres BEFORE UPDATE triggers touch (CREATE_CYCLE_COUNTS_UPDATED_AT_TRIGGER)
+SQLITE_UPDATED_AT_COLUMNS = {CYCLE_COUNTS_TABLE: CYCLE_COUNTS_COLUMNS["updated_at"]}
+
+# PostgREST resource embedding: (table, embedded table) -> foreign key column on table
+SQLITE_EMBEDS = {(USERS_TABLE, WAREHOUSES_TABLE): "warehouse_id"}
+
+# SQLite versions of CREATE_CYCLE_COUNT_LATEST_TRIGGERS: inserts only replace an older
+# latest row; updates and deletes recompute the affected keys from cycle_counts
+_SQLITE_LATEST_COLUMNS = "warehouse_id, item_id, location, id, description, unit, variance, cycle_date, uploaded_at"
+_SQLITE_REFRESH_LATEST = """
+    DELETE FROM cycle_count_latest
+    WHERE warehouse_id = {row}.warehouse_id AND item_id = {row}.item_id AND location = {row}.location;
+    INSERT INTO cycle_count_latest ({columns})
+    SELECT {columns} FROM cycle_counts
+    WHERE warehouse_id = {row}.warehouse_id AND item_id = {row}.item_id AND location = {row}.location
+    ORDER BY cycle_date DESC, uploaded_at DESC
+    LIMIT 1;
+"""
+
+CREATE_SQLITE_CYCLE_COUNT_LATEST_TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS cycle_counts_latest_insert AFTER INSERT ON cycle_counts
+BEGIN
+    INSERT INTO cycle_count_latest ({_SQLITE_LATEST_COLUMNS})
+    VALUES (NEW.warehouse_id, NEW.item_id, NEW.location, NEW.id, NEW.description, NEW.unit,
+            NEW.variance, NEW.cycle_date, NEW.uploaded_at)
+    ON CONFLICT (warehouse_id, item_id, location) DO UPDATE
+    SET id = excluded.id, description = excluded.description, unit = excluded.unit,
+        variance = excluded.variance, cycle_date = excluded.cycle_date, uploaded_at = excluded.uploaded_at
+    WHERE (cycle_count_latest.cycle_date, cycle_count_latest.uploaded_at) <= (excluded.cycle_date, excluded.uploaded_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS cycle_counts_latest_update AFTER UPDATE ON cycle_counts
+BEGIN
+    {_SQLITE_REFRESH_LATEST.format(row="OLD", columns=_SQLITE_LATEST_COLUMNS)}
+    {_SQLITE_REFRESH_LATEST.format(row="NEW", columns=_SQLITE_LATEST_COLUMNS)}
+END;
+
+CREATE TRIGGER IF NOT EXISTS cycle_counts_latest_delete AFTER DELETE ON cycle_counts
+BEGIN
+    {_SQLITE_REFRESH_LATEST.format(row="OLD", columns=_SQLITE_LATEST_COLUMNS)}
+END;
+"""
+
+def get_storage_backend_setting(get_setting):
+    """
+    Get the configured storage backend
+    
+    The CYCLE_COUNT_BACKEND environment variable wins over app_settings.storage_backend,
+    so a load test can switch backends without editing secrets.toml.
+    
+    Args:
+        get_setting (callable): get_app_setting(name, default) from database.client
+    
+    Returns:
+        tuple: (backend name, SQLite database path); the path is only used by "sqlite"
+    """
+    backend = os.environ.get("CYCLE_COUNT_BACKEND") or get_setting("storage_backend", "supabase")
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    path = os.environ.get("CYCLE_COUNT_SQLITE_PATH") or get_setting("sqlite_path", ":memory:")
+    return backend, path
+
+def to_sqlite_ddl(ddl):
+    """
+    Translate the Postgres DDL in database/schema.py to SQLite
+    
+    Only the constructs that schema.py uses are handled: UUID/SERIAL keys, NOW()
+    and gen_random_uuid() defaults, NUMERIC/DATE/TIMESTAMP types, CREATE OR REPLACE
+    VIEW and NULLS NOT DISTINCT unique indexes.
+    
+    Args:
+        ddl (str): Postgres statements
+    
+    Returns:
+        str: SQLite statements
+    """
+    ddl = ddl.replace("gen_random_uuid()", f"({SQLITE_UUID})")
+    ddl = ddl.replace("NOW()", f"({SQLITE_NOW})")
+    ddl = re.sub(r"\bSERIAL PRIMARY KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT", ddl)
+    ddl = re.sub(r"\b(UUID|DATE|TIMESTAMP)\b", "TEXT", ddl)
+    # REAL affinity keeps integer counts from turning percent_diff into integer division
+    ddl = re.sub(r"\bNUMERIC\b", "REAL", ddl)
+    ddl = re.sub(r"CREATE OR REPLACE VIEW (\w+)", r"DROP VIEW IF EXISTS \1;\nCREATE VIEW \1", ddl)
+    
+    # SQLite unique indexes treat NULLs as distinct, so index IFNULL(col, '') instead
+    def nulls_not_distinct(match):
+        columns = ", ".join(f"IFNULL({col.strip()}, '')" for col in match.group(2).split(","))
+        return f"{match.group(1)}({columns})"
+    return re.sub(r"(ON \w+ )\(([^)]*)\) NULLS NOT DISTINCT", nulls_not_distinct, ddl)
+
+def _sql_value(value):
+    """Bind dates as ISO strings, the way PostgREST sends them"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _quote(identifier):
+    """Quote a column or table name, rejecting anything that is not a plain identifier"""
+    if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", identifier):
+        raise ValueError(f"Invalid identifier: {identifier}")
+    return f'"{identifier}"'
+
+def _split_top_level(text):
+    """Split a PostgREST list on commas outside parentheses and double quotes"""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+class BackendResponse:
+    """Result of execute(), shaped like postgrest's APIResponse"""
+    
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class StorageBackend(ABC):
+    """
+    Interface SupabaseClient needs from a database
+    
+    It is the subset of the supabase-py client that database/client.py uses:
+    table(name) returns a PostgREST-style query builder (select/insert/upsert/
+    update/delete, the eq/gte/lte/lt/gt/in_/ilike/or_ filters, order, limit,
+    range and execute), rpc(name, params) calls a database function, and
+    execute() returns an object with .data and .count. supabase.Client provides
+    it as is; other implementations subclass this and implement every method.
+    """
+    
+    @abstractmethod
+    def table(self, name):
+        """Start a query on a table or view"""
+    
+    @abstractmethod
+    def rpc(self, name, params=None):
+        """Start a call to a database function"""
+    
+    @abstractmethod
+    def add_response_hook(self, hook):
+        """
+        Call hook(nbytes, error) after every request, for SupabaseClient.metrics
+        
+        Args:
+            hook (callable): Takes the response size in bytes and an error string or None
+        """
+
+class SQLiteQuery:
+    """PostgREST-style query builder over one SQLiteBackend table"""
+    
+    def __init__(self, backend, table):
+        self.backend = backend
+        self.table_name = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.on_conflict = None
+        self.count_method = None
+        self.head = False
+        self.returning = "representation"
+        self.conditions = []
+        self.params = []
+        self.order_by = []
+        self.limit_rows = None
+        self.offset_rows = None
+    
+    # Operations
+    def select(self, *columns, count=None, head=False):
+        self.columns = ",".join(columns) if columns else "*"
+        self.count_method = count
+        self.head = head
+        return self
+    
+    def insert(self, data):
+        self.operation = "insert"
+        self.payload = data if isinstance(data, list) else [data]
+        return self
+    
+    def upsert(self, data, on_conflict=""):
+        self.operation = "upsert"
+        self.payload = data if isinstance(data, list) else [data]
+        self.on_conflict = [col.strip() for col in on_conflict.split(",") if col.strip()]
+        return self
+    
+    def update(self, data):
+        self.operation = "update"
+        self.payload = dict(data)
+        return self
+    
+    def delete(self, count=None, returning="representation"):
+        self.operation = "delete"
+        self.count_method = count
+        self.returning = returning
+        return self
+    
+    # Filters
+    def _filter(self, column, operator, value):
+        self.conditions.append(f"{_quote(column)} {operator} ?")
+        self.params.append(_sql_value(value))
+        return self
+    
+    def eq(self, column, value):
+        return self._filter(column, "=", value)
+    
+    def neq(self, column, value):
+        return self._filter(column, "!=", value)
+    
+    def gt(self, column, value):
+        return self._filter(column, ">", value)
+    
+    def gte(self, column, value):
+        return self._filter(column, ">=", value)
+    
+    def lt(self, column, value):
+        return self._filter(column, "<", value)
+    
+    def lte(self, column, value):
+        return self._filter(column, "<=", value)
+    
+    def ilike(self, column, pattern):
+        # PostgREST uses * as the wildcard; SQLite LIKE is case-insensitive for ASCII
+        self.conditions.append(f"{_quote(column)} LIKE ? ESCAPE '\\'")
+        self.params.append(pattern.replace("*", "%"))
+        return self
+    
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self.conditions.append("0")
+            return self
+        self.conditions.append(f"{_quote(column)} IN ({', '.join('?' for _ in values)})")
+        self.params.extend(_sql_value(v) for v in values)
+        return self
+    
+    def or_(self, filters):
+        sql, params = self._logic_tree("or", filters)
+        self.conditions.append(sql)
+        self.params.extend(params)
+        return self
+    
+    def _logic_tree(self, operator, filters):
+        """Compile a PostgREST or=(...)/and(...) filter list to SQL"""
+        operators = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+        clauses, params = [], []
+        for part in _split_top_level(filters):
+            nested = re.fullmatch(r"(and|or)\((.*)\)", part)
+            if nested:
+                sql, nested_params = self._logic_tree(nested.group(1), nested.group(2))
+                clauses.append(sql)
+                params.extend(nested_params)
+                continue
+            column, op, value = part.split(".", 2)
+            if op not in operators:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            clauses.append(f"{_quote(column)} {operators[op]} ?")
+            params.append(value[1:-1] if value.startswith('"') and value.endswith('"') else value)
+        return "(" + f" {operator.upper()} ".join(clauses) + ")", params
+    
+    # Modifiers
+    def order(self, column, desc=False):
+        self.order_by.append(f"{_quote(column)} {'DESC' if desc else 'ASC'}")
+        return self
+    
+    def limit(self, size):
+        self.limit_rows = size
+        return self
+    
+    def range(self, start, end):
+        self.offset_rows = start
+        self.limit_rows = end - start + 1
+        return self
+    
+    # Execution
+    def _where(self):
+        return f" WHERE {' AND '.join(self.conditions)}" if self.conditions else ""
+    
+    def _select_list(self):
+        """Split the select string into SQL columns and embedded tables"""
+        columns, embeds = [], []
+        for part in _split_top_level(self.columns):
+            embed = re.fullmatch(r"(\w+)\((.*)\)", part)
+            if embed:
+                embeds.append(embed.group(1))
+            else:
+                columns.append("*" if part == "*" else _quote(part))
+        return ", ".join(columns) or "*", embeds
+    
+    def execute(self):
+        return self.backend.run(getattr(self, f"_execute_{self.operation}"))
+    
+    def _execute_select(self, connection):
+        where = self._where()
+        count = None
+        if self.count_method:
+            # Every count method is exact here; SQLite has no planner estimate to offer
+            count = connection.execute(
+                f"SELECT COUNT(*) FROM {_quote(self.table_name)}{where}", self.params).fetchone()[0]
+        if self.head:
+            return BackendResponse([], count)
+        
+        select_list, embeds = self._select_list()
+        sql = f"SELECT {select_list} FROM {_quote(self.table_name)}{where}"
+        if self.order_by:
+            sql += f" ORDER BY {', '.join(self.order_by)}"
+        if self.limit_rows is not None or self.offset_rows:
+            sql += f" LIMIT {int(self.limit_rows if self.limit_rows is not None else -1)}"
+            sql += f" OFFSET {int(self.offset_rows or 0)}"
+        rows = [dict(row) for row in connection.execute(sql, self.params)]
+        
+        for embedded in embeds:
+            foreign_key = SQLITE_EMBEDS[(self.table_name, embedded)]
+            related = {row["id"]: dict(row) for row in connection.execute(f"SELECT * FROM {_quote(embedded)}")}
+            for row in rows:
+                row[embedded] = related.get(row.get(foreign_key))
+        return BackendResponse(rows, count)
+    
+    def _execute_insert(self, connection):
+        rows = []
+        for record in self.payload:
+            columns = [_quote(col) for col in record]
+            sql = (f"INSERT INTO {_quote(self.table_name)} ({', '.join(columns)}) "
+                   f"VALUES ({', '.join('?' for _ in columns)}) RETURNING *")
+            rows.extend(dict(row) for row in connection.execute(sql, [_sql_value(v) for v in record.values()]))
+        return BackendResponse(rows)
+    
+    def _execute_upsert(self, connection):
+        target = self.backend.conflict_target(self.table_name, self.on_conflict)
+        updated_at = SQLITE_UPDATED_AT_COLUMNS.get(self.table_name)
+        rows = []
+        for record in self.payload:
+            columns = [_quote(col) for col in record]
+            assignments = [f"{col} = excluded.{col}" for col in columns]
+            if updated_at and updated_at not in record:
+                assignments.append(f"{_quote(updated_at)} = {SQLITE_NOW}")
+            sql = (f"INSERT INTO {_quote(self.table_name)} ({', '.join(columns)}) "
+                   f"VALUES ({', '.join('?' for _ in columns)}) "
+                   f"ON CONFLICT ({target}) DO UPDATE SET {', '.join(assignments)} RETURNING *")
+            rows.extend(dict(row) for row in connection.execute(sql, [_sql_value(v) for v in record.values()]))
+        return BackendResponse(rows)
+    
+    def _execute_update(self, connection):
+        assignments = [f"{_quote(col)} = ?" for col in self.payload]
+        params = [_sql_value(v) for v in self.payload.values()]
+        updated_at = SQLITE_UPDATED_AT_COLUMNS.get(self.table_name)
+        if updated_at and updated_at not in self.payload:
+            assignments.append(f"{_quote(updated_at)} = {SQLITE_NOW}")
+        sql = f"UPDATE {_quote(self.table_name)} SET {', '.join(assignments)}{self._where()} RETURNING *"
+        return BackendResponse([dict(row) for row in connection.execute(sql, params + self.params)])
+    
+    def _execute_delete(self, connection):
+        sql = f"DELETE FROM {_quote(self.table_name)}{self._where()} RETURNING *"
+        rows = [dict(row) for row in connection.execute(sql, self.params)]
+        count = len(rows) if self.count_method else None
+        return BackendResponse([] if self.returning == "minimal" else rows, count)
+
+class SQLiteRPC:
+    """Database function call on a SQLiteBackend"""
+    
+    def __init__(self, backend, name, params):
+        self.backend = backend
+        self.name = name
+        self.params = params or {}
+    
+    def execute(self):
+        if self.name != CYCLE_COUNT_SUMMARY_FUNCTION:
+            raise ValueError(f"Unknown function: {self.name}")
+        return self.backend.run(self._cycle_count_summary)
+    
+    def _cycle_count_summary(self, connection):
+        """Same result as CREATE_CYCLE_COUNT_SUMMARY_FUNCTION"""
+        now = datetime.utcnow()
+        row = connection.execute(
+            """
+            SELECT COUNT(*) AS total_items,
+                   COUNT(DISTINCT customer) AS total_customers,
+                   COUNT(DISTINCT uploaded_by) AS total_users,
+                   COALESCE(SUM(uploaded_at >= :week), 0) AS items_last_week,
+                   COALESCE(SUM(uploaded_at >= :month), 0) AS items_last_month,
+                   COALESCE(SUM(variance), 0) AS total_variance,
+                   AVG(variance) AS mean_variance
+            FROM cycle_counts
+            WHERE (:warehouse_id IS NULL OR warehouse_id = :warehouse_id)
+              AND (:customer IS NULL OR customer = :customer)
+            """,
+            {
+                "week": (now - timedelta(days=7)).isoformat(),
+                "month": (now - timedelta(days=30)).isoformat(),
+                "warehouse_id": self.params.get("p_warehouse_id"),
+                "customer": self.params.get("p_customer")
+            }
+        ).fetchone()
+        return BackendResponse(dict(row))
+
+class SQLiteBackend(StorageBackend):
+    """
+    Local SQLite stand-in for Supabase, for load tests and benchmarks
+    
+    Creates the tables, views and indexes from database/schema.py (translated by
+    to_sqlite_ddl) and answers the same PostgREST-style queries. Postgres-only
+    pieces are replaced: the plpgsql triggers keeping cycle_count_latest current
+    are rewritten for SQLite, updated_at is set by the update statements
+    themselves, trigram indexes are skipped and count methods are always exact. One connection is shared by
+    every thread and statements run one at a time, each multi-row write in its
+    own transaction, like a PostgREST request.
+    """
+    
+    def __init__(self, path=":memory:"):
+        """
+        Args:
+            path (str): Database file, or ":memory:" for a throwaway database
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._hooks = []
+        self._conflict_targets = {}
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode = WAL")
+        self.create_schema()
+    
+    def create_schema(self):
+        """Run the schema.py DDL (idempotent, every statement is IF NOT EXISTS)"""
+        indexes = [ddl.format(concurrently="") for name, ddl in CYCLE_COUNTS_INDEXES.items()
+                   if not name.endswith("_trgm_idx")]
+        statements = [
+            CREATE_WAREHOUSES_TABLE, CREATE_USERS_TABLE, CREATE_CYCLE_COUNTS_TABLE,
+            CREATE_CYCLE_COUNTS_NATURAL_KEY_INDEX, CREATE_CYCLE_COUNT_CUSTOMERS_VIEW,
+            CREATE_CYCLE_COUNT_LATEST_TABLE, *indexes
+        ]
+        natural_key = re.search(r"\(([^)]*)\) NULLS NOT DISTINCT", CREATE_CYCLE_COUNTS_NATURAL_KEY_INDEX)
+        key_columns = tuple(col.strip() for col in natural_key.group(1).split(","))
+        with self._lock:
+            # Rebuild a natural key index from before warehouse_id joined the key; the
+            # old key was stricter, so existing rows cannot collide under the new one
+            existing = self.connection.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'cycle_counts_natural_key'").fetchone()
+            if existing and not all(col in existing["sql"] for col in key_columns):
+                self.connection.execute("DROP INDEX cycle_counts_natural_key")
+            
+            self.connection.executescript(
+                "\n".join(to_sqlite_ddl(ddl) for ddl in statements) + CREATE_SQLITE_CYCLE_COUNT_LATEST_TRIGGERS)
+        
+        # Natural-key upserts must name the index expressions, not the bare columns
+        self._conflict_targets[(CYCLE_COUNTS_TABLE, key_columns)] = ", ".join(
+            f"IFNULL({_quote(col)}, '')" for col in key_columns)
+    
+    def conflict_target(self, table, columns):
+        """SQL conflict target for an upsert's on_conflict columns"""
+        columns = tuple(columns)
+        return self._conflict_targets.get((table, columns), ", ".join(_quote(col) for col in columns))
+    
+    def run(self, statement):
+        """
+        Run statement(connection) in one transaction and report it to the response hooks
+        
+        Args:
+            statement (callable): Takes the connection and returns a BackendResponse
+        """
+        error = None
+        try:
+            with self._lock:
+                self.connection.execute("BEGIN")
+                try:
+                    response = statement(self.connection)
+                except Exception:
+                    self.connection.execute("ROLLBACK")
+                    raise
+                self.connection.execute("COMMIT")
+            return response
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            # No wire format, so there are no bytes to report, only the request
+            for hook in self._hooks:
+                hook(0, error)
+    
+    def table(self, name):
+        return SQLiteQuery(self, name)
+    
+    def rpc(self, name, params=None):
+        return SQLiteRPC(self, name, params)
+    
+    def add_response_hook(self, hook):
+        self._hooks.append(hook)
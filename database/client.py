@@ -1,17 +1,392 @@
 import streamlit as st
+import logging
+import sqlite3
+import threading
+import time
+from cachetools import LRUCache, TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from postgrest.exceptions import APIError
 from supabase import create_client
+from database.snapshot import CycleCountSnapshot
+from database.analytics import CycleCountAnalytics
+from database.backends import StorageBackend, SQLiteBackend, get_storage_backend_setting
+from database.instrumentation import QueryMetrics, instrument_methods, METRICS_BUFFER_SIZE
+from database.settings import get_app_setting
 from database.schema import (
-    CYCLE_COUNTS_TABLE, WAREHOUSES_TABLE, USERS_TABLE,
-    CYCLE_COUNTS_COLUMNS, WAREHOUSES_COLUMNS, USERS_COLUMNS
+    CYCLE_COUNTS_TABLE, WAREHOUSES_TABLE, USERS_TABLE, CYCLE_COUNT_CUSTOMERS_VIEW,
+    CYCLE_COUNT_SUMMARY_FUNCTION, CYCLE_COUNT_LATEST_TABLE,
+    CYCLE_COUNTS_COLUMNS, WAREHOUSES_COLUMNS, USERS_COLUMNS,
+    CYCLE_COUNTS_PROJECTIONS, CYCLE_COUNTS_NATURAL_KEY, CYCLE_COUNTS_GENERATED_COLUMNS
 )
 
+logger = logging.getLogger(__name__)
+
+# PostgREST accepts a JSON array per insert; keep each request body reasonably small
+INSERT_CHUNK_SIZE = 500
+
+# Record IDs go into the query string of a bulk delete, so keep each id list well
+# under common URL length limits (a UUID is 36 characters)
+DELETE_CHUNK_SIZE = 200
+
+# Supabase returns at most 1000 rows per request
+PAGE_SIZE = 1000
+
+# Default number of concurrent page fetches for full-table loads,
+# overridable with app_settings.fetch_workers in secrets.toml
+FETCH_WORKERS = 4
+
+# Each worker gets several uploaded_at slices so uneven slices still balance out
+SLICES_PER_WORKER = 4
+
+# Shared read cache defaults, overridable with app_settings.read_cache_ttl (seconds)
+# and app_settings.read_cache_max_rows in secrets.toml
+READ_CACHE_TTL = 300
+READ_CACHE_MAX_ROWS = 250000
+
+# Exact row counts are cached per filter combination until the next write
+COUNT_CACHE_MAX_ENTRIES = 1000
+
+# PostgREST count methods: "exact" scans every matching row, "planned" is the query
+# planner's estimate, and "estimated" is exact up to the server's max-rows setting
+# (Supabase default: PAGE_SIZE) and planned above it
+COUNT_MODES = ("exact", "planned", "estimated")
+
+# Warehouses and users change a few times a month; overridable with
+# app_settings.lookup_cache_ttl (seconds)
+LOOKUP_CACHE_TTL = 600
+
+# Local snapshot sync intervals (seconds), used when app_settings.snapshot_path is set;
+# overridable with app_settings.snapshot_refresh_seconds / snapshot_id_diff_seconds
+SNAPSHOT_REFRESH_SECONDS = 60
+SNAPSHOT_ID_DIFF_SECONDS = 3600
+
+# SQLSTATE classes of errors caused by the values in a row: 22 is a data exception
+# (bad date, number out of range) and 23 an integrity constraint violation
+ROW_ERROR_SQLSTATE_CLASSES = ("22", "23")
+
+def _freeze(value):
+    """Turn filter values (lists, dicts, dates) into something hashable for cache keys"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items() if v is not None))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+class ReadCache:
+    """
+    Process-wide TTL cache for cycle count reads, shared by every session
+    
+    Entries are keyed on the query parameters and weighted by row count so the
+    cache stays size-bounded. Concurrent misses on the same key wait for a single
+    load instead of all hitting Supabase. Cached lists are shared between
+    sessions and must be treated as read-only.
+    """
+    
+    def __init__(self, ttl=READ_CACHE_TTL, max_rows=READ_CACHE_MAX_ROWS):
+        self._cache = TTLCache(maxsize=max_rows, ttl=ttl, getsizeof=self._weight)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        # Bumped by clear(), so loads that started before a write are not cached after it
+        self._generation = 0
+    
+    @staticmethod
+    def _weight(value):
+        return len(value) if isinstance(value, list) else 1
+    
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for key, calling loader() to fill it on a miss
+        
+        Exceptions from loader() propagate and nothing is cached. A value loaded
+        while clear() ran is returned but not cached, since it may predate the write.
+        """
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            with self._lock:
+                if key in self._cache:
+                    return self._cache[key]
+                generation = self._generation
+            
+            try:
+                value = loader()
+                
+                with self._lock:
+                    if generation == self._generation:
+                        try:
+                            self._cache[key] = value
+                        except ValueError:
+                            pass  # Larger than the whole cache; serve it uncached
+                return value
+            finally:
+                with self._lock:
+                    # A later miss may already have registered a newer lock for this key
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+    
+    def clear(self):
+        """Drop every cached entry, including loads still in progress"""
+        with self._lock:
+            self._cache.clear()
+            self._generation += 1
+
+class LookupTable:
+    """
+    Process-wide copy of a small reference table (warehouses, users)
+    
+    The whole table is loaded at once and indexed by id and by a unique name
+    column. It reloads after the TTL or when invalidated by a write. Rows are
+    shared between sessions and must be treated as read-only.
+    """
+    
+    def __init__(self, loader, name_column, ttl=LOOKUP_CACHE_TTL):
+        """
+        Args:
+            loader (callable): Returns every row of the table
+            name_column (str): Unique column indexed next to id, e.g. "name" or "username"
+            ttl (float): Seconds before the table is reloaded
+        """
+        self.loader = loader
+        self.name_column = name_column
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._rows = []
+        self._by_id = {}
+        self._by_name = {}
+    
+    def _ensure_loaded(self):
+        """Reload the table if it was never loaded, has expired or was invalidated"""
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            
+            # Exceptions from the loader propagate and keep the previous state
+            rows = self.loader()
+            self._rows = rows
+            self._by_id = {row["id"]: row for row in rows}
+            self._by_name = {row[self.name_column]: row for row in rows if row.get(self.name_column) is not None}
+            self._loaded_at = time.monotonic()
+    
+    def all(self):
+        """Return every row"""
+        self._ensure_loaded()
+        return self._rows
+    
+    def get_by_id(self, row_id):
+        """Return the row with this id, or None"""
+        self._ensure_loaded()
+        return self._by_id.get(row_id)
+    
+    def get_by_name(self, name):
+        """Return the row whose name column equals name, or None"""
+        self._ensure_loaded()
+        return self._by_name.get(name)
+    
+    def invalidate(self):
+        """Reload on the next read"""
+        with self._lock:
+            self._loaded_at = None
+
+def writable_fields(record):
+    """
+    Drop the columns the database computes itself (variance, percent_diff) from a payload
+    
+    Args:
+        record (dict): Cycle count fields to write
+    
+    Returns:
+        dict: A copy without CYCLE_COUNTS_GENERATED_COLUMNS
+    """
+    return {k: v for k, v in record.items() if k not in CYCLE_COUNTS_GENERATED_COLUMNS}
+
+def is_row_error(error):
+    """
+    Tell whether a write failed because of the rows it sent
+    
+    Connection failures, timeouts, auth and server errors would fail any retry as
+    well, so only data and constraint errors are worth narrowing down to a row.
+    
+    Args:
+        error (Exception): Exception raised by a write request
+    
+    Returns:
+        bool: True for a PostgREST data or constraint error, or a SQLite constraint error
+    """
+    if isinstance(error, APIError):
+        return str(error.code or "")[:2] in ROW_ERROR_SQLSTATE_CLASSES
+    return isinstance(error, sqlite3.IntegrityError)
+
+def resolve_columns(columns=None, required=()):
+    """
+    Turn a projection name or column list into a PostgREST select string
+    
+    Args:
+        columns (str | list, optional): A CYCLE_COUNTS_PROJECTIONS name, a list of
+            column names, or None for every column
+        required (tuple): Columns that must always be selected (e.g. pagination keys)
+    
+    Returns:
+        str: Comma separated column list, or "*"
+    """
+    if columns is None:
+        return "*"
+    
+    if isinstance(columns, str):
+        if columns not in CYCLE_COUNTS_PROJECTIONS:
+            raise ValueError(f"Unknown cycle count projection: {columns}")
+        columns = CYCLE_COUNTS_PROJECTIONS[columns]
+    
+    selected = list(columns)
+    for col in required:
+        if col not in selected:
+            selected.append(col)
+    return ",".join(selected)
+
+def ilike_pattern(text):
+    """
+    Build a case-insensitive "contains" pattern for a PostgREST ilike filter
+    
+    Args:
+        text (str): Text typed by the user
+    
+    Returns:
+        str: Pattern with LIKE wildcards in the text escaped
+    """
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"*{escaped}*"
+
+def apply_cycle_count_filters(query, customer=None, date_from=None, date_to=None, warehouse_id=None,
+                              uploaded_by=None, item_search=None, location_search=None):
+    """
+    Apply the dashboard filters to a cycle_counts query
+    
+    Args:
+        query: PostgREST query builder for the cycle_counts table
+        customer (str, optional): Customer name to filter by
+        date_from (date, optional): Start cycle date (inclusive)
+        date_to (date, optional): End cycle date (inclusive)
+        warehouse_id (int, optional): Warehouse ID to filter by
+        uploaded_by (str | list, optional): Uploader user ID, or list of IDs
+        item_search (str, optional): Case-insensitive partial match on item_id
+        location_search (str, optional): Case-insensitive partial match on location
+    
+    Returns:
+        The filtered query builder
+    """
+    if customer:
+        query = query.eq(CYCLE_COUNTS_COLUMNS["customer"], customer)
+    
+    if date_from:
+        query = query.gte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_from.isoformat())
+    if date_to:
+        query = query.lte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_to.isoformat())
+    
+    if warehouse_id:
+        query = query.eq(CYCLE_COUNTS_COLUMNS["warehouse_id"], warehouse_id)
+    
+    if uploaded_by:
+        if isinstance(uploaded_by, (list, tuple, set)):
+            query = query.in_(CYCLE_COUNTS_COLUMNS["uploaded_by"], list(uploaded_by))
+        else:
+            query = query.eq(CYCLE_COUNTS_COLUMNS["uploaded_by"], uploaded_by)
+    
+    if item_search:
+        query = query.ilike(CYCLE_COUNTS_COLUMNS["item_id"], ilike_pattern(item_search))
+    if location_search:
+        query = query.ilike(CYCLE_COUNTS_COLUMNS["location"], ilike_pattern(location_search))
+    
+    return query
+
+def get_session_warehouse_scope():
+    """
+    Get the warehouse that cycle count reads must be limited to for the current session
+    
+    Managers only ever see their own warehouse; admins are not scoped. Must be
+    called from the Streamlit script thread, not from fetch worker threads.
+    
+    Returns:
+        int: The manager's warehouse ID, or None when reads are not scoped
+    """
+    if st.session_state.get("role") == "manager":
+        return st.session_state.get("warehouse_id")
+    return None
+
+def scope_filters(filters=None):
+    """
+    Force the session's warehouse scope onto a set of cycle count filters
+    
+    Args:
+        filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+    
+    Returns:
+        dict: A copy of the filters with warehouse_id overridden for manager sessions
+    """
+    scoped = dict(filters or {})
+    warehouse_id = get_session_warehouse_scope()
+    if warehouse_id:
+        scoped["warehouse_id"] = warehouse_id
+    return scoped
+
+@instrument_methods
 class SupabaseClient:
     _instance = None
     supabase = None
+    snapshot = None
+    analytics = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(SupabaseClient, cls).__new__(cls)
+            cls._instance.read_cache = ReadCache(
+                ttl=float(get_app_setting("read_cache_ttl", READ_CACHE_TTL)),
+                max_rows=int(get_app_setting("read_cache_max_rows", READ_CACHE_MAX_ROWS))
+            )
+            
+            # Exact counts are a full scan, so keep them until a write invalidates them
+            cls._instance.count_cache = LRUCache(maxsize=COUNT_CACHE_MAX_ENTRIES)
+            cls._instance.count_lock = threading.Lock()
+            
+            # Timings of every public method, shown in the admin Performance panel
+            cls._instance.metrics = QueryMetrics(
+                maxlen=int(get_app_setting("metrics_buffer_size", METRICS_BUFFER_SIZE)))
+            
+            # Small reference tables read on nearly every rerun
+            lookup_ttl = float(get_app_setting("lookup_cache_ttl", LOOKUP_CACHE_TTL))
+            cls._instance.warehouse_lookup = LookupTable(
+                cls._instance._load_warehouses, WAREHOUSES_COLUMNS["name"], ttl=lookup_ttl)
+            cls._instance.user_lookup = LookupTable(
+                cls._instance._load_users, USERS_COLUMNS["username"], ttl=lookup_ttl)
+            
+            # Optional local Parquet snapshot that cycle count reads are served from
+            cls._instance.snapshot = None
+            snapshot_path = get_app_setting("snapshot_path", None)
+            if snapshot_path:
+                cls._instance.snapshot = CycleCountSnapshot(
+                    snapshot_path,
+                    refresh_seconds=float(get_app_setting("snapshot_refresh_seconds", SNAPSHOT_REFRESH_SECONDS)),
+                    id_diff_seconds=float(get_app_setting("snapshot_id_diff_seconds", SNAPSHOT_ID_DIFF_SECONDS))
+                )
+            
+            # Optional embedded SQL engine over the snapshot for dashboard aggregates
+            cls._instance.analytics = None
+            if cls._instance.snapshot and get_app_setting("analytics_engine", None) == "duckdb":
+                try:
+                    cls._instance.analytics = CycleCountAnalytics(cls._instance.snapshot)
+                except ImportError as e:
+                    st.warning(f"Analytics engine disabled: {str(e)}")
+            
+            # Local SQLite stand-in instead of Supabase, e.g. for load tests
+            backend, sqlite_path = get_storage_backend_setting(get_app_setting)
+            if backend == "sqlite":
+                cls._instance.supabase = SQLiteBackend(sqlite_path)
+                cls._instance._attach_metrics_hook()
+                return cls._instance
+            
             try:
                 # Add logging to check if secrets exist
                 if "supabase" not in st.secrets:
@@ -36,12 +411,40 @@ class SupabaseClient:
                 
                 # Initialize client
                 cls._instance.supabase = create_client(supabase_url, supabase_key)
+                cls._instance._attach_metrics_hook()
             except Exception as e:
                 import traceback
                 st.code(traceback.format_exc())
                 cls._instance.supabase = None
         return cls._instance
     
+    def _attach_metrics_hook(self):
+        """Count the pages and bytes of every backend response in self.metrics"""
+        if isinstance(self.supabase, StorageBackend):
+            self.supabase.add_response_hook(self.metrics.record_page)
+            return
+        
+        session = self.supabase.postgrest.session
+        hooks = session.event_hooks
+        session.event_hooks = {**hooks, "response": hooks.get("response", []) + [self.metrics.on_response]}
+    
+    def invalidate_read_cache(self, deleted=False):
+        """
+        Drop every cached cycle count read
+        
+        Called by every cycle count write so all sessions see the change on their next rerun.
+        Deletes by id drop the rows from the snapshot themselves (CycleCountSnapshot.discard).
+        
+        Args:
+            deleted (bool): The write deleted rows the caller cannot list, which the snapshot
+                only sees by diffing ids
+        """
+        self.read_cache.clear()
+        with self.count_lock:
+            self.count_cache.clear()
+        if self.snapshot:
+            self.snapshot.mark_stale(deleted=deleted)
+    
     # Cycle Counts methods
     def insert_cycle_count(self, data):
         """
@@ -58,21 +461,422 @@ class SupabaseClient:
             return None
             
         try:
-            response = self.supabase.table(CYCLE_COUNTS_TABLE).insert(data).execute()
+            response = self.supabase.table(CYCLE_COUNTS_TABLE).insert(writable_fields(data)).execute()
             
             if hasattr(response, 'data') and response.data:
                 return response.data[0]
             return None
         except Exception as e:
             raise
+        finally:
+            self.invalidate_read_cache()
+    
+    def insert_cycle_counts(self, records, chunk_size=INSERT_CHUNK_SIZE, progress_callback=None):
+        """
+        Insert many cycle count records, sending each chunk as one request
+        
+        When a chunk is rejected because of its data it is split up and retried, so
+        only the rows the database rejects on their own are skipped and reported. Any
+        other failure (connection, timeout, server error) stops the import and the
+        rows from the failed request onward are reported as not imported.
+        
+        Args:
+            records (list): List of cycle count dictionaries
+            chunk_size (int): Number of records sent per insert request
+            progress_callback (callable, optional): Called with (rows_done, total_rows) after each chunk
+        
+        Returns:
+            dict: {"inserted": list of inserted records,
+                   "errors": list of {"rows": (first_row, last_row), "error": str}}
+                  Row numbers are 1-based positions in ``records``.
+        """
+        result = {"inserted": [], "errors": []}
+        
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return result
+        
+        total = len(records)
+        chunk_size = max(1, int(chunk_size))
+        
+        for start in range(0, total, chunk_size):
+            chunk = [writable_fields(record) for record in records[start:start + chunk_size]]
+            completed = self._insert_isolating_errors(chunk, start + 1, result)
+            
+            if not completed:
+                failed_to = result["errors"][-1]["rows"][1]
+                if failed_to < total:
+                    result["errors"].append({
+                        "rows": (failed_to + 1, total),
+                        "error": "Not sent: the import stopped at the previous error"
+                    })
+                break
+            
+            if progress_callback:
+                progress_callback(start + len(chunk), total)
+        
+        self.invalidate_read_cache()
+        return result
+    
+    def _insert_isolating_errors(self, rows, first_row, result):
+        """
+        Insert rows in one request; if it fails, retry each half until the bad rows are isolated
+        
+        A bad row fails its whole request, so the rows around it are retried without
+        it and only the rows that fail on their own are reported. Consecutive failed
+        rows with the same error are reported as one range. Errors that are not about
+        the rows (see is_row_error) are not retried: the whole request is reported as
+        failed once and the insert stops.
+        
+        Args:
+            rows (list): Cycle count payloads
+            first_row (int): 1-based position of rows[0] in the caller's records
+            result (dict): insert_cycle_counts() result to add inserted records and errors to
+        
+        Returns:
+            bool: False if the insert stopped on an error that is not about the rows
+        """
+        try:
+            response = self.supabase.table(CYCLE_COUNTS_TABLE).insert(rows).execute()
+            
+            if hasattr(response, 'data') and response.data:
+                result["inserted"].extend(response.data)
+            return True
+        except Exception as e:
+            if not is_row_error(e):
+                result["errors"].append({"rows": (first_row, first_row + len(rows) - 1), "error": str(e)})
+                return False
+            if len(rows) > 1:
+                middle = len(rows) // 2
+                return (self._insert_isolating_errors(rows[:middle], first_row, result)
+                        and self._insert_isolating_errors(rows[middle:], first_row + middle, result))
+            error = str(e)
+        
+        errors = result["errors"]
+        if errors and errors[-1]["rows"][1] == first_row - 1 and errors[-1]["error"] == error:
+            errors[-1]["rows"] = (errors[-1]["rows"][0], first_row)
+        else:
+            errors.append({"rows": (first_row, first_row), "error": error})
+        return True
+    
+    def upsert_cycle_counts(self, records, chunk_size=INSERT_CHUNK_SIZE, progress_callback=None):
+        """
+        Insert or update many cycle count records by natural key, sending each chunk as one request
+        
+        Records matching an existing row on CYCLE_COUNTS_NATURAL_KEY update it in place
+        (needs CREATE_CYCLE_COUNTS_NATURAL_KEY_INDEX), the rest are inserted. The database
+        keeps or generates the id. uploaded_at is never written: new rows get the database
+        default and updated rows keep their original upload time (updated_at records the
+        change). In manager sessions every record is written to the manager's warehouse.
+        
+        Args:
+            records (list): List of cycle count dictionaries
+            chunk_size (int): Number of records sent per upsert request
+            progress_callback (callable, optional): Called with (rows_done, total_rows) after each chunk
+        
+        Returns:
+            dict: {"outcomes": one {"status", "id", "error"} per record, in order, where status
+                   is "inserted", "updated", "duplicate" (superseded by a later record with
+                   the same key) or "error",
+                   "errors": list of {"rows": (first_row, last_row), "error": str}}
+                  Row numbers are 1-based positions in ``records``.
+        """
+        outcomes = [{"status": "error", "id": None, "error": None} for _ in records]
+        result = {"outcomes": outcomes, "errors": []}
+        
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return result
+        
+        key_columns = [CYCLE_COUNTS_COLUMNS[col] for col in CYCLE_COUNTS_NATURAL_KEY]
+        
+        def row_key(row):
+            return tuple(None if row.get(col) is None else str(row.get(col)) for col in key_columns)
+        
+        excluded = {CYCLE_COUNTS_COLUMNS["id"], CYCLE_COUNTS_COLUMNS["uploaded_at"], *CYCLE_COUNTS_GENERATED_COLUMNS}
+        
+        # Managers may only write within their own warehouse; with warehouse_id in the
+        # natural key, their records can then only ever match their own rows
+        scope = get_session_warehouse_scope()
+        payloads = []
+        for record in records:
+            payload = {k: v for k, v in record.items() if k not in excluded}
+            if scope:
+                payload[CYCLE_COUNTS_COLUMNS["warehouse_id"]] = scope
+            payloads.append(payload)
+        
+        # One statement cannot update the same row twice, so the last record per key wins
+        last_position = {}
+        for position, payload in enumerate(payloads):
+            last_position[row_key(payload)] = position
+        positions = sorted(last_position.values())
+        for position in set(range(len(records))) - set(positions):
+            outcomes[position]["status"] = "duplicate"
+        
+        total = len(records)
+        chunk_size = max(1, int(chunk_size))
+        
+        for start in range(0, len(positions), chunk_size):
+            chunk_positions = positions[start:start + chunk_size]
+            rows_done = chunk_positions[-1] + 1
+            try:
+                response = self.supabase.table(CYCLE_COUNTS_TABLE).upsert(
+                    [payloads[i] for i in chunk_positions], on_conflict=",".join(key_columns)
+                ).execute()
+                
+                returned = {row_key(row): row for row in (response.data or [])}
+                for i in chunk_positions:
+                    row = returned.get(row_key(payloads[i]))
+                    if row is None:
+                        outcomes[i]["error"] = "Record missing from the upsert response"
+                        continue
+                    # Inserted rows get uploaded_at and updated_at from the same NOW()
+                    inserted = row.get(CYCLE_COUNTS_COLUMNS["uploaded_at"]) == row.get(CYCLE_COUNTS_COLUMNS["updated_at"])
+                    outcomes[i]["status"] = "inserted" if inserted else "updated"
+                    outcomes[i]["id"] = row.get(CYCLE_COUNTS_COLUMNS["id"])
+            except Exception as e:
+                # A bad row fails its whole chunk; keep going so the rest of the file lands
+                for i in chunk_positions:
+                    outcomes[i]["error"] = str(e)
+                result["errors"].append({
+                    "rows": (chunk_positions[0] + 1, chunk_positions[-1] + 1),
+                    "error": str(e)
+                })
+            
+            if progress_callback:
+                progress_callback(min(rows_done, total), total)
+        
+        self.invalidate_read_cache()
+        return result
+    
+    def iter_cycle_count_pages(self, page_size=PAGE_SIZE, uploaded_from=None, uploaded_before=None,
+                               columns=None, filters=None):
+        """
+        Yield cycle count records page by page using keyset pagination
+        
+        Rows are ordered by (uploaded_at, id) and each page asks for rows after
+        the last key seen, so no up-front count or OFFSET scan is needed.
+        
+        Args:
+            page_size (int): Number of records per page (Supabase caps this at 1000)
+            uploaded_from (str, optional): Only rows with uploaded_at >= this ISO timestamp
+            uploaded_before (str, optional): Only rows with uploaded_at < this ISO timestamp
+            columns (str | list, optional): Projection name or column list, None for all columns
+            filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+        
+        Yields:
+            list: One page of cycle count records
+        """
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return
+        
+        yield from self._iter_cycle_count_pages(page_size, uploaded_from, uploaded_before,
+                                                columns, scope_filters(filters))
+    
+    def _iter_cycle_count_pages(self, page_size=PAGE_SIZE, key_from=None, key_before=None,
+                                columns=None, filters=None, key_column=CYCLE_COUNTS_COLUMNS["uploaded_at"]):
+        """
+        Keyset pagination worker behind iter_cycle_count_pages
+        
+        Pages are ordered by (key_column, id); key_from/key_before bound key_column.
+        Applies the filters exactly as given, without the session warehouse scope,
+        so it is safe to call from fetch worker threads.
+        """
+        id_col = CYCLE_COUNTS_COLUMNS["id"]
+        select_columns = resolve_columns(columns, required=(key_column, id_col))
+        last_seen = None
+        
+        while True:
+            # Build a fresh query per page; filter builders accumulate params
+            query = (
+                self.supabase.table(CYCLE_COUNTS_TABLE)
+                .select(select_columns)
+                .order(key_column)
+                .order(id_col)
+                .limit(page_size)
+            )
+            
+            query = apply_cycle_count_filters(query, **(filters or {}))
+            
+            if key_from:
+                query = query.gte(key_column, key_from)
+            if key_before:
+                query = query.lt(key_column, key_before)
+            
+            if last_seen:
+                last_key, last_id = last_seen
+                query = query.or_(
+                    f'{key_column}.gt."{last_key}",'
+                    f'and({key_column}.eq."{last_key}",{id_col}.gt.{last_id})'
+                )
+            
+            response = query.execute()
+            
+            if not hasattr(response, 'data') or not response.data:
+                return  # No more data
+            
+            yield response.data
+            
+            if len(response.data) < page_size:
+                return  # Less than a full page means we're at the end
+            
+            last_row = response.data[-1]
+            last_seen = (last_row[key_column], last_row[id_col])
+    
+    def iter_cycle_count_changes(self, updated_since=None, columns=None, page_size=PAGE_SIZE):
+        """
+        Yield pages of every cycle count inserted or edited since a point in time
+        
+        Used by the local snapshot sync. Reads are NOT scoped to the session's
+        warehouse, so these rows must never be shown to a user directly.
+        
+        Args:
+            updated_since (str, optional): ISO timestamp; only rows with updated_at >= this
+            columns (str | list, optional): Projection name or column list, None for all columns
+            page_size (int): Number of records per page
+        
+        Yields:
+            list: One page of cycle count records, ordered by (updated_at, id)
+        """
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return
+        
+        yield from self._iter_cycle_count_pages(page_size, key_from=updated_since, columns=columns,
+                                                key_column=CYCLE_COUNTS_COLUMNS["updated_at"])
+    
+    def get_fetch_workers(self):
+        """
+        Get the number of concurrent page fetches used for full-table loads
+        
+        Returns:
+            int: Worker count from app_settings.fetch_workers, or FETCH_WORKERS
+        """
+        try:
+            return max(1, int(get_app_setting("fetch_workers", FETCH_WORKERS)))
+        except (TypeError, ValueError):
+            return FETCH_WORKERS
+    
+    def _get_uploaded_at_bounds(self, filters=None):
+        """
+        Get the oldest and newest uploaded_at values in the cycle counts table
+        
+        Args:
+            filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+        
+        Returns:
+            tuple: (oldest, newest) as datetime objects, or (None, None) if the table is empty
+        """
+        uploaded_at_col = CYCLE_COUNTS_COLUMNS["uploaded_at"]
+        bounds = []
+        
+        for desc in (False, True):
+            query = self.supabase.table(CYCLE_COUNTS_TABLE).select(uploaded_at_col)
+            query = apply_cycle_count_filters(query, **(filters or {}))
+            response = query.order(uploaded_at_col, desc=desc).limit(1).execute()
+            if not hasattr(response, 'data') or not response.data:
+                return None, None
+            bounds.append(datetime.fromisoformat(response.data[0][uploaded_at_col]))
+        
+        return bounds[0], bounds[1]
+    
+    def get_all_cycle_counts_parallel(self, max_workers=None, columns=None, filters=None):
+        """
+        Get all cycle count records by fetching uploaded_at slices concurrently
+        
+        The uploaded_at span is split into disjoint slices, each slice is paged
+        with keyset pagination on a bounded thread pool, and the slices are
+        stitched back together in time order, so the result is ordered by
+        (uploaded_at, id) exactly like a serial load.
+        
+        Args:
+            max_workers (int, optional): Size of the thread pool, defaults to get_fetch_workers()
+            columns (str | list, optional): Projection name or column list, None for all columns
+            filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+        
+        Returns:
+            list: List of cycle count records
+        """
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return []
+        
+        filters = scope_filters(filters)
+        max_workers = max_workers or self.get_fetch_workers()
+        oldest, newest = self._get_uploaded_at_bounds(filters)
+        if oldest is None:
+            return []
+        
+        slice_count = max_workers * SLICES_PER_WORKER
+        step = (newest - oldest) / slice_count
+        
+        # Slice i covers [edges[i], edges[i+1]); the first and last slices are open-ended
+        # so rows written while loading are never dropped
+        if step.total_seconds() > 0:
+            edges = [None] + [(oldest + step * i).isoformat() for i in range(1, slice_count)] + [None]
+        else:
+            edges = [None, None]
+        
+        # Worker threads report their requests to the calls running on this thread
+        active_calls = self.metrics.active()
+        
+        def fetch_slice(bounds):
+            uploaded_from, uploaded_before = bounds
+            rows = []
+            with self.metrics.bind(active_calls):
+                for page in self._iter_cycle_count_pages(key_from=uploaded_from, key_before=uploaded_before,
+                                                         columns=columns, filters=filters):
+                    rows.extend(page)
+            return rows
+        
+        slices = list(zip(edges[:-1], edges[1:]))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map() yields results in submission order, which keeps the output deterministic
+            slice_results = list(executor.map(fetch_slice, slices))
+        
+        result_data = []
+        for rows in slice_results:
+            result_data.extend(rows)
+        return result_data
     
-    def get_all_cycle_counts(self, limit=None, offset=0):
+    def _load_cycle_counts(self, columns=None, filters=None):
+        """
+        Load every cycle count matching the filters, concurrently when configured
+        
+        Args:
+            columns (str | list, optional): Projection name or column list, None for all columns
+            filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+        
+        Returns:
+            list: List of cycle count records, shared through the read cache
+        """
+        filters = scope_filters(filters)
+        
+        if self.snapshot:
+            # Served locally; the snapshot only downloads what changed since its last sync
+            self.snapshot.refresh(self)
+            return self.snapshot.read(columns=columns, filters=filters)
+        
+        def load():
+            if self.get_fetch_workers() > 1:
+                return self.get_all_cycle_counts_parallel(columns=columns, filters=filters)
+            
+            result_data = []
+            for page in self.iter_cycle_count_pages(columns=columns, filters=filters):
+                result_data.extend(page)
+            return result_data
+        
+        return self.read_cache.get_or_load(("load", _freeze(columns), _freeze(filters)), load)
+    
+    def get_all_cycle_counts(self, limit=None, offset=0, columns=None):
         """
         Get all cycle count records with pagination support
         
         Args:
             limit (int, optional): Maximum number of records to return, None for no limit
-            offset (int): Number of records to skip
+            offset (int): Number of records to skip (only used together with limit)
+            columns (str | list, optional): Projection name or column list, None for all columns
         
         Returns:
             list: List of cycle count records
@@ -82,54 +886,43 @@ class SupabaseClient:
             return []
             
         try:
-            # Start with a base query
-            query = self.supabase.table(CYCLE_COUNTS_TABLE).select("*")
-            
-            # For large datasets, we'll need to fetch in batches
-            result_data = []
-            
             if limit is None:
-                # If no limit specified, use pagination to get all records
-                page_size = 1000  # Supabase has a max limit of 1000
-                current_offset = offset
-                total_count = self.count_cycle_counts()
-                
-                # Continue fetching until we have all records
-                while len(result_data) < total_count:
-                    # Use range to specify pagination
-                    response = query.range(current_offset, current_offset + page_size - 1).execute()
-                    
-                    if not hasattr(response, 'data') or not response.data:
-                        break  # No more data
-                    
-                    batch_size = len(response.data)
-                    result_data.extend(response.data)
-                    
-                    if batch_size < page_size:
-                        break  # Less than a full page means we're at the end
-                    
-                    current_offset += batch_size  # Move to next batch
-                
-                return result_data
+                # If no limit specified, load the whole table
+                return self._load_cycle_counts(columns=columns)
             else:
                 # If limit is specified, just get that batch
-                response = query.range(offset, offset + limit - 1).execute()
-                if hasattr(response, 'data'):
-                    return response.data
-                return []
+                filters = scope_filters()
+                
+                def load():
+                    query = self.supabase.table(CYCLE_COUNTS_TABLE).select(resolve_columns(columns))
+                    query = apply_cycle_count_filters(query, **filters)
+                    response = query.range(offset, offset + limit - 1).execute()
+                    if hasattr(response, 'data'):
+                        return response.data
+                    return []
+                
+                key = ("range", _freeze(columns), _freeze(filters), offset, limit)
+                return self.read_cache.get_or_load(key, load)
         except Exception as e:
             st.error(f"Error fetching data: {str(e)}")
             return []
     
-    def filter_cycle_counts(self, customer=None, date_from=None, date_to=None, warehouse_id=None):
+    def filter_cycle_counts(self, customer=None, date_from=None, date_to=None, warehouse_id=None,
+                            uploaded_by=None, item_search=None, location_search=None, columns=None):
         """
         Filter cycle count records based on criteria
         
+        All filters are applied by the database, and every matching page is loaded.
+        
         Args:
             customer (str, optional): Customer name to filter by
             date_from (date, optional): Start date for filtering
             date_to (date, optional): End date for filtering
-            warehouse_id (str, optional): Warehouse ID to filter by
+            warehouse_id (int, optional): Warehouse ID to filter by
+            uploaded_by (str | list, optional): Uploader user ID, or list of IDs
+            item_search (str, optional): Case-insensitive partial match on item_id
+            location_search (str, optional): Case-insensitive partial match on location
+            columns (str | list, optional): Projection name or column list, None for all columns
             
         Returns:
             list: Filtered list of cycle count records
@@ -138,34 +931,206 @@ class SupabaseClient:
             st.error("Supabase client not initialized")
             return []
             
+        filters = {
+            "customer": customer,
+            "date_from": date_from,
+            "date_to": date_to,
+            "warehouse_id": warehouse_id,
+            "uploaded_by": uploaded_by,
+            "item_search": item_search,
+            "location_search": location_search
+        }
+        
         try:
-            # Use simple select without joins for now
-            query = self.supabase.table(CYCLE_COUNTS_TABLE).select("*")
-            
-            # Apply filters if provided
-            if customer:
-                query = query.eq(CYCLE_COUNTS_COLUMNS["customer"], customer)
-                
-            if date_from and date_to:
-                query = query.gte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_from.isoformat())
-                query = query.lte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_to.isoformat())
-            elif date_from:
-                query = query.gte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_from.isoformat())
-            elif date_to:
-                query = query.lte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_to.isoformat())
-                
-            # Use location instead of location_id until schema is updated
-            if warehouse_id and 'location' in CYCLE_COUNTS_COLUMNS:
-                query = query.eq('location', warehouse_id)
-            
+            return self._load_cycle_counts(columns=columns, filters=filters)
+        except Exception as e:
+            st.error(f"Error filtering data: {str(e)}")
+            raise
+    
+    def get_cycle_count_customers(self, warehouse_id=None):
+        """
+        Get the distinct customer names that have cycle counts
+        
+        Reads the cycle_count_customers view (CREATE_CYCLE_COUNT_CUSTOMERS_VIEW).
+        Deployments without it (see ``python -m database.schema customers-view``)
+        log a warning and get the distinct customers of the loaded cycle count rows.
+        
+        Args:
+            warehouse_id (int, optional): Only customers counted in this warehouse
+        
+        Returns:
+            list: Sorted list of customer names
+        """
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return []
+        
+        warehouse_id = scope_filters({"warehouse_id": warehouse_id})["warehouse_id"]
+        
+        def load():
+            query = self.supabase.table(CYCLE_COUNT_CUSTOMERS_VIEW).select(CYCLE_COUNTS_COLUMNS["customer"])
+            if warehouse_id:
+                query = query.eq(CYCLE_COUNTS_COLUMNS["warehouse_id"], warehouse_id)
             response = query.execute()
             
             if hasattr(response, 'data'):
-                return response.data
+                return sorted({row[CYCLE_COUNTS_COLUMNS["customer"]] for row in response.data})
             return []
+        
+        try:
+            return self.read_cache.get_or_load(("customers", warehouse_id), load)
         except Exception as e:
-            st.error(f"Error filtering data: {str(e)}")
-            raise
+            logger.warning(f"{CYCLE_COUNT_CUSTOMERS_VIEW} unavailable, reading customers from cycle counts: {str(e)}")
+        
+        try:
+            rows = self._load_cycle_counts(columns=["customer"], filters={"warehouse_id": warehouse_id})
+            return sorted({row[CYCLE_COUNTS_COLUMNS["customer"]] for row in rows})
+        except Exception as e:
+            logger.warning(f"Error fetching customers: {str(e)}")
+            return []
+    
+    def get_cycle_date_bounds(self, warehouse_id=None):
+        """
+        Get the earliest and latest cycle dates
+        
+        Args:
+            warehouse_id (int, optional): Only consider this warehouse
+        
+        Returns:
+            tuple: (min_date, max_date) as date objects, or (None, None) if there is no data
+        """
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return None, None
+        
+        cycle_date_col = CYCLE_COUNTS_COLUMNS["cycle_date"]
+        filters = scope_filters({"warehouse_id": warehouse_id})
+        
+        def load():
+            bounds = []
+            for desc in (False, True):
+                query = self.supabase.table(CYCLE_COUNTS_TABLE).select(cycle_date_col)
+                query = apply_cycle_count_filters(query, **filters)
+                response = query.order(cycle_date_col, desc=desc).limit(1).execute()
+                
+                if not hasattr(response, 'data') or not response.data:
+                    return None, None
+                bounds.append(date.fromisoformat(response.data[0][cycle_date_col][:10]))
+            
+            return bounds[0], bounds[1]
+        
+        try:
+            return self.read_cache.get_or_load(("cycle_date_bounds", _freeze(filters)), load)
+        except Exception as e:
+            st.error(f"Error fetching date range: {str(e)}")
+            return None, None
+    
+    def get_latest_cycle_counts(self, since=None, warehouse_id=None):
+        """
+        Get the most recent count per (warehouse, item, location)
+        
+        Reads the trigger-maintained cycle_count_latest table
+        (CREATE_CYCLE_COUNT_LATEST_TABLE), which holds one row per key instead
+        of the full history. Deployments without the table (see
+        ``python -m database.schema latest``) get None, and only a log warning,
+        so callers can fall back to the full history.
+        
+        Args:
+            since (date, optional): Only keys whose latest count is on or after this cycle date
+            warehouse_id (int, optional): Only this warehouse
+        
+        Returns:
+            list: Latest count records (id, item_id, description, unit, location, variance,
+                  cycle_date, uploaded_at, warehouse_id), or None on error
+        """
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return None
+        
+        filters = scope_filters({"warehouse_id": warehouse_id, "date_from": since})
+        
+        def load():
+            rows = []
+            offset = 0
+            while True:
+                # The table is small, so plain offset paging over its primary key is fine
+                query = self.supabase.table(CYCLE_COUNT_LATEST_TABLE).select("*")
+                query = apply_cycle_count_filters(query, **filters)
+                response = query.order("warehouse_id").order("item_id").order("location").range(
+                    offset, offset + PAGE_SIZE - 1).execute()
+                page = response.data if hasattr(response, 'data') and response.data else []
+                rows.extend(page)
+                if len(page) < PAGE_SIZE:
+                    return rows
+                offset += PAGE_SIZE
+        
+        try:
+            return self.read_cache.get_or_load(("latest", _freeze(filters)), load)
+        except Exception as e:
+            logger.warning(f"Latest counts unavailable, falling back to the full history: {str(e)}")
+            return None
+    
+    def get_cycle_count_summary(self, warehouse_id=None, customer=None):
+        """
+        Get the dashboard summary metrics, aggregated by the database
+        
+        Calls the cycle_count_summary function (CREATE_CYCLE_COUNT_SUMMARY_FUNCTION),
+        so the response is one small JSON object however many rows match.
+        Deployments without the function (see ``python -m database.schema summary-function``)
+        get None, and only a log warning, so callers can aggregate the rows instead.
+        
+        Args:
+            warehouse_id (int, optional): Only count this warehouse
+            customer (str, optional): Only count this customer
+        
+        Returns:
+            dict: total_items, total_customers, total_users, items_last_week,
+                  items_last_month, total_variance and mean_variance, or None on error
+        """
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return None
+        
+        filters = scope_filters({"warehouse_id": warehouse_id, "customer": customer})
+        
+        def load():
+            response = self.supabase.rpc(CYCLE_COUNT_SUMMARY_FUNCTION, {
+                "p_warehouse_id": filters.get("warehouse_id"),
+                "p_customer": filters.get("customer")
+            }).execute()
+            
+            if not hasattr(response, 'data') or not response.data:
+                raise ValueError(f"{CYCLE_COUNT_SUMMARY_FUNCTION} returned no data")
+            return response.data
+        
+        try:
+            return self.read_cache.get_or_load(("summary", _freeze(filters)), load)
+        except Exception as e:
+            logger.warning(f"Summary metrics unavailable, falling back to the rows: {str(e)}")
+            return None
+    
+    def query_analytics(self, name, filters=None, **kwargs):
+        """
+        Run a named aggregate from CycleCountAnalytics against the local snapshot
+        
+        Args:
+            name (str): CycleCountAnalytics method, e.g. "submissions_per_day"
+            filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+            **kwargs: Extra arguments for the method (e.g. limit)
+            
+        Returns:
+            The aggregate result, or None when the analytics engine is not enabled
+            or the query failed, in which case callers aggregate in pandas instead
+        """
+        if not self.analytics:
+            return None
+        
+        try:
+            self.snapshot.refresh(self)
+            return getattr(self.analytics, name)(scope_filters(filters), **kwargs)
+        except Exception as e:
+            st.error(f"Error running analytics query {name}: {str(e)}")
+            return None
     
     def update_cycle_count(self, record_id, data):
         """
@@ -179,7 +1144,7 @@ class SupabaseClient:
             dict: The updated record, or None on error
         """
         try:
-            response = self.supabase.table(CYCLE_COUNTS_TABLE).update(data).eq("id", record_id).execute()
+            response = self.supabase.table(CYCLE_COUNTS_TABLE).update(writable_fields(data)).eq("id", record_id).execute()
             
             if hasattr(response, 'data') and response.data:
                 return response.data[0]
@@ -187,6 +1152,8 @@ class SupabaseClient:
         except Exception as e:
             st.error(f"Error updating data: {str(e)}")
             return None
+        finally:
+            self.invalidate_read_cache()
     
     def delete_cycle_count(self, record_id):
         """
@@ -201,31 +1168,129 @@ class SupabaseClient:
         try:
             response = self.supabase.table(CYCLE_COUNTS_TABLE).delete().eq("id", record_id).execute()
             
+            if self.snapshot:
+                self.snapshot.discard([record_id])
             if hasattr(response, 'data'):
                 return True
             return False
         except Exception as e:
             st.error(f"Error deleting data: {str(e)}")
             return False
+        finally:
+            self.invalidate_read_cache()
+    
+    def delete_cycle_counts(self, ids, chunk_size=DELETE_CHUNK_SIZE):
+        """
+        Delete many cycle count records by ID, one request per chunk of IDs
+        
+        Args:
+            ids (list): IDs of the records to delete
+            chunk_size (int): Number of IDs sent per delete request
+        
+        Returns:
+            int: Number of records deleted
+        """
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return 0
+        
+        ids = list(ids)
+        chunk_size = max(1, int(chunk_size))
+        deleted = 0
+        try:
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                query = self.supabase.table(CYCLE_COUNTS_TABLE).delete(count='exact', returning='minimal')
+                
+                # Managers may only delete within their own warehouse
+                warehouse_id = get_session_warehouse_scope()
+                if warehouse_id:
+                    query = query.eq(CYCLE_COUNTS_COLUMNS["warehouse_id"], warehouse_id)
+                
+                response = query.in_(CYCLE_COUNTS_COLUMNS["id"], chunk).execute()
+                deleted += response.count or 0
+                
+                if self.snapshot:
+                    self.snapshot.discard(chunk, warehouse_id=warehouse_id)
+            return deleted
+        except Exception as e:
+            st.error(f"Error deleting data: {str(e)}")
+            return deleted
+        finally:
+            self.invalidate_read_cache()
+    
+    def delete_cycle_counts_where(self, customer=None, date_from=None, date_to=None, warehouse_id=None,
+                                  dry_run=False):
+        """
+        Delete every cycle count record matching the filters in a single request
+        
+        At least one filter is required, so an empty call can never wipe the table.
+        
+        Args:
+            customer (str, optional): Customer name to filter by
+            date_from (date, optional): Start of the cycle date range
+            date_to (date, optional): End of the cycle date range
+            warehouse_id (int, optional): Warehouse ID to filter by
+            dry_run (bool): Only count the matching records, delete nothing
+        
+        Returns:
+            int: Number of records matched (dry run) or deleted, or None on error
+        """
+        if not self.supabase:
+            st.error("Supabase client not initialized")
+            return None
+        
+        filters = {
+            "customer": customer,
+            "date_from": date_from,
+            "date_to": date_to,
+            "warehouse_id": warehouse_id
+        }
+        if not any(filters.values()):
+            st.error("Select at least one filter before deleting records")
+            return None
+        filters = scope_filters(filters)
+        
+        try:
+            if dry_run:
+                # Always count against the database, never a cached read
+                query = self.supabase.table(CYCLE_COUNTS_TABLE).select(
+                    CYCLE_COUNTS_COLUMNS["id"], count='exact', head=True)
+                response = apply_cycle_count_filters(query, **filters).execute()
+                return response.count or 0
+            
+            query = self.supabase.table(CYCLE_COUNTS_TABLE).delete(count='exact', returning='minimal')
+            response = apply_cycle_count_filters(query, **filters).execute()
+            return response.count or 0
+        except Exception as e:
+            st.error(f"Error deleting data: {str(e)}")
+            return None
+        finally:
+            if not dry_run:
+                self.invalidate_read_cache(deleted=True)
     
     # Warehouse methods
+    def _load_warehouses(self):
+        """Fetch the whole warehouses table for the lookup cache"""
+        response = self.supabase.table(WAREHOUSES_TABLE).select("*").execute()
+        
+        if hasattr(response, 'data'):
+            return response.data
+        return []
+    
     def get_all_warehouses(self):
         """
         Get all warehouses
         
         Returns:
-            list: List of warehouses
+            list: List of warehouses, served from the lookup cache (treat as read-only)
         """
         if not self.supabase:
             st.error("Supabase client not initialized")
             return []
             
         try:
-            response = self.supabase.table(WAREHOUSES_TABLE).select("*").execute()
-            
-            if hasattr(response, 'data'):
-                return response.data
-            return []
+            return self.warehouse_lookup.all()
         except Exception as e:
             st.error(f"Error fetching warehouses: {str(e)}")
             raise
@@ -243,11 +1308,7 @@ class SupabaseClient:
         if not self.supabase:
             st.error("Supabase client not initialized")
         try:
-            response = self.supabase.table(WAREHOUSES_TABLE).select("*").eq("id", warehouse_id).execute()
-            
-            if hasattr(response, 'data') and response.data:
-                return response.data[0]
-            return None
+            return self.warehouse_lookup.get_by_id(warehouse_id)
         except Exception as e:
             st.error(f"Error fetching warehouse: {str(e)}")
             raise
@@ -267,35 +1328,51 @@ class SupabaseClient:
         except Exception as e:
             st.error(f"Error inserting warehouse: {str(e)}")
             raise
+        finally:
+            self.warehouse_lookup.invalidate()
     
     # User methods
-    def get_all_users(self):
+    def _load_users(self):
+        """Fetch the whole users table, with warehouse data joined, for the lookup cache"""
+        response = self.supabase.table(USERS_TABLE).select("*", f"{WAREHOUSES_TABLE}(*)").execute()
+        
+        if hasattr(response, 'data'):
+            return response.data
+        return []
+    
+    def get_all_users(self, columns="*"):
         """
         Get all users with warehouse data joined
         
+        Args:
+            columns (str): Comma separated users columns to return, e.g. "id,name"
+        
         Returns:
-            list: List of users with warehouse data
+            list: List of users with warehouse data, served from the lookup cache
         """
         if not self.supabase:
             st.error("Supabase client not initialized")
             return []
             
         try:
-            response = self.supabase.table(USERS_TABLE).select("*", f"{WAREHOUSES_TABLE}(*)").execute()
+            users = self.user_lookup.all()
+            if columns == "*":
+                return users
             
-            if hasattr(response, 'data'):
-                return response.data
-            return []
+            keys = [col.strip() for col in columns.split(",")] + [WAREHOUSES_TABLE]
+            return [{key: user.get(key) for key in keys} for user in users]
         except Exception as e:
             st.error(f"Error fetching users: {str(e)}")
             raise
     
-    def get_user(self, username):
+    def get_user(self, username, use_cache=True):
         """
         Get user by username with proper error handling
         
         Args:
             username (str): The username to lookup
+            use_cache (bool): Serve from the lookup cache; pass False where stale
+                data matters (e.g. checking a password)
         
         Returns:
             dict: User data if found, None otherwise
@@ -305,7 +1382,12 @@ class SupabaseClient:
             return None
         
         try:
-            # Simple select for now - add warehouse join when ready
+            if use_cache:
+                user = self.user_lookup.get_by_name(username)
+                if user:
+                    return user
+            
+            # Not cached (or bypassed): users created elsewhere since the last load
             response = self.supabase.table(USERS_TABLE).select("*").eq("username", username).execute()
             
             if hasattr(response, 'data') and response.data:
@@ -336,6 +1418,8 @@ class SupabaseClient:
         except Exception as e:
             st.error(f"Error inserting user: {str(e)}")
             raise
+        finally:
+            self.user_lookup.invalidate()
     
     def get_warehouse_users(self, warehouse_id):
         """
@@ -352,11 +1436,7 @@ class SupabaseClient:
             return []
         
         try:
-            response = self.supabase.table(USERS_TABLE).select("*").eq("warehouse_id", warehouse_id).execute()
-            
-            if hasattr(response, 'data'):
-                return response.data
-            return []
+            return [user for user in self.user_lookup.all() if user.get("warehouse_id") == warehouse_id]
         except Exception as e:
             st.error(f"Error fetching warehouse users: {str(e)}")
             return []
@@ -384,6 +1464,8 @@ class SupabaseClient:
         except Exception as e:
             st.error(f"Error registering user: {str(e)}")
             return None
+        finally:
+            self.user_lookup.invalidate()
 
     def update_last_login(self, user_id):
         """
@@ -411,49 +1493,112 @@ class SupabaseClient:
             st.error(f"Error updating last login: {str(e)}")
             return False
 
-    def count_cycle_counts(self, customer=None, date_from=None, date_to=None, warehouse_id=None):
+    def count_cycle_counts(self, customer=None, date_from=None, date_to=None, warehouse_id=None,
+                           uploaded_by=None, item_search=None, location_search=None, mode="exact"):
         """
         Get the total count of cycle count records, optionally filtered
         
+        Exact counts are cached per filter combination until the next write. The
+        approximate modes return that cached exact count when there is one.
+        
         Args:
             customer (str, optional): Customer name to filter by
             date_from (date, optional): Start date for filtering
             date_to (date, optional): End date for filtering
-            warehouse_id (str, optional): Warehouse ID to filter by
+            warehouse_id (int, optional): Warehouse ID to filter by
+            uploaded_by (str | list, optional): Uploader user ID, or list of IDs
+            item_search (str, optional): Case-insensitive partial match on item_id
+            location_search (str, optional): Case-insensitive partial match on location
+            mode (str): One of COUNT_MODES; "planned" and "estimated" skip the full scan
             
         Returns:
             int: Total count of records matching criteria
         """
+        if mode not in COUNT_MODES:
+            raise ValueError(f"Unknown count mode: {mode}")
+        
         if not self.supabase:
             st.error("Supabase client not initialized")
             return 0
         
-        try:
-            # Start with query that only returns count limit 100000
-            query = self.supabase.table(CYCLE_COUNTS_TABLE).select('count', count='exact')
+        filters = scope_filters({
+            "customer": customer,
+            "date_from": date_from,
+            "date_to": date_to,
+            "warehouse_id": warehouse_id,
+            "uploaded_by": uploaded_by,
+            "item_search": item_search,
+            "location_search": location_search
+        })
+        
+        if self.snapshot:
+            # Counting the local snapshot is exact and cheap in every mode
+            try:
+                self.snapshot.refresh(self)
+                return self.snapshot.count(filters)
+            except Exception as e:
+                st.error(f"Error counting data: {str(e)}")
+                return 0
+        
+        key = _freeze(filters)
+        with self.count_lock:
+            if key in self.count_cache:
+                return self.count_cache[key]
+        
+        def load():
+            # Ask only for the count, not the rows
+            query = self.supabase.table(CYCLE_COUNTS_TABLE).select(CYCLE_COUNTS_COLUMNS["id"], count=mode, head=True)
             
             # Apply the same filters as in filter_cycle_counts
-            if customer:
-                query = query.eq(CYCLE_COUNTS_COLUMNS["customer"], customer)
-                
-            if date_from and date_to:
-                query = query.gte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_from.isoformat())
-                query = query.lte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_to.isoformat())
-            elif date_from:
-                query = query.gte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_from.isoformat())
-            elif date_to:
-                query = query.lte(CYCLE_COUNTS_COLUMNS["cycle_date"], date_to.isoformat())
-                
-            if warehouse_id and 'location' in CYCLE_COUNTS_COLUMNS:
-                query = query.eq('location', warehouse_id)
+            query = apply_cycle_count_filters(query, **filters)
             
             # Execute the count query
             response = query.execute()
             
             # The count is in response.count
-            if hasattr(response, 'count'):
+            if hasattr(response, 'count') and response.count is not None:
                 return response.count
             return 0
+        
+        try:
+            if mode != "exact":
+                count = self.read_cache.get_or_load(("count", mode, key), load)
+                # Below max-rows an "estimated" count is an exact count
+                if mode != "estimated" or count >= PAGE_SIZE:
+                    return count
+            else:
+                count = load()
+            
+            with self.count_lock:
+                self.count_cache[key] = count
+            return count
         except Exception as e:
             st.error(f"Error counting data: {str(e)}")
-            return 0
\ No newline at end of file
+            return 0
+    
+    def get_cached_count(self, customer=None, date_from=None, date_to=None, warehouse_id=None,
+                         uploaded_by=None, item_search=None, location_search=None):
+        """
+        Get the exact count cached by count_cycle_counts, without querying
+        
+        Args:
+            Same filters as count_cycle_counts
+        
+        Returns:
+            int: The exact count of records matching criteria, or None if it is not known
+        """
+        if self.snapshot:
+            return self.count_cycle_counts(customer, date_from, date_to, warehouse_id,
+                                           uploaded_by, item_search, location_search)
+        
+        key = _freeze(scope_filters({
+            "customer": customer,
+            "date_from": date_from,
+            "date_to": date_to,
+            "warehouse_id": warehouse_id,
+            "uploaded_by": uploaded_by,
+            "item_search": item_search,
+            "location_search": location_search
+        }))
+        with self.count_lock:
+            return self.count_cache.get(key)
@@ -0,0 +1,119 @@
+from operator import itemgetter
+
+import pandas as pd
+
+from database.settings import get_app_setting
+from database.schema import CYCLE_COUNTS_COLUMN_TYPES
+
+# Low-cardinality text columns, stored once per distinct value; warehouse and
+# uploader_name are the names the dashboard looks up for warehouse_id and uploaded_by
+CATEGORICAL_COLUMNS = ("customer", "warehouse", "unit", "status", "location", "uploader_name")
+
+# pandas dtype for each SQL type in CYCLE_COUNTS_COLUMN_TYPES (text and uuid use the string dtype)
+FRAME_DTYPES = {
+    "numeric": "float32",
+    "integer": "int32",
+    "date": "datetime64[ns]",
+    "timestamp": "datetime64[ns]"
+}
+
+# Values for app_settings.frame_string_dtype
+STRING_DTYPES = {
+    "object": object,
+    "pyarrow": "string[pyarrow]"
+}
+
+def get_string_dtype():
+    """
+    Get the dtype used for free-text columns
+    
+    Returns:
+        The dtype named by app_settings.frame_string_dtype ("object" or "pyarrow"), default object
+    """
+    return STRING_DTYPES.get(get_app_setting("frame_string_dtype", "object"), object)
+
+def typed_column(name, values, string_dtype=object):
+    """
+    Convert one cycle count column to its schema dtype
+    
+    Args:
+        name (str): Column name
+        values (list | Series): Column values as returned by the database
+        string_dtype: dtype for text columns that are not categorical
+    
+    Returns:
+        Series: The typed column; columns not in the schema keep their inferred dtype
+    """
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    if name in CATEGORICAL_COLUMNS:
+        return values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+    
+    sql_type = CYCLE_COUNTS_COLUMN_TYPES.get(name)
+    if sql_type is None:
+        return values
+    # Frames built by cycle_counts_frame are passed through as they are
+    dtype = FRAME_DTYPES.get(sql_type, string_dtype)
+    if values.dtype == dtype or (sql_type == "integer" and values.dtype == "Int32"):
+        return values
+    
+    if sql_type in ("date", "timestamp"):
+        if pd.api.types.is_datetime64_any_dtype(values):
+            parsed = values
+        else:
+            parsed = pd.to_datetime(values, format="ISO8601", utc=True)
+        # The columns have no time zone; anything that came with an offset is kept as naive UTC
+        if getattr(parsed.dt, "tz", None) is not None:
+            parsed = parsed.dt.tz_convert(None)
+        return parsed.astype(dtype)
+    if sql_type == "integer":
+        # Nullable integers when a value is missing (e.g. a LEFT JOIN)
+        return values.astype(dtype if values.notna().all() else "Int32")
+    if sql_type == "numeric":
+        return pd.to_numeric(values).astype(dtype)
+    return values.astype(dtype)
+
+def _record_columns(records, names):
+    """Transpose a list of records into one list of values per column name"""
+    try:
+        rows = map(itemgetter(*names), records)
+        columns = list(zip(*rows)) if len(names) > 1 else [list(rows)]
+    except KeyError:
+        # Records with missing keys
+        columns = [[record.get(name) for record in records] for name in names]
+    return dict(zip(names, columns))
+
+def cycle_counts_frame(records, columns=None, string_dtype=None):
+    """
+    Build a DataFrame of cycle count records with the dtypes from database/schema.py
+    
+    Columns are built one at a time instead of inferring object dtypes from a
+    list of dicts: categoricals for customer, warehouse, unit, status and
+    location, float32 counts, int32 warehouse IDs and datetime64 dates, which
+    takes several times less memory and speeds up groupbys and filters.
+    
+    Args:
+        records (list | DataFrame): Cycle count records, or a frame to convert
+        columns (list, optional): Columns to keep, in order; default every column present
+        string_dtype (optional): dtype for free-text columns, default get_string_dtype()
+    
+    Returns:
+        DataFrame: The typed frame
+    """
+    if string_dtype is None:
+        string_dtype = get_string_dtype()
+    
+    if isinstance(records, pd.DataFrame):
+        names = columns or list(records.columns)
+        source = {name: records[name] for name in names if name in records.columns}
+    else:
+        records = records or []
+        names = columns or (list(records[0].keys()) if records else [])
+        source = _record_columns(records, names) if records and names else {}
+    
+    if not source:
+        return pd.DataFrame(columns=names)
+    return pd.DataFrame({name: typed_column(name, values, string_dtype) for name, values in source.items()})
+
+def is_empty(data):
+    """True for None or no records, whether data is a list or a DataFrame"""
+    return data is None or len(data) == 0
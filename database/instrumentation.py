@@ -0,0 +1,254 @@
+import functools
+import inspect
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Calls kept in the ring buffer; overridable with app_settings.metrics_buffer_size
+METRICS_BUFFER_SIZE = 2000
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of numbers
+    
+    Args:
+        values (list): Numbers, in any order
+        fraction (float): Percentile as a fraction, e.g. 0.95
+    
+    Returns:
+        float: The percentile, or None for an empty list
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    # Smallest value with at least fraction of the values at or below it; the rounding
+    # keeps float error (0.07 * 100 = 7.000000000000001) from moving up a rank
+    rank = max(1, math.ceil(round(fraction * len(ordered), 9)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def current_session():
+    """The session_id app.py keeps in session state, or None outside a script run"""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get("session_id")
+
+def count_rows(value):
+    """Rows handed back to the caller by an instrumented method"""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        # Bulk write results carry one entry per record
+        for key in ("inserted", "outcomes"):
+            if isinstance(value.get(key), list):
+                return len(value[key])
+        return 1
+    if value is None or isinstance(value, (bool, int, float)):
+        return 0
+    return 1
+
+class QueryMetrics:
+    """
+    Process-wide ring buffer of timed calls, shared by every session
+    
+    Each call records its wall time, the rows it returned, and the HTTP pages
+    and response bytes it caused. Calls can nest (e.g. filter_cycle_counts runs
+    get_all_cycle_counts_parallel), and each level counts the requests made
+    beneath it; depth 0 marks the outermost call. Calls are tagged with the
+    Streamlit session that made them. Only the most recent calls are kept, so
+    memory stays bounded.
+    """
+    
+    def __init__(self, maxlen=METRICS_BUFFER_SIZE):
+        self._calls = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def _stack(self):
+        """Calls in progress on the current thread, outermost first"""
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+    
+    @contextmanager
+    def track(self, method, kind="db"):
+        """
+        Time a block of work and add it to the ring buffer
+        
+        Args:
+            method (str): Name shown in the Performance panel
+            kind (str): "db" for SupabaseClient methods, "app" for pandas/plotly work
+        
+        Yields:
+            dict: The call record; set "rows" on it to report rows returned
+        """
+        stack = self._stack()
+        record = {
+            "method": method,
+            "kind": kind,
+            # Nested calls and fetch workers belong to the session of the outermost call
+            "session": stack[-1]["session"] if stack else current_session(),
+            "depth": len(stack),
+            "started_at": datetime.now(),
+            "wall_ms": 0.0,
+            "rows": 0,
+            "pages": 0,
+            "bytes": 0,
+            "error": None
+        }
+        stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["wall_ms"] = (time.perf_counter() - start) * 1000
+            # A suspended generator may have been closed after later calls started
+            stack.remove(record)
+            with self._lock:
+                self._calls.append(record)
+    
+    @contextmanager
+    def bind(self, records):
+        """
+        Attribute requests made on a worker thread to calls started on another
+        
+        Args:
+            records (list): The other thread's active() list
+        """
+        stack = self._stack()
+        saved = list(stack)
+        stack[:] = records
+        try:
+            yield
+        finally:
+            stack[:] = saved
+    
+    def active(self):
+        """Calls in progress on the current thread, to hand to bind()"""
+        return list(self._stack())
+    
+    def on_response(self, response):
+        """
+        httpx response hook: count the page and its bytes for every active call
+        
+        Args:
+            response (httpx.Response): Response from PostgREST
+        """
+        if not self._stack():
+            return
+        
+        # The body is read here instead of by the caller; httpx keeps it either way
+        response.read()
+        self.record_page(len(response.content), f"HTTP {response.status_code}" if response.is_error else None)
+    
+    def record_page(self, nbytes, error=None):
+        """
+        Count one backend request and its response size for every active call
+        
+        Args:
+            nbytes (int): Response body size
+            error (str, optional): Error reported by the backend
+        """
+        stack = self._stack()
+        # Fetch workers bound to the same calls update them concurrently
+        with self._lock:
+            for record in stack:
+                record["pages"] += 1
+                record["bytes"] += nbytes
+                if error and not record["error"]:
+                    record["error"] = error
+    
+    def calls(self):
+        """
+        Get the recorded calls
+        
+        Returns:
+            list: Call records, oldest first
+        """
+        with self._lock:
+            return list(self._calls)
+    
+    def summary(self):
+        """
+        Aggregate the recorded calls per method
+        
+        Returns:
+            list: One dict per method (method, kind, calls, sessions, errors, p50_ms,
+                  p95_ms, max_ms, avg_rows, avg_pages, avg_bytes), slowest p95 first
+        """
+        by_method = {}
+        for record in self.calls():
+            by_method.setdefault((record["method"], record["kind"]), []).append(record)
+        
+        rows = []
+        for (method, kind), records in by_method.items():
+            times = [r["wall_ms"] for r in records]
+            rows.append({
+                "method": method,
+                "kind": kind,
+                "calls": len(records),
+                "sessions": len({r["session"] for r in records if r["session"]}),
+                "errors": sum(1 for r in records if r["error"]),
+                "p50_ms": percentile(times, 0.5),
+                "p95_ms": percentile(times, 0.95),
+                "max_ms": max(times),
+                "avg_rows": sum(r["rows"] for r in records) / len(records),
+                "avg_pages": sum(r["pages"] for r in records) / len(records),
+                "avg_bytes": sum(r["bytes"] for r in records) / len(records)
+            })
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+    
+    def slowest(self, limit=20):
+        """
+        Get the slowest recorded calls
+        
+        Args:
+            limit (int): Maximum number of calls to return
+        
+        Returns:
+            list: Call records, slowest first
+        """
+        return sorted(self.calls(), key=lambda r: r["wall_ms"], reverse=True)[:limit]
+    
+    def clear(self):
+        """Drop every recorded call"""
+        with self._lock:
+            self._calls.clear()
+
+def _timed(name, method):
+    """Wrap one method so each call is recorded in self.metrics"""
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.track(name) as record:
+                for page in method(self, *args, **kwargs):
+                    record["rows"] += count_rows(page)
+                    yield page
+    else:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.track(name) as record:
+                result = method(self, *args, **kwargs)
+                record["rows"] = count_rows(result)
+                return result
+    return wrapper
+
+def instrument_methods(cls):
+    """
+    Class decorator timing every public method through the instance's metrics
+    
+    The instance must have a ``metrics`` attribute (a QueryMetrics). Generator
+    methods are timed across the whole iteration, not just their creation.
+    """
+    for name, method in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(method):
+            setattr(cls, name, _timed(name, method))
+    return cls
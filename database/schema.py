@@ -91,15 +91,332 @@ CREATE TABLE IF NOT EXISTS cycle_counts (
     location TEXT NOT NULL,
     system_count NUMERIC NOT NULL,
     actual_count NUMERIC NOT NULL,
-    variance NUMERIC NOT NULL,
-    percent_diff NUMERIC NOT NULL,
+    variance NUMERIC GENERATED ALWAYS AS (actual_count - system_count) STORED,
+    percent_diff NUMERIC GENERATED ALWAYS AS (
+        CASE WHEN system_count <> 0 THEN (actual_count - system_count) / system_count * 100 ELSE 0 END
+    ) STORED,
     customer TEXT NOT NULL,
     notes TEXT,
     cycle_date DATE NOT NULL,
     uploaded_by UUID REFERENCES users(id) ON DELETE SET NULL,
     uploaded_at TIMESTAMP NOT NULL DEFAULT NOW(),
-    warehouse_id INTEGER REFERENCES warehouses(id) NOT NULL
+    warehouse_id INTEGER REFERENCES warehouses(id) NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+"""
+
+# SQL to keep cycle_counts.updated_at current on every edit. The local snapshot
+# sync uses updated_at as its high-water mark, so it sees both new and edited rows.
+CREATE_CYCLE_COUNTS_UPDATED_AT_TRIGGER = """
+CREATE OR REPLACE FUNCTION set_cycle_counts_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS cycle_counts_set_updated_at ON cycle_counts;
+CREATE TRIGGER cycle_counts_set_updated_at
+BEFORE UPDATE ON cycle_counts
+FOR EACH ROW EXECUTE FUNCTION set_cycle_counts_updated_at();
+"""
+
+# SQL to add updated_at to deployments created before the column existed
+MIGRATE_CYCLE_COUNTS_ADD_UPDATED_AT = """
+ALTER TABLE cycle_counts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+UPDATE cycle_counts SET updated_at = uploaded_at WHERE updated_at IS NULL;
+ALTER TABLE cycle_counts ALTER COLUMN updated_at SET DEFAULT NOW();
+ALTER TABLE cycle_counts ALTER COLUMN updated_at SET NOT NULL;
+"""
+
+# Natural key of a cycle count record, used by upserts that re-import a corrected file.
+# It includes warehouse_id, so an import can never match (and rewrite) another warehouse's rows.
+CYCLE_COUNTS_NATURAL_KEY = ["warehouse_id", "customer", "item_id", "location", "lp", "lot_number", "cycle_date"]
+
+# SQL for the unique index that natural-key upserts resolve conflicts against.
+# NULLS NOT DISTINCT (Postgres 15+) lets rows without an LP or lot number match.
+CREATE_CYCLE_COUNTS_NATURAL_KEY_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS cycle_counts_natural_key
+ON cycle_counts (warehouse_id, customer, item_id, location, lp, lot_number, cycle_date) NULLS NOT DISTINCT;
+"""
+
+# SQL listing the natural keys held by more than one row, which would make
+# CREATE_CYCLE_COUNTS_NATURAL_KEY_INDEX fail. Run it before the migration below.
+FIND_CYCLE_COUNTS_NATURAL_KEY_DUPLICATES = """
+SELECT warehouse_id, customer, item_id, location, lp, lot_number, cycle_date, COUNT(*) AS row_count
+FROM cycle_counts
+GROUP BY warehouse_id, customer, item_id, location, lp, lot_number, cycle_date
+HAVING COUNT(*) > 1
+ORDER BY row_count DESC;
+"""
+
+# SQL building (or rebuilding, for deployments with the older index without
+# warehouse_id) the natural key index. Duplicate rows are resolved first: the
+# latest upload of each key is kept and the others are moved to
+# cycle_counts_natural_key_duplicates for review. GROUP BY and PARTITION BY
+# treat NULLs as equal, like NULLS NOT DISTINCT.
+MIGRATE_CYCLE_COUNTS_NATURAL_KEY = """
+BEGIN;
+LOCK TABLE cycle_counts IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS cycle_counts_natural_key_duplicates (LIKE cycle_counts);
+
+CREATE TEMPORARY TABLE superseded_cycle_counts ON COMMIT DROP AS
+SELECT id FROM (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY warehouse_id, customer, item_id, location, lp, lot_number, cycle_date
+        ORDER BY uploaded_at DESC, updated_at DESC, id DESC
+    ) AS position
+    FROM cycle_counts
+) ranked
+WHERE position > 1;
+
+INSERT INTO cycle_counts_natural_key_duplicates
+SELECT * FROM cycle_counts WHERE id IN (SELECT id FROM superseded_cycle_counts);
+DELETE FROM cycle_counts WHERE id IN (SELECT id FROM superseded_cycle_counts);
+
+DROP INDEX IF EXISTS cycle_counts_natural_key;
+CREATE UNIQUE INDEX cycle_counts_natural_key
+ON cycle_counts (warehouse_id, customer, item_id, location, lp, lot_number, cycle_date) NULLS NOT DISTINCT;
+COMMIT;
+"""
+
+# Table holding only the most recent count per (warehouse, item, location), kept
+# current by triggers on cycle_counts, for the inventory reconciliation tool
+CYCLE_COUNT_LATEST_TABLE = "cycle_count_latest"
+
+CREATE_CYCLE_COUNT_LATEST_TABLE = """
+CREATE TABLE IF NOT EXISTS cycle_count_latest (
+    warehouse_id INTEGER NOT NULL REFERENCES warehouses(id),
+    item_id TEXT NOT NULL,
+    location TEXT NOT NULL,
+    id UUID NOT NULL,
+    description TEXT NOT NULL,
+    unit TEXT,
+    variance NUMERIC NOT NULL,
+    cycle_date DATE NOT NULL,
+    uploaded_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (warehouse_id, item_id, location)
 );
+
+CREATE INDEX IF NOT EXISTS cycle_count_latest_cycle_date_idx ON cycle_count_latest (cycle_date);
+"""
+
+# Triggers keeping cycle_count_latest current. Inserts only replace an older
+# latest row; updates and deletes recompute the affected keys from cycle_counts.
+CREATE_CYCLE_COUNT_LATEST_TRIGGERS = """
+CREATE OR REPLACE FUNCTION refresh_cycle_count_latest(p_warehouse_id INTEGER, p_item_id TEXT, p_location TEXT)
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM cycle_count_latest
+    WHERE warehouse_id = p_warehouse_id AND item_id = p_item_id AND location = p_location;
+    
+    INSERT INTO cycle_count_latest (warehouse_id, item_id, location, id, description, unit, variance, cycle_date, uploaded_at)
+    SELECT warehouse_id, item_id, location, id, description, unit, variance, cycle_date, uploaded_at
+    FROM cycle_counts
+    WHERE warehouse_id = p_warehouse_id AND item_id = p_item_id AND location = p_location
+    ORDER BY cycle_date DESC, uploaded_at DESC
+    LIMIT 1;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_cycle_count_latest()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO cycle_count_latest (warehouse_id, item_id, location, id, description, unit, variance, cycle_date, uploaded_at)
+        VALUES (NEW.warehouse_id, NEW.item_id, NEW.location, NEW.id, NEW.description, NEW.unit, NEW.variance, NEW.cycle_date, NEW.uploaded_at)
+        ON CONFLICT (warehouse_id, item_id, location) DO UPDATE
+        SET id = EXCLUDED.id, description = EXCLUDED.description, unit = EXCLUDED.unit,
+            variance = EXCLUDED.variance, cycle_date = EXCLUDED.cycle_date, uploaded_at = EXCLUDED.uploaded_at
+        WHERE (cycle_count_latest.cycle_date, cycle_count_latest.uploaded_at) <= (EXCLUDED.cycle_date, EXCLUDED.uploaded_at);
+        RETURN NULL;
+    END IF;
+    
+    -- UPDATE or DELETE: the old key may have lost its latest row
+    PERFORM refresh_cycle_count_latest(OLD.warehouse_id, OLD.item_id, OLD.location);
+    IF TG_OP = 'UPDATE' AND (NEW.warehouse_id, NEW.item_id, NEW.location) IS DISTINCT FROM (OLD.warehouse_id, OLD.item_id, OLD.location) THEN
+        PERFORM refresh_cycle_count_latest(NEW.warehouse_id, NEW.item_id, NEW.location);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS cycle_counts_maintain_latest ON cycle_counts;
+CREATE TRIGGER cycle_counts_maintain_latest
+AFTER INSERT OR UPDATE OR DELETE ON cycle_counts
+FOR EACH ROW EXECUTE FUNCTION maintain_cycle_count_latest();
+"""
+
+# SQL to fill cycle_count_latest from existing data (run once after creating it)
+BACKFILL_CYCLE_COUNT_LATEST = """
+INSERT INTO cycle_count_latest (warehouse_id, item_id, location, id, description, unit, variance, cycle_date, uploaded_at)
+SELECT DISTINCT ON (warehouse_id, item_id, location)
+    warehouse_id, item_id, location, id, description, unit, variance, cycle_date, uploaded_at
+FROM cycle_counts
+ORDER BY warehouse_id, item_id, location, cycle_date DESC, uploaded_at DESC
+ON CONFLICT (warehouse_id, item_id, location) DO NOTHING;
+"""
+
+# Secondary indexes on cycle_counts, matched to how the app queries the table
+CYCLE_COUNTS_INDEXES = {
+    # Dashboard date range and manager warehouse scoping
+    "cycle_counts_warehouse_cycle_date_idx":
+        "CREATE INDEX {concurrently}IF NOT EXISTS cycle_counts_warehouse_cycle_date_idx "
+        "ON cycle_counts (warehouse_id, cycle_date);",
+    # Customer filter and filtered counts
+    "cycle_counts_customer_cycle_date_idx":
+        "CREATE INDEX {concurrently}IF NOT EXISTS cycle_counts_customer_cycle_date_idx "
+        "ON cycle_counts (customer, cycle_date);",
+    # Latest count per item/location for reconciliation
+    "cycle_counts_item_location_cycle_date_idx":
+        "CREATE INDEX {concurrently}IF NOT EXISTS cycle_counts_item_location_cycle_date_idx "
+        "ON cycle_counts (item_id, location, cycle_date DESC);",
+    # Keyset pagination of full reads, ordered by (uploaded_at, id)
+    "cycle_counts_uploaded_at_idx":
+        "CREATE INDEX {concurrently}IF NOT EXISTS cycle_counts_uploaded_at_idx "
+        "ON cycle_counts (uploaded_at, id);",
+    # Incremental snapshot sync, which pages on (updated_at, id)
+    "cycle_counts_updated_at_idx":
+        "CREATE INDEX {concurrently}IF NOT EXISTS cycle_counts_updated_at_idx "
+        "ON cycle_counts (updated_at, id);",
+    # Substring (ILIKE '%...%') search boxes for items and locations
+    "cycle_counts_item_id_trgm_idx":
+        "CREATE INDEX {concurrently}IF NOT EXISTS cycle_counts_item_id_trgm_idx "
+        "ON cycle_counts USING gin (item_id gin_trgm_ops);",
+    "cycle_counts_location_trgm_idx":
+        "CREATE INDEX {concurrently}IF NOT EXISTS cycle_counts_location_trgm_idx "
+        "ON cycle_counts USING gin (location gin_trgm_ops);"
+}
+
+# The trigram indexes need the pg_trgm extension
+CREATE_PG_TRGM_EXTENSION = "CREATE EXTENSION IF NOT EXISTS pg_trgm;"
+
+# SQL for new deployments, run after CREATE_CYCLE_COUNTS_TABLE
+CREATE_CYCLE_COUNTS_INDEXES = "\n".join(
+    [CREATE_PG_TRGM_EXTENSION] + [ddl.format(concurrently="") for ddl in CYCLE_COUNTS_INDEXES.values()]
+)
+
+# SQL listing the indexes that already exist on cycle_counts
+LIST_CYCLE_COUNTS_INDEXES = """
+SELECT indexname FROM pg_indexes WHERE schemaname = 'public' AND tablename = 'cycle_counts';
+"""
+
+def build_index_statements(existing_indexes=(), concurrently=True):
+    """
+    Build the statements that add the missing cycle_counts indexes to an existing deployment
+    
+    Args:
+        existing_indexes (iterable): Index names already present, e.g. the result
+            of LIST_CYCLE_COUNTS_INDEXES; every statement is IF NOT EXISTS anyway
+        concurrently (bool): Build without locking out writes. CONCURRENTLY cannot
+            run inside a transaction, so run each statement on its own. It is not
+            supported on the partitioned layout; pass False there.
+    
+    Returns:
+        list: SQL statements, empty if nothing is missing
+    """
+    existing_indexes = set(existing_indexes)
+    missing = [name for name in CYCLE_COUNTS_INDEXES if name not in existing_indexes]
+    if not missing:
+        return []
+    
+    statements = []
+    if any(name.endswith("_trgm_idx") for name in missing):
+        statements.append(CREATE_PG_TRGM_EXTENSION)
+    for name in missing:
+        statements.append(CYCLE_COUNTS_INDEXES[name].format(concurrently="CONCURRENTLY " if concurrently else ""))
+    return statements
+
+def build_index_migration(existing_indexes=(), concurrently=True):
+    """
+    Build the SQL that adds the missing cycle_counts indexes as one script
+    
+    Only pass concurrently=True if each line will be run on its own: the Supabase SQL
+    editor runs a script in one transaction, where CREATE INDEX CONCURRENTLY fails.
+    
+    Args:
+        existing_indexes (iterable): Index names already present
+        concurrently (bool): See build_index_statements
+    
+    Returns:
+        str: SQL statements, one per line, or "" if nothing is missing
+    """
+    return "\n".join(build_index_statements(existing_indexes, concurrently))
+
+# Columns computed by the database from system_count and actual_count. They are
+# never written by the app; Postgres rejects explicit values for them.
+CYCLE_COUNTS_GENERATED_COLUMNS = ["variance", "percent_diff"]
+
+# Existing deployments switch in three steps, because app versions that send
+# variance/percent_diff fail against generated columns and versions that do not
+# send them fail against the old NOT NULL columns:
+#   1. run MIGRATE_CYCLE_COUNTS_VARIANCE_NULLABLE (both app versions can insert)
+#   2. deploy the app version that no longer sends the two columns
+#   3. run MIGRATE_CYCLE_COUNTS_GENERATED_VARIANCE, which also fills in the rows
+#      inserted without them in between
+MIGRATE_CYCLE_COUNTS_VARIANCE_NULLABLE = """
+ALTER TABLE cycle_counts ALTER COLUMN variance DROP NOT NULL, ALTER COLUMN percent_diff DROP NOT NULL;
+ALTER TABLE IF EXISTS cycle_count_latest ALTER COLUMN variance DROP NOT NULL;
+"""
+
+# SQL to turn the stored variance/percent_diff columns of existing deployments into
+# generated columns (Postgres cannot convert a column in place, so they are re-added)
+MIGRATE_CYCLE_COUNTS_GENERATED_VARIANCE = """
+ALTER TABLE cycle_counts DROP COLUMN variance, DROP COLUMN percent_diff;
+ALTER TABLE cycle_counts
+    ADD COLUMN variance NUMERIC GENERATED ALWAYS AS (actual_count - system_count) STORED,
+    ADD COLUMN percent_diff NUMERIC GENERATED ALWAYS AS (
+        CASE WHEN system_count <> 0 THEN (actual_count - system_count) / system_count * 100 ELSE 0 END
+    ) STORED;
+
+-- Rows inserted between the steps reached cycle_count_latest without a variance
+DO $$
+BEGIN
+    IF to_regclass('cycle_count_latest') IS NOT NULL THEN
+        UPDATE cycle_count_latest AS latest SET variance = counts.variance
+        FROM cycle_counts AS counts
+        WHERE counts.id = latest.id AND latest.variance IS DISTINCT FROM counts.variance;
+        ALTER TABLE cycle_count_latest ALTER COLUMN variance SET NOT NULL;
+    END IF;
+END $$;
+"""
+
+# View listing the distinct customers per warehouse, for the dashboard customer filter
+CYCLE_COUNT_CUSTOMERS_VIEW = "cycle_count_customers"
+
+CREATE_CYCLE_COUNT_CUSTOMERS_VIEW = """
+CREATE OR REPLACE VIEW cycle_count_customers AS
+SELECT DISTINCT customer, warehouse_id
+FROM cycle_counts;
+"""
+
+# Function returning the dashboard summary metrics as one JSON object, so the
+# summary does not need the rows themselves. Both arguments are optional scopes.
+CYCLE_COUNT_SUMMARY_FUNCTION = "cycle_count_summary"
+
+CREATE_CYCLE_COUNT_SUMMARY_FUNCTION = """
+CREATE OR REPLACE FUNCTION cycle_count_summary(
+    p_warehouse_id INTEGER DEFAULT NULL,
+    p_customer TEXT DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql STABLE
+AS $$
+SELECT json_build_object(
+    'total_items', COUNT(*),
+    'total_customers', COUNT(DISTINCT customer),
+    'total_users', COUNT(DISTINCT uploaded_by),
+    'items_last_week', COUNT(*) FILTER (WHERE uploaded_at >= NOW() - INTERVAL '7 days'),
+    'items_last_month', COUNT(*) FILTER (WHERE uploaded_at >= NOW() - INTERVAL '30 days'),
+    'total_variance', COALESCE(SUM(variance), 0),
+    'mean_variance', AVG(variance)
+)
+FROM cycle_counts
+WHERE (p_warehouse_id IS NULL OR warehouse_id = p_warehouse_id)
+  AND (p_customer IS NULL OR customer = p_customer);
+$$;
 """
 
 # Column dictionary mappings (for application reference if needed)
@@ -122,7 +439,58 @@ CYCLE_COUNTS_COLUMNS = {
     "cycle_date": "cycle_date",
     "uploaded_by": "uploaded_by",
     "uploaded_at": "uploaded_at",
-    "warehouse_id": "warehouse_id"
+    "warehouse_id": "warehouse_id",
+    "updated_at": "updated_at"
+}
+
+# SQL type of each cycle_counts column, as in CREATE_CYCLE_COUNTS_TABLE; used to give
+# exports and DataFrames real types instead of the strings and numbers PostgREST returns
+CYCLE_COUNTS_COLUMN_TYPES = {
+    CYCLE_COUNTS_COLUMNS["id"]: "uuid",
+    CYCLE_COUNTS_COLUMNS["item_id"]: "text",
+    CYCLE_COUNTS_COLUMNS["description"]: "text",
+    CYCLE_COUNTS_COLUMNS["lot_number"]: "text",
+    CYCLE_COUNTS_COLUMNS["expiration_date"]: "date",
+    CYCLE_COUNTS_COLUMNS["unit"]: "text",
+    CYCLE_COUNTS_COLUMNS["status"]: "text",
+    CYCLE_COUNTS_COLUMNS["lp"]: "text",
+    CYCLE_COUNTS_COLUMNS["location"]: "text",
+    CYCLE_COUNTS_COLUMNS["system_count"]: "numeric",
+    CYCLE_COUNTS_COLUMNS["actual_count"]: "numeric",
+    CYCLE_COUNTS_COLUMNS["variance"]: "numeric",
+    CYCLE_COUNTS_COLUMNS["percent_diff"]: "numeric",
+    CYCLE_COUNTS_COLUMNS["customer"]: "text",
+    CYCLE_COUNTS_COLUMNS["notes"]: "text",
+    CYCLE_COUNTS_COLUMNS["cycle_date"]: "date",
+    CYCLE_COUNTS_COLUMNS["uploaded_by"]: "uuid",
+    CYCLE_COUNTS_COLUMNS["uploaded_at"]: "timestamp",
+    CYCLE_COUNTS_COLUMNS["warehouse_id"]: "integer",
+    CYCLE_COUNTS_COLUMNS["updated_at"]: "timestamp"
+}
+
+# Named column projections for cycle_counts reads, so each view only
+# transfers and decodes the fields it actually uses
+CYCLE_COUNTS_PROJECTIONS = {
+    # Dashboard data table, filters and the CSV download
+    "dashboard": [
+        "id", "item_id", "description", "lot_number", "expiration_date", "unit", "status", "lp",
+        "location", "system_count", "actual_count", "variance", "percent_diff", "customer",
+        "notes", "cycle_date", "uploaded_by", "uploaded_at", "warehouse_id"
+    ],
+    # Chart tab and top variance views
+    "charts": [
+        "id", "item_id", "description", "system_count", "actual_count", "variance",
+        "percent_diff", "customer", "cycle_date", "uploaded_by", "uploaded_at", "warehouse_id"
+    ],
+    # Summary metrics
+    "summary": ["id", "customer", "uploaded_by", "uploaded_at", "variance", "warehouse_id"],
+    # Inventory reconciliation tool
+    "reconciliation": [
+        "id", "item_id", "description", "unit", "location", "variance", "cycle_date",
+        "uploaded_at", "warehouse_id"
+    ],
+    # Full records (edit form, exports)
+    "export": list(CYCLE_COUNTS_COLUMNS.values())
 }
 
 WAREHOUSES_COLUMNS = {
@@ -142,3 +510,184 @@ USERS_COLUMNS = {
     "password_hash": "password_hash",
     "last_login": "last_login"
 }
+
+# Optional layout: cycle_counts range-partitioned by cycle_date month, so date-bounded
+# queries only scan the partitions they need. The primary key has to include the
+# partition key, so it becomes (id, cycle_date); upserts keyed on id alone need the
+# unpartitioned layout, natural-key upserts work with both.
+CREATE_CYCLE_COUNTS_PARTITIONED_TABLE = """
+CREATE TABLE IF NOT EXISTS cycle_counts (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    item_id TEXT NOT NULL,
+    description TEXT NOT NULL,
+    lot_number TEXT,
+    expiration_date DATE,
+    unit TEXT,
+    status TEXT,
+    lp TEXT,
+    location TEXT NOT NULL,
+    system_count NUMERIC NOT NULL,
+    actual_count NUMERIC NOT NULL,
+    variance NUMERIC GENERATED ALWAYS AS (actual_count - system_count) STORED,
+    percent_diff NUMERIC GENERATED ALWAYS AS (
+        CASE WHEN system_count <> 0 THEN (actual_count - system_count) / system_count * 100 ELSE 0 END
+    ) STORED,
+    customer TEXT NOT NULL,
+    notes TEXT,
+    cycle_date DATE NOT NULL,
+    uploaded_by UUID REFERENCES users(id) ON DELETE SET NULL,
+    uploaded_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    warehouse_id INTEGER REFERENCES warehouses(id) NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, cycle_date)
+) PARTITION BY RANGE (cycle_date);
+
+-- Catches rows outside every monthly partition until their month is created
+CREATE TABLE IF NOT EXISTS cycle_counts_default PARTITION OF cycle_counts DEFAULT;
+"""
+
+# Function creating the monthly partitions (cycle_counts_yYYYYmMM) that cover
+# p_from..p_to. Rows already sitting in the default partition for a new month are
+# moved into it. Returns the number of partitions created.
+CREATE_CYCLE_COUNTS_PARTITION_FUNCTION = """
+CREATE OR REPLACE FUNCTION create_cycle_counts_partitions(p_from DATE, p_to DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', p_from)::DATE;
+    month_end DATE;
+    partition_name TEXT;
+    column_list TEXT;
+    created INTEGER := 0;
+BEGIN
+    -- Generated columns cannot be inserted into, so moves copy the stored columns only
+    SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) INTO column_list
+    FROM pg_attribute
+    WHERE attrelid = 'cycle_counts'::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = '';
+    
+    WHILE month_start <= p_to LOOP
+        month_end := (month_start + INTERVAL '1 month')::DATE;
+        partition_name := format('cycle_counts_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+        
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE cycle_counts INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)',
+                partition_name);
+            -- A move is not a delete: keep the triggers (e.g. cycle_count_latest) out of it
+            ALTER TABLE cycle_counts_default DISABLE TRIGGER USER;
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM cycle_counts_default WHERE cycle_date >= %L AND cycle_date < %L RETURNING %s) '
+                'INSERT INTO %I (%s) SELECT * FROM moved',
+                month_start, month_end, column_list, partition_name, column_list);
+            ALTER TABLE cycle_counts_default ENABLE TRIGGER USER;
+            EXECUTE format('ALTER TABLE cycle_counts ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end);
+            created := created + 1;
+        END IF;
+        
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+def build_partition_migration(months_ahead=3, keep_old_table=True):
+    """
+    Build the SQL that converts an existing cycle_counts table to the partitioned layout
+    
+    The old table is renamed to cycle_counts_unpartitioned, monthly partitions are
+    created from its first cycle date up to months_ahead months from now, the rows
+    are copied across, and the indexes, triggers and view are recreated on the new
+    table. Everything runs in one transaction that locks cycle_counts, so schedule
+    it outside working hours.
+    
+    Args:
+        months_ahead (int): Future months to create partitions for
+        keep_old_table (bool): Keep cycle_counts_unpartitioned as a backup instead of dropping it
+    
+    Returns:
+        str: SQL script
+    """
+    columns = ", ".join(col for col in CYCLE_COUNTS_COLUMNS.values() if col not in CYCLE_COUNTS_GENERATED_COLUMNS)
+    
+    # The old table's indexes keep their names; move them aside so the new ones get created
+    rename_indexes = [
+        f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_unpartitioned;"
+        for name in list(CYCLE_COUNTS_INDEXES) + ["cycle_counts_natural_key"]
+    ]
+    
+    statements = [
+        "BEGIN;",
+        "LOCK TABLE cycle_counts IN ACCESS EXCLUSIVE MODE;",
+        "ALTER TABLE cycle_counts RENAME TO cycle_counts_unpartitioned;",
+        "ALTER TABLE cycle_counts_unpartitioned RENAME CONSTRAINT cycle_counts_pkey TO cycle_counts_unpartitioned_pkey;",
+        "DROP TRIGGER IF EXISTS cycle_counts_set_updated_at ON cycle_counts_unpartitioned;",
+        "DROP TRIGGER IF EXISTS cycle_counts_maintain_latest ON cycle_counts_unpartitioned;",
+        *rename_indexes,
+        CREATE_CYCLE_COUNTS_PARTITIONED_TABLE,
+        CREATE_CYCLE_COUNTS_PARTITION_FUNCTION,
+        "SELECT create_cycle_counts_partitions(",
+        "    COALESCE((SELECT MIN(cycle_date) FROM cycle_counts_unpartitioned), CURRENT_DATE),",
+        f"    (CURRENT_DATE + INTERVAL '{int(months_ahead)} months')::DATE",
+        ");",
+        f"INSERT INTO cycle_counts ({columns}) SELECT {columns} FROM cycle_counts_unpartitioned;",
+        CREATE_CYCLE_COUNTS_INDEXES,
+        CREATE_CYCLE_COUNTS_NATURAL_KEY_INDEX,
+        CREATE_CYCLE_COUNTS_UPDATED_AT_TRIGGER,
+        CREATE_CYCLE_COUNT_LATEST_TRIGGERS,
+        CREATE_CYCLE_COUNT_CUSTOMERS_VIEW
+    ]
+    if not keep_old_table:
+        statements.append("DROP TABLE cycle_counts_unpartitioned CASCADE;")
+    statements.append("COMMIT;")
+    return "\n".join(statements)
+
+# SQL to run monthly (e.g. from pg_cron) so next months' partitions always exist
+CREATE_FUTURE_CYCLE_COUNTS_PARTITIONS = """
+SELECT create_cycle_counts_partitions(CURRENT_DATE, (CURRENT_DATE + INTERVAL '3 months')::DATE);
+"""
+
+if __name__ == "__main__":
+    import sys
+    
+    # Print a migration for an existing deployment:
+    #   python -m database.schema              missing indexes, built concurrently; run each on its own
+    #   python -m database.schema indexes-locking  missing indexes as one script that blocks writes while it runs
+    #   python -m database.schema updated-at   add updated_at and its trigger (before partitions)
+    #   python -m database.schema partitions   switch to the partitioned layout
+    #   python -m database.schema generated-prepare  before deploying: let inserts omit variance/percent_diff
+    #   python -m database.schema generated    after deploying: compute variance/percent_diff in the database
+    #   python -m database.schema natural-key  (re)build the natural key index, resolving duplicates
+    #   python -m database.schema latest       create and fill cycle_count_latest for reconciliation
+    #   python -m database.schema customers-view  create the view behind the dashboard customer filter
+    #   python -m database.schema summary-function  create the function behind the dashboard summary metrics
+    if len(sys.argv) > 1 and sys.argv[1] == "updated-at":
+        print(MIGRATE_CYCLE_COUNTS_ADD_UPDATED_AT)
+        print(CREATE_CYCLE_COUNTS_UPDATED_AT_TRIGGER)
+    elif len(sys.argv) > 1 and sys.argv[1] == "partitions":
+        print(build_partition_migration())
+    elif len(sys.argv) > 1 and sys.argv[1] == "latest":
+        print(CREATE_CYCLE_COUNT_LATEST_TABLE)
+        print(CREATE_CYCLE_COUNT_LATEST_TRIGGERS)
+        print(BACKFILL_CYCLE_COUNT_LATEST)
+    elif len(sys.argv) > 1 and sys.argv[1] == "customers-view":
+        print(CREATE_CYCLE_COUNT_CUSTOMERS_VIEW)
+    elif len(sys.argv) > 1 and sys.argv[1] == "summary-function":
+        print(CREATE_CYCLE_COUNT_SUMMARY_FUNCTION)
+    elif len(sys.argv) > 1 and sys.argv[1] == "natural-key":
+        print(FIND_CYCLE_COUNTS_NATURAL_KEY_DUPLICATES)
+        print(MIGRATE_CYCLE_COUNTS_NATURAL_KEY)
+    elif len(sys.argv) > 1 and sys.argv[1] == "generated-prepare":
+        print(MIGRATE_CYCLE_COUNTS_VARIANCE_NULLABLE)
+    elif len(sys.argv) > 1 and sys.argv[1] == "generated":
+        print(MIGRATE_CYCLE_COUNTS_GENERATED_VARIANCE)
+    elif len(sys.argv) > 1 and sys.argv[1] == "indexes-locking":
+        print(build_index_migration(concurrently=False))
+    else:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and the Supabase
+        # SQL editor runs everything pasted at once as one, so print them one by one
+        statements = build_index_statements()
+        if statements:
+            print("-- Run each statement below on its own (CREATE INDEX CONCURRENTLY cannot run in a transaction)")
+        for number, statement in enumerate(statements, 1):
+            print(f"\n-- {number} of {len(statements)}")
+            print(statement)
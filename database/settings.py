@@ -0,0 +1,17 @@
+import streamlit as st
+
+def get_app_setting(name, default):
+    """
+    Read an optional value from the [app_settings] section of secrets.toml
+    
+    Args:
+        name (str): Setting name
+        default: Value returned when the setting (or the secrets file) is missing
+    
+    Returns:
+        The configured value, or default
+    """
+    try:
+        return st.secrets.get("app_settings", {}).get(name, default)
+    except Exception:
+        return default
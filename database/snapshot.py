@@ -0,0 +1,267 @@
+import os
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from database.schema import CYCLE_COUNTS_COLUMNS, CYCLE_COUNTS_PROJECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Each sync re-reads this far behind the high-water mark, so rows committed by a
+# transaction that started before the previous sync (and so carry an older NOW())
+# are still picked up. Re-read rows simply replace themselves.
+SYNC_OVERLAP = timedelta(minutes=5)
+
+# Parquet metadata keys used to persist the sync state next to the data
+HIGH_WATER_MARK_KEY = b"cycle_counts.high_water_mark"
+LAST_ID_DIFF_KEY = b"cycle_counts.last_id_diff"
+
+class CycleCountSnapshot:
+    """
+    Local Parquet copy of the cycle_counts table, kept current incrementally
+    
+    Each refresh only downloads rows whose updated_at is at or past the stored
+    high-water mark (new and edited rows) and merges them in by id. Deleted rows
+    are reconciled by a periodic diff against the full id set. One snapshot is
+    shared by every session in the process.
+    """
+    
+    def __init__(self, path, refresh_seconds=60, id_diff_seconds=3600):
+        """
+        Args:
+            path (str): Parquet file the snapshot is persisted to
+            refresh_seconds (float): Minimum time between incremental syncs
+            id_diff_seconds (float): Minimum time between delete reconciliations
+        """
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.id_diff_seconds = id_diff_seconds
+        self.high_water_mark = None
+        self.last_id_diff = 0.0
+        self.last_refresh = 0.0
+        self._df = pd.DataFrame(columns=list(CYCLE_COUNTS_COLUMNS.values()))
+        self._lock = threading.Lock()
+        self._load()
+    
+    def _load(self):
+        """Load a previously persisted snapshot, if there is one"""
+        if not os.path.exists(self.path):
+            return
+        
+        try:
+            table = pq.read_table(self.path)
+            metadata = table.schema.metadata or {}
+            self._df = table.to_pandas()
+            if HIGH_WATER_MARK_KEY in metadata:
+                self.high_water_mark = metadata[HIGH_WATER_MARK_KEY].decode()
+            if LAST_ID_DIFF_KEY in metadata:
+                self.last_id_diff = float(metadata[LAST_ID_DIFF_KEY].decode())
+        except Exception as e:
+            # A damaged file just means a full resync
+            logger.warning(f"Ignoring unreadable cycle count snapshot {self.path}: {str(e)}")
+    
+    def _save(self):
+        """Write the snapshot and its sync state atomically"""
+        table = pa.Table.from_pandas(self._df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        if self.high_water_mark:
+            metadata[HIGH_WATER_MARK_KEY] = self.high_water_mark.encode()
+        metadata[LAST_ID_DIFF_KEY] = str(self.last_id_diff).encode()
+        table = table.replace_schema_metadata(metadata)
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, self.path)
+    
+    def mark_stale(self, deleted=False):
+        """
+        Make the next read sync again, e.g. after a write from this process
+        
+        Args:
+            deleted (bool): Rows were deleted, so also reconcile deletes on the next sync
+                instead of waiting for id_diff_seconds
+        """
+        self.last_refresh = 0.0
+        if deleted:
+            self.last_id_diff = 0.0
+    
+    def discard(self, ids, warehouse_id=None):
+        """
+        Drop rows this process deleted by id, without waiting for a delete reconciliation
+        
+        Args:
+            ids (list): IDs of the deleted records
+            warehouse_id (int, optional): The delete was limited to this warehouse, so rows
+                of other warehouses with these ids are kept
+        
+        Returns:
+            int: Number of local rows dropped
+        """
+        with self._lock:
+            if self._df.empty:
+                return 0
+            
+            mask = self._df[CYCLE_COUNTS_COLUMNS["id"]].isin(set(ids))
+            if warehouse_id:
+                mask &= self._df[CYCLE_COUNTS_COLUMNS["warehouse_id"]] == warehouse_id
+            removed = int(mask.sum())
+            if removed:
+                self._df = self._df[~mask].reset_index(drop=True)
+                self._save()
+            return removed
+    
+    def refresh(self, client, force=False):
+        """
+        Merge in rows changed since the high-water mark, and reconcile deletes when due
+        
+        Args:
+            client (SupabaseClient): Client used to fetch changes
+            force (bool): Sync even if the refresh interval has not elapsed
+        
+        Returns:
+            int: Number of changed rows downloaded
+        """
+        with self._lock:
+            now = time.time()
+            if not force and now - self.last_refresh < self.refresh_seconds:
+                return 0
+            
+            try:
+                changed = self._sync_changes(client)
+                removed = 0
+                if now - self.last_id_diff >= self.id_diff_seconds:
+                    removed = self._reconcile_deletes(client)
+                    self.last_id_diff = now
+                
+                if changed or removed:
+                    self._save()
+                self.last_refresh = now
+                return changed
+            except Exception as e:
+                if self._df.empty:
+                    raise
+                # Keep serving the last good snapshot; the next read retries
+                logger.warning(f"Cycle count snapshot sync failed, serving stale data: {str(e)}")
+                return 0
+    
+    def _sync_changes(self, client):
+        """Download rows with updated_at past the high-water mark and merge them by id"""
+        updated_at_col = CYCLE_COUNTS_COLUMNS["updated_at"]
+        id_col = CYCLE_COUNTS_COLUMNS["id"]
+        
+        since = None
+        if self.high_water_mark:
+            since = (datetime.fromisoformat(self.high_water_mark) - SYNC_OVERLAP).isoformat()
+        
+        rows = []
+        for page in client.iter_cycle_count_changes(updated_since=since, columns="export"):
+            rows.extend(page)
+        
+        if not rows:
+            return 0
+        
+        changes = pd.DataFrame(rows)
+        kept = self._df[~self._df[id_col].isin(changes[id_col])] if not self._df.empty else None
+        merged = pd.concat([kept, changes], ignore_index=True) if kept is not None and not kept.empty else changes
+        self._df = self._sort(merged)
+        
+        newest = changes[updated_at_col].max()
+        if not self.high_water_mark or newest > self.high_water_mark:
+            self.high_water_mark = newest
+        return len(rows)
+    
+    def _reconcile_deletes(self, client):
+        """Drop local rows whose id no longer exists in the database"""
+        if self._df.empty:
+            return 0
+        
+        id_col = CYCLE_COUNTS_COLUMNS["id"]
+        live_ids = set()
+        for page in client.iter_cycle_count_changes(columns=[id_col]):
+            live_ids.update(row[id_col] for row in page)
+        
+        mask = self._df[id_col].isin(live_ids)
+        removed = int((~mask).sum())
+        if removed:
+            self._df = self._df[mask].reset_index(drop=True)
+        return removed
+    
+    @staticmethod
+    def _sort(df):
+        """Keep the same (uploaded_at, id) order as reads from Supabase"""
+        return df.sort_values(
+            [CYCLE_COUNTS_COLUMNS["uploaded_at"], CYCLE_COUNTS_COLUMNS["id"]]
+        ).reset_index(drop=True)
+    
+    def _filter(self, filters=None):
+        """Apply apply_cycle_count_filters semantics to the local frame"""
+        df = self._df
+        filters = filters or {}
+        if df.empty:
+            return df
+        
+        mask = pd.Series(True, index=df.index)
+        if filters.get("customer"):
+            mask &= df[CYCLE_COUNTS_COLUMNS["customer"]] == filters["customer"]
+        if filters.get("date_from"):
+            mask &= df[CYCLE_COUNTS_COLUMNS["cycle_date"]] >= filters["date_from"].isoformat()
+        if filters.get("date_to"):
+            mask &= df[CYCLE_COUNTS_COLUMNS["cycle_date"]] <= filters["date_to"].isoformat()
+        if filters.get("warehouse_id"):
+            mask &= df[CYCLE_COUNTS_COLUMNS["warehouse_id"]] == filters["warehouse_id"]
+        
+        uploaded_by = filters.get("uploaded_by")
+        if uploaded_by:
+            if isinstance(uploaded_by, (list, tuple, set)):
+                mask &= df[CYCLE_COUNTS_COLUMNS["uploaded_by"]].isin(list(uploaded_by))
+            else:
+                mask &= df[CYCLE_COUNTS_COLUMNS["uploaded_by"]] == uploaded_by
+        
+        if filters.get("item_search"):
+            mask &= df[CYCLE_COUNTS_COLUMNS["item_id"]].astype(str).str.contains(
+                filters["item_search"], case=False, regex=False, na=False)
+        if filters.get("location_search"):
+            mask &= df[CYCLE_COUNTS_COLUMNS["location"]].astype(str).str.contains(
+                filters["location_search"], case=False, regex=False, na=False)
+        
+        return df[mask]
+    
+    def read(self, columns=None, filters=None):
+        """
+        Read cycle counts from the snapshot
+        
+        Args:
+            columns (str | list, optional): Projection name or column list, None for all columns
+            filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+        
+        Returns:
+            list: List of cycle count records, with missing values as None
+        """
+        df = self._filter(filters)
+        
+        if columns is not None:
+            if isinstance(columns, str):
+                columns = CYCLE_COUNTS_PROJECTIONS[columns]
+            df = df[[col for col in columns if col in df.columns]]
+        
+        return df.astype(object).where(df.notna(), None).to_dict('records')
+    
+    def count(self, filters=None):
+        """
+        Count snapshot rows matching the filters
+        
+        Args:
+            filters (dict, optional): Keyword arguments for apply_cycle_count_filters
+        
+        Returns:
+            int: Number of matching records
+        """
+        return len(self._filter(filters))